@@ -0,0 +1,331 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# Value of one unit of each currency in EUR, used to compute every pair shown by the fake converter
+EUR_RATES = {
+    "EUR": 1.0,
+    "GBP": 1.17,
+    "TRY": 0.027,
+    "USD": 0.92,
+    "CHF": 1.05,
+    "JPY": 0.0061,
+}
+
+CURRENCY_NAMES = {
+    "EUR": "Euro",
+    "GBP": "British Pound",
+    "TRY": "Turkish Lira",
+    "USD": "US Dollar",
+    "CHF": "Swiss Franc",
+    "JPY": "Japanese Yen",
+}
+
+COUNTRY_CURRENCIES = {
+    "GB": ["GBP"],
+    "TR": ["TRY"],
+    "US": ["USD"],
+    "CH": ["CHF"],
+    "JP": ["JPY"],
+    "DE": ["EUR"],
+    "FR": ["EUR"],
+}
+
+CONVERTER_PATH = "/currency-converter/en/"
+RESTCOUNTRIES_PATH = "/v3.1"
+
+# A static replica of the OANDA converter: same element IDs and selectors as the real page,
+# an autocomplete that selects the first matching option on ArrowDown + Enter, a OneTrust-like
+# consent banner, and a rate that is rendered after a configurable delay.
+CONVERTER_PAGE = """<!DOCTYPE html>
+<html>
+<head><title>Currency Converter</title></head>
+<body>
+<div id="onetrust-banner" style="display:none">
+  <button id="onetrust-accept-btn-handler">Accept All Cookies</button>
+</div>
+<div id="converter"></div>
+<template id="converter-template">
+  <div class="MuiAutocomplete-root">
+    <input id="baseCurrency_currency_autocomplete" value="Euro" autocomplete="off">
+    <ul id="baseCurrency_currency_autocomplete-listbox" role="listbox"></ul>
+  </div>
+  <input name="numberformat" tabindex="3" value="1">
+  <div class="MuiAutocomplete-root">
+    <input id="quoteCurrency_currency_autocomplete" value="US Dollar" autocomplete="off">
+    <ul id="quoteCurrency_currency_autocomplete-listbox" role="listbox"></ul>
+  </div>
+  <input name="numberformat" tabindex="4" value="">
+</template>
+<script>
+const RATES = __RATES__;
+const NAMES = __NAMES__;
+const PAGE_DELAY_MS = __PAGE_DELAY_MS__;
+const RATE_DELAY_MS = __RATE_DELAY_MS__;
+const selected = {baseCurrency: "EUR", quoteCurrency: "USD"};
+let rateTimer = null;
+
+function renderRate() {
+  const rateInput = document.querySelector("input[name='numberformat'][tabindex='4']");
+  clearTimeout(rateTimer);
+  rateTimer = setTimeout(() => {
+    const rate = RATES[selected.baseCurrency] / RATES[selected.quoteCurrency];
+    rateInput.value = rate.toFixed(5);
+  }, RATE_DELAY_MS);
+}
+
+function setupAutocomplete(field) {
+  const input = document.getElementById(field + "_currency_autocomplete");
+  const listbox = document.getElementById(field + "_currency_autocomplete-listbox");
+  let active = -1;
+
+  function options() { return Array.from(listbox.querySelectorAll("li[role='option']")); }
+
+  function choose(option) {
+    selected[field] = option.dataset.code;
+    input.value = NAMES[option.dataset.code];
+    listbox.innerHTML = "";
+    active = -1;
+    renderRate();
+  }
+
+  input.addEventListener("focus", () => input.select());
+  input.addEventListener("input", () => {
+    const text = input.value.trim().toUpperCase();
+    listbox.innerHTML = "";
+    active = -1;
+    Object.keys(NAMES)
+      .filter((code) => text && (code.startsWith(text) || NAMES[code].toUpperCase().startsWith(text)))
+      .forEach((code) => {
+        const option = document.createElement("li");
+        option.setAttribute("role", "option");
+        option.dataset.code = code;
+        option.textContent = code + " " + NAMES[code];
+        option.addEventListener("mousedown", (event) => { event.preventDefault(); choose(option); });
+        listbox.appendChild(option);
+      });
+  });
+  input.addEventListener("keydown", (event) => {
+    const items = options();
+    if (event.key === "ArrowDown" && items.length) {
+      active = Math.min(active + 1, items.length - 1);
+      event.preventDefault();
+    } else if (event.key === "Enter" && active >= 0) {
+      choose(items[active]);
+      event.preventDefault();
+    }
+  });
+}
+
+setTimeout(() => {
+  const template = document.getElementById("converter-template");
+  document.getElementById("converter").appendChild(template.content.cloneNode(true));
+  setupAutocomplete("baseCurrency");
+  setupAutocomplete("quoteCurrency");
+  renderRate();
+  if (!document.cookie.includes("OptanonAlertBoxClosed")) {
+    document.getElementById("onetrust-banner").style.display = "block";
+  }
+}, PAGE_DELAY_MS);
+
+document.getElementById("onetrust-accept-btn-handler").addEventListener("click", () => {
+  document.cookie = "OptanonAlertBoxClosed=" + new Date().toISOString() + "; path=/";
+  document.cookie = "OptanonConsent=isGpcEnabled=0; path=/";
+  document.getElementById("onetrust-banner").style.display = "none";
+});
+</script>
+</body>
+</html>
+"""
+
+
+class FakeServers:
+    """
+    Local stand-ins for the OANDA converter page and the restcountries API, served from one
+    threaded HTTP server on 127.0.0.1.
+    """
+
+    def __init__(
+        self,
+        page_delay_ms: int = 300,
+        rate_delay_ms: int = 500,
+        api_delay_ms: int = 50,
+        port: int = 0,
+    ):
+        """
+        Initialize the FakeServers.
+
+        Args:
+            page_delay_ms (int): Delay before the converter page renders its inputs, in milliseconds.
+            rate_delay_ms (int): Delay before a new rate is rendered after a currency is selected, in milliseconds.
+            api_delay_ms (int): Delay of every restcountries response, in milliseconds.
+            port (int): The port to listen on. A free port is picked when 0.
+        """
+        self.page_delay_ms = page_delay_ms
+        self.rate_delay_ms = rate_delay_ms
+        self.api_delay_ms = api_delay_ms
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """
+        The root URL of the server.
+
+        Returns:
+            str: The URL, without a trailing slash.
+        """
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def converter_url(self) -> str:
+        """
+        The URL of the fake converter page, to use as CurrencyConverter.URL.
+
+        Returns:
+            str: The URL.
+        """
+        return self.base_url + CONVERTER_PATH
+
+    @property
+    def restcountries_url(self) -> str:
+        """
+        The base URL of the fake restcountries API, to use as CountryInfo.BASE_URL.
+
+        Returns:
+            str: The URL.
+        """
+        return self.base_url + RESTCOUNTRIES_PATH
+
+    def start(self) -> "FakeServers":
+        """
+        Start serving in a background thread.
+
+        Returns:
+            FakeServers: The started servers.
+        """
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """
+        Stop serving.
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    def render_converter_page(self) -> str:
+        """
+        Render the fake converter page with the configured delays.
+
+        Returns:
+            str: The HTML page.
+        """
+        return (
+            CONVERTER_PAGE.replace("__RATES__", json.dumps(EUR_RATES))
+            .replace("__NAMES__", json.dumps(CURRENCY_NAMES))
+            .replace("__PAGE_DELAY_MS__", str(self.page_delay_ms))
+            .replace("__RATE_DELAY_MS__", str(self.rate_delay_ms))
+        )
+
+    def _handler(self) -> type:
+        """
+        Build the request handler class bound to these servers.
+
+        Returns:
+            type: The BaseHTTPRequestHandler subclass.
+        """
+        servers = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+
+                if url.path == CONVERTER_PATH:
+                    self._send(200, servers.render_converter_page(), "text/html")
+                elif url.path.startswith(RESTCOUNTRIES_PATH + "/"):
+                    threading.Event().wait(servers.api_delay_ms / 1000)
+                    status, payload = _restcountries_response(
+                        url.path[len(RESTCOUNTRIES_PATH) :], parse_qs(url.query)
+                    )
+                    self._send(status, json.dumps(payload), "application/json")
+                else:
+                    self._send(404, "Not found", "text/plain")
+
+            def _send(self, status: int, body: str, content_type: str):
+                content = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self) -> "FakeServers":
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def _country_document(country_code: str, fields: Optional[List[str]]) -> Dict:
+    """
+    Build a restcountries-like country document.
+
+    Args:
+        country_code (str): The ISO 3166-1 alpha-2 country code.
+        fields (Optional[List[str]]): The fields to keep, or None for the full document.
+
+    Returns:
+        Dict: The country document.
+    """
+    document = {
+        "cca2": country_code,
+        "name": {"common": country_code},
+        "currencies": {
+            currency: {"name": CURRENCY_NAMES[currency]}
+            for currency in COUNTRY_CURRENCIES[country_code]
+        },
+    }
+    if fields is None:
+        return document
+    return {key: value for key, value in document.items() if key in fields}
+
+
+def _restcountries_response(path: str, query: Dict[str, List[str]]):
+    """
+    Answer a restcountries API request.
+
+    Args:
+        path (str): The request path below /v3.1.
+        query (Dict[str, List[str]]): The parsed query string.
+
+    Returns:
+        Tuple[int, object]: The status code and the JSON payload.
+    """
+    fields = query["fields"][0].split(",") if "fields" in query else None
+
+    if path == "/all":
+        return 200, [
+            _country_document(country_code, fields)
+            for country_code in COUNTRY_CURRENCIES
+        ]
+
+    if path.startswith("/alpha/"):
+        country_code = path[len("/alpha/") :].upper()
+        if country_code not in COUNTRY_CURRENCIES:
+            return 404, {"status": 404, "message": "Not Found"}
+        document = _country_document(country_code, fields)
+        # Like the real API, a filtered lookup returns an object, a full one a list
+        return 200, document if fields else [document]
+
+    return 404, {"status": 404, "message": "Not Found"}
@@ -0,0 +1,416 @@
+"""
+Benchmark the conversion pipeline against local stand-ins of the OANDA converter page and
+the restcountries API, and save the results so runs can be compared over time.
+
+Usage:
+    python -m benchmarks.run_benchmarks --conversions 20 --workers 4
+"""
+
+import argparse
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from itertools import cycle, islice
+from typing import Callable, Dict, Optional, Sequence, Tuple
+
+from benchmarks.fake_servers import COUNTRY_CURRENCIES, FakeServers
+from src.country_info import CountryInfo
+from src.currency_converter import CurrencyConverter
+from src.currency_utils import conversions, get_currency_rate
+from src.driver_factory import DRIVER_FACTORIES, get_driver_factory
+from src.driver_pool import DriverPool
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+MODES = ("serial", "pooled", "concurrent", "batch", "tabs")
+
+
+def percentile(values: Sequence[float], fraction: float) -> Optional[float]:
+    """
+    Compute a percentile with linear interpolation between the closest ranks.
+
+    Args:
+        values (Sequence[float]): The measured values.
+        fraction (float): The percentile as a fraction, e.g. 0.95.
+
+    Returns:
+        Optional[float]: The percentile, or None if there are no values.
+    """
+    if not values:
+        return None
+
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def process_tree_rss_bytes(root_pid: int) -> Optional[int]:
+    """
+    Sum the resident memory of a process and all its descendants, e.g. chromedriver and Chrome.
+    Only supported on Linux.
+
+    Args:
+        root_pid (int): The process ID at the root of the tree.
+
+    Returns:
+        Optional[int]: The resident memory in bytes, or None if /proc is not available.
+    """
+    if not os.path.isdir("/proc"):
+        return None
+
+    parents: Dict[int, int] = {}
+    resident: Dict[int, int] = {}
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as file:
+                fields = file.read().rsplit(")", 1)[1].split()
+            with open(f"/proc/{entry}/statm", encoding="utf-8") as file:
+                resident[int(entry)] = int(file.read().split()[1]) * page_size
+            parents[int(entry)] = int(fields[1])
+        except (OSError, IndexError, ValueError):
+            continue
+
+    tree = {root_pid}
+    changed = True
+    while changed:
+        changed = False
+        for pid, parent in parents.items():
+            if parent in tree and pid not in tree:
+                tree.add(pid)
+                changed = True
+
+    return sum(resident.get(pid, 0) for pid in tree)
+
+
+class MemorySampler:
+    """
+    Samples the resident memory of this process tree in a background thread and keeps the peak.
+    """
+
+    def __init__(self, interval_seconds: float = 0.2):
+        """
+        Initialize the MemorySampler.
+
+        Args:
+            interval_seconds (float): The time between two samples, in seconds.
+        """
+        self.interval_seconds = interval_seconds
+        self.peak_bytes: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def __enter__(self) -> "MemorySampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stop.set()
+        self._thread.join()
+
+    def _sample(self):
+        while True:
+            rss_bytes = process_tree_rss_bytes(os.getpid())
+            if rss_bytes is not None:
+                self.peak_bytes = max(self.peak_bytes or 0, rss_bytes)
+            if self._stop.wait(self.interval_seconds):
+                return
+
+
+def _timed_rate(convert: Callable[[], Tuple]) -> Tuple[float, bool]:
+    """
+    Time one call of get_currency_rate.
+
+    Args:
+        convert (Callable[[], Tuple]): A call returning (rate, currency, error).
+
+    Returns:
+        Tuple[float, bool]: The latency in seconds and whether the call succeeded.
+    """
+    start = time.perf_counter()
+    _, _, error = convert()
+    return time.perf_counter() - start, error is None
+
+
+def run_serial(driver: Callable, country_codes: Sequence[str], workers: int):
+    """
+    Convert one country at a time, each with a fresh browser, like the original main.py.
+    """
+    return [
+        _timed_rate(lambda: get_currency_rate(driver, country_code))
+        for country_code in country_codes
+    ]
+
+
+def run_pooled(driver: Callable, country_codes: Sequence[str], workers: int):
+    """
+    Convert one country at a time, reusing one warm browser from a pool.
+    """
+    with DriverPool(driver, size=1) as pool:
+        return [
+            _timed_rate(lambda: get_currency_rate(driver, country_code, pool=pool))
+            for country_code in country_codes
+        ]
+
+
+def run_concurrent(driver: Callable, country_codes: Sequence[str], workers: int):
+    """
+    Convert countries on a thread pool, each worker with its own warm browser.
+    """
+    with DriverPool(driver, size=workers) as pool:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(
+                executor.map(
+                    lambda country_code: _timed_rate(
+                        lambda: get_currency_rate(driver, country_code, pool=pool)
+                    ),
+                    country_codes,
+                )
+            )
+
+
+def run_batch(driver: Callable, country_codes: Sequence[str], workers: int):
+    """
+    Resolve all currencies, then convert every pair on a single loaded page,
+    or interleaved across one tab per worker of a single browser.
+    """
+    country_info = CountryInfo()
+    currencies = [country_info.run(country_code)[0] for country_code in country_codes]
+    pairs = [(currency, "EUR") for currency in currencies if currency]
+
+    measurements = []
+    start = time.perf_counter()
+    for _, _, _, error in CurrencyConverter(driver, tabs=workers).convert_many(pairs):
+        now = time.perf_counter()
+        measurements.append((now - start, error is None))
+        start = now
+    return measurements
+
+
+RUNNERS = {
+    "serial": run_serial,
+    "pooled": run_pooled,
+    "concurrent": run_concurrent,
+    "batch": run_batch,
+    "tabs": run_batch,
+}
+
+
+def benchmark(
+    mode: str, driver: Callable, country_codes: Sequence[str], workers: int
+) -> Dict:
+    """
+    Run one benchmark mode and summarize its throughput, latency and memory.
+    Conversions that waited for an identical one in flight are reported as coalesced and left
+    out of the throughput, so modes that coalesce are compared on the pages they actually converted.
+
+    Args:
+        mode (str): One of MODES.
+        driver (Callable): The driver factory.
+        country_codes (Sequence[str]): The country codes to convert.
+        workers (int): The number of concurrent workers, or tabs, for the concurrent and tabs modes.
+
+    Returns:
+        Dict: The benchmark summary.
+    """
+    mode_workers = workers if mode in ("concurrent", "tabs") else 1
+
+    shared = conversions.stats()["shared"]
+    with MemorySampler() as memory:
+        start = time.perf_counter()
+        measurements = RUNNERS[mode](driver, country_codes, mode_workers)
+        elapsed = time.perf_counter() - start
+    coalesced = conversions.stats()["shared"] - shared
+
+    latencies = [latency for latency, _ in measurements]
+    successes = sum(1 for _, is_success in measurements if is_success)
+    converted = max(successes - coalesced, 0)
+    peak_mb = memory.peak_bytes / 2**20 if memory.peak_bytes is not None else None
+
+    return {
+        "mode": mode,
+        "workers": mode_workers,
+        "conversions": len(measurements),
+        "errors": len(measurements) - successes,
+        "coalesced": coalesced,
+        "seconds": round(elapsed, 3),
+        "conversions_per_second": round(converted / elapsed, 3) if elapsed else None,
+        "latency_mean": round(statistics.mean(latencies), 3) if latencies else None,
+        "latency_p50": _round(percentile(latencies, 0.50)),
+        "latency_p95": _round(percentile(latencies, 0.95)),
+        "latency_p99": _round(percentile(latencies, 0.99)),
+        "peak_rss_mb": _round(peak_mb),
+        "rss_mb_per_worker": _round(peak_mb / mode_workers if peak_mb else None),
+    }
+
+
+def save_results(results: Dict, directory: str = RESULTS_DIR) -> str:
+    """
+    Save benchmark results as a timestamped JSON file.
+
+    Args:
+        results (Dict): The benchmark results.
+        directory (str): The directory to save to.
+
+    Returns:
+        str: The path of the saved file.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{results['started_at'].replace(':', '-')}.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    return path
+
+
+def load_latest_results(directory: str = RESULTS_DIR) -> Optional[Dict]:
+    """
+    Load the most recently saved benchmark results.
+
+    Args:
+        directory (str): The directory results are saved in.
+
+    Returns:
+        Optional[Dict]: The results, or None if none were saved.
+    """
+    if not os.path.isdir(directory):
+        return None
+
+    names = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    if not names:
+        return None
+
+    with open(os.path.join(directory, names[-1]), encoding="utf-8") as file:
+        return json.load(file)
+
+
+def print_report(results: Dict, previous: Optional[Dict]):
+    """
+    Print the benchmark summaries, with the change in throughput since the previous run.
+
+    Args:
+        results (Dict): The benchmark results.
+        previous (Optional[Dict]): The previously saved results.
+    """
+    previous_modes = {run["mode"]: run for run in (previous or {}).get("runs", [])}
+
+    print(
+        f"{'mode':<11}{'workers':>8}{'conv/s':>9}{'p50 s':>8}{'p95 s':>8}{'p99 s':>8}"
+        f"{'errors':>8}{'shared':>8}{'MB/worker':>11}{'vs last':>9}"
+    )
+    for run in results["runs"]:
+        before = previous_modes.get(run["mode"], {}).get("conversions_per_second")
+        change = (
+            f"{(run['conversions_per_second'] / before - 1) * 100:+.0f}%"
+            if before and run["conversions_per_second"]
+            else "-"
+        )
+        print(
+            f"{run['mode']:<11}{run['workers']:>8}{_text(run['conversions_per_second']):>9}"
+            f"{_text(run['latency_p50']):>8}{_text(run['latency_p95']):>8}"
+            f"{_text(run['latency_p99']):>8}{run['errors']:>8}{run.get('coalesced', 0):>8}"
+            f"{_text(run['rss_mb_per_worker']):>11}{change:>9}"
+        )
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 3) if value is not None else None
+
+
+def _text(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:g}"
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    Args:
+        argv (Optional[Sequence[str]]): The arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument(
+        "--modes", nargs="+", choices=MODES, default=list(MODES), help="Modes to run."
+    )
+    parser.add_argument(
+        "--countries",
+        nargs="+",
+        default=sorted(COUNTRY_CURRENCIES),
+        help="Country codes cycled through to build the workload.",
+    )
+    parser.add_argument(
+        "--conversions", type=int, default=20, help="Conversions per mode."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Workers in the concurrent mode, tabs in the tabs mode.",
+    )
+    parser.add_argument(
+        "--browser",
+        choices=sorted(DRIVER_FACTORIES),
+        default="lean",
+        help="Browser profile.",
+    )
+    parser.add_argument("--page-delay-ms", type=int, default=300)
+    parser.add_argument("--rate-delay-ms", type=int, default=500)
+    parser.add_argument("--api-delay-ms", type=int, default=50)
+    parser.add_argument("--results-dir", default=RESULTS_DIR)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> Dict:
+    """
+    Run the benchmarks against the local stand-ins and save the results.
+
+    Args:
+        argv (Optional[Sequence[str]]): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        Dict: The benchmark results.
+    """
+    args = parse_args(argv)
+    driver = get_driver_factory(args.browser)
+    country_codes = list(islice(cycle(args.countries), args.conversions))
+    previous = load_latest_results(args.results_dir)
+
+    results: Dict = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            key: value for key, value in vars(args).items() if key != "results_dir"
+        },
+        "runs": [],
+    }
+
+    original_urls = CurrencyConverter.URL, CountryInfo.BASE_URL
+    with FakeServers(
+        args.page_delay_ms, args.rate_delay_ms, args.api_delay_ms
+    ) as servers:
+        CurrencyConverter.URL = servers.converter_url
+        CountryInfo.BASE_URL = servers.restcountries_url
+        try:
+            for mode in args.modes:
+                results["runs"].append(
+                    benchmark(mode, driver, country_codes, args.workers)
+                )
+        finally:
+            CurrencyConverter.URL, CountryInfo.BASE_URL = original_urls
+
+    print_report(results, previous)
+    print(f"Saved {save_results(results, args.results_dir)}")
+    return results
+
+
+if __name__ == "__main__":
+    main()
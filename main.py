@@ -1,27 +1,185 @@
-from typing import Optional
+import argparse
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    TextIO,
+    Tuple,
+    Union,
+)
 
 from selenium import webdriver
 
-from src.currency_utils import get_currency_rate, check_threshold
+from src.batch_io import (
+    FORMATS,
+    ResultWriter,
+    count_completed_rows,
+    infer_format,
+    ordered_map,
+    read_items,
+)
+from src.cache_utils import default_cache_dir
+from src.consent_store import ConsentStore
+from src.country_cache import CountryCache
+from src.country_info import CountryInfo
+from src.currency_utils import (
+    DEFAULT_QUOTE_CURRENCY,
+    check_threshold,
+    conversions,
+    get_currency_rate,
+    get_currency_rates_in_tabs,
+    get_pair_rate,
+)
+from src.driver_factory import DRIVER_FACTORIES
+from src.driver_pool import DriverPool
+from src.error import CircuitOpenError, Error
+from src.rate_backends import NetworkRateBackend, RateBackend
+from src.rate_cache import RateCache
+from src.rate_history import RateHistory
+from src.resilience import CircuitBreaker
+from src.timing import PhaseTimer, format_prometheus, write_json_lines
+from src.work_queue import LEASED, WorkQueue, default_worker_id, open_queue
 
 
-def main(country_code: str, threshold: int) -> Optional[bool]:
+def main(
+    country_code: str,
+    threshold: int,
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    driver: Union[str, Callable[[], webdriver.Chrome]] = webdriver.Chrome,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    timer: Optional[PhaseTimer] = None,
+    history: Optional[RateHistory] = None,
+) -> Optional[bool]:
     """
     Main function to run the currency conversion and threshold check.
 
     Args:
         country_code (str): The ISO 3166-1 alpha-2 country code.
         threshold (int): The threshold value to check against the exchange rate.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to reuse across calls.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currency with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        driver (Union[str, Callable[[], webdriver.Chrome]]): The Selenium WebDriver class or driver name used
+                                                             when no pool is given.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing,
+                                            e.g. one shared by all calls of a batch.
+        timer (Optional[PhaseTimer]): Records how long each phase of the lookup and conversion takes.
+        history (Optional[RateHistory]): Records every rate checked, to query trends later.
 
     Returns:
         Optional[bool]: True if the exchange rate is above the threshold, False otherwise.
                         Returns None if there is an error during the process.
     """
-    rate, currency, error = get_currency_rate(webdriver.Chrome, country_code)
+    rate, currency, error = get_currency_rate(
+        driver,
+        country_code,
+        pool=pool,
+        country_info=country_info,
+        rate_cache=rate_cache,
+        backend=backend,
+        consent_store=consent_store,
+        breaker=breaker,
+        timer=timer,
+    )
 
     if error:
         return None
 
+    if history is not None:
+        history.append(currency, DEFAULT_QUOTE_CURRENCY, rate)
+
+    return report_threshold(currency, rate, threshold)
+
+
+def main_in_tabs(
+    country_codes: Sequence[str],
+    threshold: int,
+    tabs: int,
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    driver: Union[str, Callable[[], webdriver.Chrome]] = webdriver.Chrome,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    timer: Optional[PhaseTimer] = None,
+    history: Optional[RateHistory] = None,
+) -> List[Optional[bool]]:
+    """
+    Run the currency conversion and threshold check for several countries with one browser,
+    interleaving the conversions across its tabs.
+
+    Args:
+        country_codes (Sequence[str]): The ISO 3166-1 alpha-2 country codes.
+        threshold (int): The threshold value to check against the exchange rates.
+        tabs (int): The number of tabs conversions are interleaved across.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow the browser from.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currencies with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        driver (Union[str, Callable[[], webdriver.Chrome]]): The Selenium WebDriver class or driver name used
+                                                             when no pool is given.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing,
+                                            e.g. one shared by all workers.
+        timer (Optional[PhaseTimer]): Records how long each phase of the lookups and conversions takes.
+        history (Optional[RateHistory]): Records every rate checked, to query trends later.
+
+    Returns:
+        List[Optional[bool]]: For every country, True if the exchange rate is above the threshold, False otherwise
+                              and None if there is an error during the process.
+    """
+    results = get_currency_rates_in_tabs(
+        driver,
+        country_codes,
+        tabs,
+        pool=pool,
+        country_info=country_info,
+        rate_cache=rate_cache,
+        backend=backend,
+        consent_store=consent_store,
+        timer=timer,
+        breaker=breaker,
+    )
+
+    if history is not None:
+        for rate, currency, error in results:
+            if not error:
+                history.append(currency, DEFAULT_QUOTE_CURRENCY, rate)
+
+    return [
+        None if error else report_threshold(currency, rate, threshold)
+        for rate, currency, error in results
+    ]
+
+
+def report_threshold(currency: str, rate: float, threshold: int) -> bool:
+    """
+    Check an exchange rate against the threshold and print the outcome.
+
+    Args:
+        currency (str): The currency code the rate was converted from.
+        rate (float): The exchange rate.
+        threshold (int): The threshold value.
+
+    Returns:
+        bool: True if the exchange rate is above the threshold, False otherwise.
+    """
     is_threshold_met = check_threshold(rate, threshold)
 
     if is_threshold_met:
@@ -32,9 +190,751 @@ def main(country_code: str, threshold: int) -> Optional[bool]:
     return is_threshold_met
 
 
-if __name__ == "__main__":
-    country_codes = ["TR", "GB"]
-    threshold = 1
+def run_batch(
+    country_codes: Sequence[str],
+    threshold: int,
+    workers: int = 1,
+    driver: Union[str, Callable[[], webdriver.Chrome]] = webdriver.Chrome,
+    country_cache: Optional[CountryCache] = None,
+    rate_cache: Optional[RateCache] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    timers: Optional[List[PhaseTimer]] = None,
+    tabs: int = 1,
+    history: Optional[RateHistory] = None,
+) -> List[Tuple[str, Optional[bool]]]:
+    """
+    Run the currency conversion and threshold check for many countries concurrently.
+    The currencies of all countries are prefetched in one request (unless all of them
+    are fresh in the country cache) and each worker
+    borrows its own browser from a pool sized to the number of workers.
+    With more than one tab, the countries are split evenly between the workers and each
+    worker interleaves its countries across the tabs of its browser.
+
+    Args:
+        country_codes (Sequence[str]): The ISO 3166-1 alpha-2 country codes to check.
+        threshold (int): The threshold value to check against the exchange rates.
+        workers (int): The number of countries checked at the same time.
+        driver (Union[str, Callable[[], webdriver.Chrome]]): The Selenium WebDriver class or driver name
+                                                             used to start the browsers.
+        country_cache (Optional[CountryCache]): A persistent cache of country currencies.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing,
+                                            e.g. one shared by all workers.
+        timers (Optional[List[PhaseTimer]]): When given, a timer per country, labelled with its country code,
+                                             is appended in input order. With tabs, a timer per worker
+                                             labelled with its country codes.
+        tabs (int): The number of tabs each browser interleaves conversions across.
+        history (Optional[RateHistory]): Records every rate checked, to query trends later.
+
+    Returns:
+        List[Tuple[str, Optional[bool]]]: The country code and threshold result for every country,
+                                          in the same order as the input.
+    """
+    country_info = CountryInfo(cache=country_cache)
+    error = country_info.prefetch(country_codes)
+    if error:
+        print(f"Falling back to per-country lookups. {error}", file=sys.stderr)
+
+    if tabs > 1:
+        return _run_batch_in_tabs(
+            country_codes,
+            threshold,
+            workers,
+            tabs,
+            driver,
+            country_info,
+            rate_cache,
+            backend,
+            consent_store,
+            breaker,
+            timers,
+            history,
+        )
+
+    country_timers = [
+        PhaseTimer({"country": country_code}) for country_code in country_codes
+    ]
+    if timers is not None:
+        timers.extend(country_timers)
+
+    with DriverPool(driver, size=workers) as pool:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda country_code, timer: main(
+                    country_code,
+                    threshold,
+                    pool=pool,
+                    country_info=country_info,
+                    rate_cache=rate_cache,
+                    backend=backend,
+                    consent_store=consent_store,
+                    breaker=breaker,
+                    timer=timer,
+                    history=history,
+                ),
+                country_codes,
+                country_timers,
+            )
+            return list(zip(country_codes, results))
+
+
+def _run_batch_in_tabs(
+    country_codes: Sequence[str],
+    threshold: int,
+    workers: int,
+    tabs: int,
+    driver: Union[str, Callable[[], webdriver.Chrome]],
+    country_info: CountryInfo,
+    rate_cache: Optional[RateCache],
+    backend: Optional[RateBackend],
+    consent_store: Optional[ConsentStore],
+    breaker: Optional[CircuitBreaker],
+    timers: Optional[List[PhaseTimer]],
+    history: Optional[RateHistory],
+) -> List[Tuple[str, Optional[bool]]]:
+    """
+    Split the countries evenly between the workers, each checking its share in the tabs of one browser.
+
+    Returns:
+        List[Tuple[str, Optional[bool]]]: The country code and threshold result for every country,
+                                          in the same order as the input.
+    """
+    share = -(-len(country_codes) // workers)  # Ceiling division
+    shares = [
+        country_codes[start : start + share]
+        for start in range(0, len(country_codes), share or 1)
+    ]
+    share_timers = [PhaseTimer({"country": ",".join(codes)}) for codes in shares]
+    if timers is not None:
+        timers.extend(share_timers)
+
+    with DriverPool(driver, size=workers) as pool:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                lambda codes, timer: main_in_tabs(
+                    codes,
+                    threshold,
+                    tabs,
+                    pool=pool,
+                    country_info=country_info,
+                    rate_cache=rate_cache,
+                    backend=backend,
+                    consent_store=consent_store,
+                    breaker=breaker,
+                    timer=timer,
+                    history=history,
+                ),
+                shares,
+                share_timers,
+            )
+            return list(
+                zip(country_codes, (result for share in results for result in share))
+            )
+
+
+def check_item(
+    row: int,
+    item: Tuple[str, ...],
+    threshold: int,
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    driver: Union[str, Callable[[], webdriver.Chrome]] = webdriver.Chrome,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    history: Optional[RateHistory] = None,
+) -> Tuple[Dict, Optional[Error]]:
+    """
+    Run the currency conversion and threshold check for one item of a streamed batch.
+
+    Args:
+        row (int): The position of the item in the input, starting at 0.
+        item (Tuple[str, ...]): A country code, or a from and to currency code pair.
+        threshold (int): The threshold value to check against the exchange rate.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow from.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currency with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        driver (Union[str, Callable[[], webdriver.Chrome]]): The Selenium WebDriver class or driver name used
+                                                             when no pool is given.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing,
+                                            e.g. one shared by all workers.
+        history (Optional[RateHistory]): Records every rate checked, to query trends later.
+
+    Returns:
+        Tuple[Dict, Optional[Error]]: The result row, with the keys of batch_io.RESULT_FIELDS,
+                                      and the error that failed the check, if any.
+    """
+    kwargs = dict(
+        pool=pool,
+        rate_cache=rate_cache,
+        backend=backend,
+        consent_store=consent_store,
+        breaker=breaker,
+    )
+
+    if len(item) == 1:
+        country_code, quote_currency = item[0], DEFAULT_QUOTE_CURRENCY
+        timer = PhaseTimer({"country": country_code})
+        rate, currency, error = get_currency_rate(
+            driver, country_code, country_info=country_info, timer=timer, **kwargs
+        )
+    else:
+        country_code, (currency, quote_currency) = None, item
+        timer = PhaseTimer({"pair": f"{currency}/{quote_currency}"})
+        rate, error = get_pair_rate(
+            driver, currency, quote_currency, timer=timer, **kwargs
+        )
+
+    if not error and history is not None:
+        history.append(currency, quote_currency, rate)
+
+    record = {
+        "row": row,
+        "country_code": country_code,
+        "currency": currency,
+        "quote_currency": quote_currency,
+        "rate": rate,
+        "threshold_met": None if error else check_threshold(rate, threshold),
+        "error": str(error) if error else None,
+        "timings": timer.to_dict()["phases"],
+    }
+    return record, error
+
+
+def run_stream(
+    items: Iterable[Tuple[str, ...]],
+    output: TextIO,
+    threshold: int,
+    output_format: str = "jsonl",
+    workers: int = 1,
+    skip: int = 0,
+    driver: Union[str, Callable[[], webdriver.Chrome]] = webdriver.Chrome,
+    country_cache: Optional[CountryCache] = None,
+    rate_cache: Optional[RateCache] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    history: Optional[RateHistory] = None,
+    write_header: Optional[bool] = None,
+) -> Dict[str, int]:
+    """
+    Stream a batch of country codes or currency pairs and write a result row as soon as each one,
+    and all before it, is done. Memory stays constant however long the input is, and a restarted
+    run resumes by skipping the rows already written. The stream stops at the first item failed
+    by an open circuit breaker, without writing it, so a resumed run checks it and the rest.
+
+    Args:
+        items (Iterable[Tuple[str, ...]]): The country codes or currency pairs, e.g. from batch_io.read_items.
+        output (TextIO): The file the results are written to.
+        threshold (int): The threshold value to check against the exchange rates.
+        output_format (str): "jsonl" or "csv".
+        workers (int): The number of items checked at the same time.
+        skip (int): The number of leading items already completed by an earlier run.
+        driver (Union[str, Callable[[], webdriver.Chrome]]): The Selenium WebDriver class or driver name
+                                                             used to start the browsers.
+        country_cache (Optional[CountryCache]): A persistent cache of country currencies.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing,
+                                            e.g. one shared by all workers.
+        history (Optional[RateHistory]): Records every rate checked, to query trends later.
+        write_header (Optional[bool]): Whether to start a CSV output with a header row, e.g. False when
+                                       appending to a non-empty file. Defaults to True unless rows are skipped.
+
+    Returns:
+        Dict[str, int]: The number of items checked in this run, above the threshold, not above it and failed.
+    """
+    country_info = CountryInfo(cache=country_cache)
+    error = country_info.prefetch()
+    if error:
+        print(f"Falling back to per-country lookups. {error}", file=sys.stderr)
+
+    if write_header is None:
+        write_header = skip == 0
+    writer = ResultWriter(output, output_format, write_header=write_header)
+    outcomes = Counter()
+
+    with DriverPool(driver, size=workers) as pool:
+        for record, error in ordered_map(
+            lambda numbered_item: check_item(
+                *numbered_item,
+                threshold,
+                pool=pool,
+                country_info=country_info,
+                rate_cache=rate_cache,
+                driver=driver,
+                backend=backend,
+                consent_store=consent_store,
+                breaker=breaker,
+                history=history,
+            ),
+            islice(enumerate(items), skip, None),
+            workers=workers,
+        ):
+            if isinstance(error, CircuitOpenError):
+                print(
+                    f"Stopped at row {record['row']}: {error}. Resume the run later.",
+                    file=sys.stderr,
+                )
+                break
+
+            writer.write(record)
+            outcomes[record["threshold_met"]] += 1
+
+    return _summarize_outcomes(outcomes)
+
+
+def run_worker(
+    queue: WorkQueue,
+    threshold: int,
+    workers: int = 1,
+    worker_id: Optional[str] = None,
+    lease_seconds: float = 300,
+    poll_seconds: float = 5,
+    driver: Union[str, Callable[[], webdriver.Chrome]] = webdriver.Chrome,
+    country_cache: Optional[CountryCache] = None,
+    rate_cache: Optional[RateCache] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+    history: Optional[RateHistory] = None,
+) -> Dict[str, int]:
+    """
+    Lease country codes or currency pairs from a shared queue, check them and store their result rows
+    in the queue, until no job is pending or leased by another worker.
+    Any number of workers on any number of hosts can work on the same queue. The jobs of a worker
+    that crashes are handed out again once their lease runs out.
+
+    Args:
+        queue (WorkQueue): The queue to take jobs from, e.g. from work_queue.open_queue.
+        threshold (int): The threshold value to check against the exchange rates.
+        workers (int): The number of jobs checked at the same time, each with its own browser.
+        worker_id (Optional[str]): Identifies this worker in the queue. Defaults to the host name and process ID.
+        lease_seconds (float): The time a job may take before it is handed out again.
+        poll_seconds (float): The time to wait when the jobs left are leased by other workers
+                              or the circuit breaker is open.
+        driver (Union[str, Callable[[], webdriver.Chrome]]): The Selenium WebDriver class or driver name
+                                                             used to start the browsers.
+        country_cache (Optional[CountryCache]): A persistent cache of country currencies.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Pauses leasing while the OANDA page keeps failing, so the jobs
+                                            go to healthier workers instead of failing fast here.
+        history (Optional[RateHistory]): Records every rate checked, to query trends later.
+
+    Returns:
+        Dict[str, int]: The number of jobs completed by this worker, above the threshold, not above it and failed.
+    """
+    country_info = CountryInfo(cache=country_cache)
+    error = country_info.prefetch()
+    if error:
+        print(f"Falling back to per-country lookups. {error}", file=sys.stderr)
+
+    worker_id = worker_id or default_worker_id()
+    outcomes = Counter()
+
+    def work(pool: DriverPool):
+        while True:
+            if breaker is not None and breaker.state == CircuitBreaker.OPEN:
+                time.sleep(poll_seconds)
+                continue
 
-    for country_code in country_codes:
-        main(country_code, threshold)
+            job = queue.lease(worker_id, lease_seconds)
+            if job is None:
+                if queue.counts()[LEASED] == 0:
+                    return
+                time.sleep(poll_seconds)
+                continue
+
+            try:
+                record, error = check_item(
+                    job.row,
+                    job.item,
+                    threshold,
+                    pool=pool,
+                    country_info=country_info,
+                    rate_cache=rate_cache,
+                    driver=driver,
+                    backend=backend,
+                    consent_store=consent_store,
+                    breaker=breaker,
+                    history=history,
+                )
+            except Exception as e:
+                # Left leased, so it is retried once the lease runs out
+                print(f"Failed to check {job.key}: {e}", file=sys.stderr)
+                continue
+
+            if isinstance(error, CircuitOpenError):
+                # Not a result: hand the job back for a worker whose breaker is closed
+                queue.release(job.key, worker_id)
+                time.sleep(poll_seconds)
+                continue
+
+            if queue.complete(job.key, record):
+                outcomes[record["threshold_met"]] += 1
+
+    with DriverPool(driver, size=workers) as pool:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(work, pool) for _ in range(workers)]:
+                future.result()
+
+    return _summarize_outcomes(outcomes)
+
+
+def summarize(results: List[Tuple[str, Optional[bool]]]) -> Dict[str, int]:
+    """
+    Count the threshold results of a batch run.
+
+    Args:
+        results (List[Tuple[str, Optional[bool]]]): The results returned by run_batch.
+
+    Returns:
+        Dict[str, int]: The number of countries checked, above the threshold, not above it and failed.
+    """
+    return _summarize_outcomes(
+        Counter(is_threshold_met for _, is_threshold_met in results)
+    )
+
+
+def _summarize_outcomes(outcomes: Counter) -> Dict[str, int]:
+    """
+    Build the summary of a run from the count of every threshold result.
+
+    Args:
+        outcomes (Counter): The number of items per threshold result: True, False or None if the check failed.
+
+    Returns:
+        Dict[str, int]: The number of items checked, above the threshold, not above it and failed.
+    """
+    return {
+        "total": sum(outcomes.values()),
+        "passed": outcomes[True],
+        "failed": outcomes[False],
+        "errors": outcomes[None],
+    }
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line arguments.
+
+    Args:
+        argv (Optional[Sequence[str]]): The arguments to parse. Defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description="Check that exchange rates to EUR are above a threshold."
+    )
+    parser.add_argument(
+        "country_codes",
+        nargs="*",
+        default=["TR", "GB"],
+        help="ISO 3166-1 alpha-2 country codes to check.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=int,
+        default=1,
+        help="Threshold the exchange rate must be higher than.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Number of countries checked concurrently, each with its own browser.",
+    )
+    parser.add_argument(
+        "--tabs",
+        type=int,
+        default=1,
+        help="Number of tabs each browser interleaves conversions across. Cheaper in memory than more workers.",
+    )
+    parser.add_argument(
+        "--browser",
+        choices=sorted(DRIVER_FACTORIES),
+        default="chrome",
+        help='Browser profile to use. "lean" runs headless and skips images, fonts and trackers.',
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["dom", "network"],
+        default="dom",
+        help='How rates are read. "network" captures the page\'s rate endpoint once and queries it '
+        'directly afterwards; it needs a browser that logs network events ("lean-network").',
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory of the persistent caches. Defaults to $CURRENCY_CACHE_DIR or ~/.cache.",
+    )
+    parser.add_argument(
+        "--rate-max-age",
+        type=float,
+        default=300,
+        help="Seconds a scraped rate is reused for before scraping it again. 0 disables the rate cache.",
+    )
+    parser.add_argument(
+        "--timings",
+        default=None,
+        help="Write the per-phase timings of every country to this file as JSON lines.",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Write the per-phase timings of every country to this file in the Prometheus text format.",
+    )
+    parser.add_argument(
+        "--input",
+        default=None,
+        help='Stream country codes, or "FROM,TO" currency pairs, one per line from this file ("-" for stdin) '
+        "instead of the positional country codes.",
+    )
+    parser.add_argument(
+        "--output",
+        default="-",
+        help='Write a result row per input line to this file ("-" for stdout). Only used with --input.',
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default=None,
+        help="Format of the result rows. Inferred from the --output extension, JSON lines otherwise.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Append to --output and skip the input lines it already has results for.",
+    )
+    parser.add_argument(
+        "--history",
+        default=None,
+        help="Append every checked rate to the rate history in this directory, for trend queries.",
+    )
+    parser.add_argument(
+        "--queue",
+        default=None,
+        help='Share the work between hosts through this queue: a SQLite file, "sqlite:///path" or '
+        '"redis://host:port/db". See --role.',
+    )
+    parser.add_argument(
+        "--role",
+        choices=["enqueue", "work", "collect"],
+        default="work",
+        help='What to do with --queue. "enqueue" queues the --input items or country codes, "work" checks '
+        'queued items until none are left, "collect" writes the results to --output.',
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=300,
+        help="Seconds a worker has to check a queued item before it is handed to another worker.",
+    )
+    parser.add_argument(
+        "--clear-country-cache",
+        action="store_true",
+        help="Clear the cached country currencies and exit.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.resume and (args.input is None or args.output == "-"):
+        parser.error("--resume needs --input and an --output file.")
+
+    if args.workers < 1:
+        parser.error("--workers must be at least 1.")
+
+    if args.tabs < 1:
+        parser.error("--tabs must be at least 1.")
+
+    if args.backend == "network" and args.browser != "lean-network":
+        parser.error("--backend network needs --browser lean-network.")
+
+    args.format = args.format or infer_format(args.output)
+    return args
+
+
+def run(args: argparse.Namespace) -> int:
+    """
+    Run what the command line asks for: clear the country cache, share the work through a queue,
+    stream the items of an input file or check the positional country codes.
+
+    Args:
+        args (argparse.Namespace): The arguments returned by parse_args.
+
+    Returns:
+        int: The exit status.
+    """
+    country_cache = CountryCache(args.cache_dir)
+    if args.clear_country_cache:
+        country_cache.invalidate()
+        print(f"Cleared {country_cache.path}.")
+        return 0
+
+    options = dict(
+        driver=args.browser,
+        country_cache=country_cache,
+        rate_cache=(
+            RateCache(
+                args.rate_max_age, cache_dir=args.cache_dir or default_cache_dir()
+            )
+            if args.rate_max_age > 0
+            else None
+        ),
+        backend=NetworkRateBackend() if args.backend == "network" else None,
+        consent_store=ConsentStore(args.cache_dir),
+        breaker=CircuitBreaker(),
+        history=RateHistory(args.history) if args.history else None,
+    )
+
+    if args.queue is not None:
+        _run_queue(args, options)
+    elif args.input is not None:
+        _run_input(args, options)
+    else:
+        _run_countries(args, options)
+    return 0
+
+
+def _run_queue(args: argparse.Namespace, options: Dict):
+    """
+    Queue items, work on queued items or collect their results, depending on --role.
+
+    Args:
+        args (argparse.Namespace): The arguments returned by parse_args.
+        options (Dict): The driver, caches, backend, consent store, breaker and history to check items with.
+    """
+    queue = open_queue(args.queue)
+
+    if args.role == "enqueue":
+        if args.input is None:
+            queued = sum(
+                queue.put((country_code.upper(),))
+                for country_code in args.country_codes
+            )
+        else:
+            input_file = (
+                sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+            )
+            with input_file:
+                queued = sum(queue.put(item) for item in read_items(input_file))
+        print(f"Queued {queued} items. Queue: {queue.counts()}", file=sys.stderr)
+
+    elif args.role == "work":
+        summary = run_worker(
+            queue,
+            args.threshold,
+            workers=args.workers,
+            lease_seconds=args.lease_seconds,
+            **options,
+        )
+        print(
+            f"Checked {summary['total']} items: {summary['passed']} above threshold, "
+            f"{summary['failed']} not above threshold, {summary['errors']} errors. "
+            f"Queue: {queue.counts()}",
+            file=sys.stderr,
+        )
+
+    else:
+        output_file = (
+            sys.stdout
+            if args.output == "-"
+            else open(args.output, "w", encoding="utf-8", newline="")
+        )
+        with output_file:
+            writer = ResultWriter(output_file, args.format)
+            for record in queue.results():
+                writer.write(record)
+        print(f"Queue: {queue.counts()}", file=sys.stderr)
+
+    queue.close()
+
+
+def _run_input(args: argparse.Namespace, options: Dict):
+    """
+    Stream the items of --input to --output, resuming after the rows already written with --resume.
+
+    Args:
+        args (argparse.Namespace): The arguments returned by parse_args.
+        options (Dict): The driver, caches, backend, consent store, breaker and history to check items with.
+    """
+    skip = count_completed_rows(args.output, args.format) if args.resume else 0
+    # A resumed file keeps its header, even when the crash came before the first row
+    write_header = not (
+        args.resume and os.path.exists(args.output) and os.path.getsize(args.output) > 0
+    )
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_file = (
+        sys.stdout
+        if args.output == "-"
+        else open(
+            args.output, "a" if args.resume else "w", encoding="utf-8", newline=""
+        )
+    )
+    with input_file, output_file:
+        summary = run_stream(
+            read_items(input_file),
+            output_file,
+            args.threshold,
+            output_format=args.format,
+            workers=args.workers,
+            skip=skip,
+            write_header=write_header,
+            **options,
+        )
+    print(
+        f"Checked {summary['total']} items after skipping {skip}: {summary['passed']} above threshold, "
+        f"{summary['failed']} not above threshold, {summary['errors']} errors.",
+        file=sys.stderr,
+    )
+
+
+def _run_countries(args: argparse.Namespace, options: Dict):
+    """
+    Check the positional country codes and print a summary, writing the phase timings if asked to.
+
+    Args:
+        args (argparse.Namespace): The arguments returned by parse_args.
+        options (Dict): The driver, caches, backend, consent store, breaker and history to check items with.
+    """
+    timers = []
+    results = run_batch(
+        args.country_codes,
+        args.threshold,
+        workers=args.workers,
+        timers=timers,
+        tabs=args.tabs,
+        **options,
+    )
+
+    if args.timings:
+        with open(args.timings, "w", encoding="utf-8") as file:
+            write_json_lines(timers, file)
+
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as file:
+            file.write(format_prometheus(timers))
+
+    summary = summarize(results)
+    print(
+        f"Checked {summary['total']} countries: {summary['passed']} above threshold, "
+        f"{summary['failed']} not above threshold, {summary['errors']} errors."
+    )
+    print(f"Country cache: {options['country_cache'].stats()}")
+    if options["rate_cache"] is not None:
+        print(f"Rate cache: {options['rate_cache'].stats()}")
+    print(f"Coalesced conversions: {conversions.stats()}")
+
+
+if __name__ == "__main__":
+    raise SystemExit(run(parse_args()))
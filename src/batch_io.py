@@ -0,0 +1,253 @@
+import csv
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import (
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    Optional,
+    TextIO,
+    Tuple,
+    TypeVar,
+)
+
+JSONL = "jsonl"
+CSV = "csv"
+FORMATS = (JSONL, CSV)
+
+RESULT_FIELDS = (
+    "row",
+    "country_code",
+    "currency",
+    "quote_currency",
+    "rate",
+    "threshold_met",
+    "error",
+    "timings",
+)
+HEADER_NAMES = {"country_code", "code", "country", "from_currency", "from"}
+CHUNK_SIZE = 1 << 16
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def read_items(file: TextIO) -> Iterator[Tuple[str, ...]]:
+    """
+    Stream the items of a batch from a file, one per line.
+    A line is either a country code ("GB") or a currency pair ("GBP,EUR").
+    Blank lines, "#" comments and a header row are skipped.
+
+    Args:
+        file (TextIO): The file to read from, e.g. sys.stdin.
+
+    Yields:
+        Tuple[str, ...]: The upper-cased country code, or the from and to currency codes.
+    """
+    for row in csv.reader(file):
+        cells = tuple(cell.strip().upper() for cell in row if cell.strip())
+        if not cells or cells[0].startswith("#"):
+            continue
+        if cells[0].lower() in HEADER_NAMES:
+            continue
+        yield cells[:2]
+
+
+def infer_format(path: Optional[str], default: str = JSONL) -> str:
+    """
+    Infer the output format from a file extension.
+
+    Args:
+        path (Optional[str]): The output path, or None or "-" for stdout.
+        default (str): The format used when the extension is not recognized.
+
+    Returns:
+        str: One of FORMATS.
+    """
+    if path and path.lower().endswith(".csv"):
+        return CSV
+    if path and path.lower().endswith((".jsonl", ".ndjson")):
+        return JSONL
+    return default
+
+
+def count_completed_rows(path: str, output_format: str) -> int:
+    """
+    Count the result rows already written by an earlier run, so it can be resumed.
+    A trailing row cut short by a crash is removed from the file.
+
+    Args:
+        path (str): The output file.
+        output_format (str): One of FORMATS.
+
+    Returns:
+        int: The number of complete result rows, 0 if the file does not exist.
+    """
+    if not os.path.exists(path):
+        return 0
+
+    with open(path, "rb+") as file:
+        if output_format == CSV:
+            records, complete_length = _count_csv_records(file)
+            records -= 1  # header
+        else:
+            records, complete_length = _count_lines(file)
+
+        file.seek(0, os.SEEK_END)
+        if complete_length != file.tell():
+            file.truncate(complete_length)
+
+    return max(records, 0)
+
+
+def _count_lines(file: BinaryIO) -> Tuple[int, int]:
+    """
+    Count the newline terminated lines of a file, reading it in chunks.
+
+    Args:
+        file (BinaryIO): The file, at its start.
+
+    Returns:
+        Tuple[int, int]: The number of complete lines and the length in bytes they take up.
+    """
+    lines = 0
+    complete_length = 0
+    offset = 0
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), b""):
+        if b"\n" in chunk:
+            lines += chunk.count(b"\n")
+            complete_length = offset + chunk.rfind(b"\n") + 1
+        offset += len(chunk)
+
+    return lines, complete_length
+
+
+def _count_csv_records(file: BinaryIO) -> Tuple[int, int]:
+    """
+    Count the complete records of a CSV file, including quoted fields spanning several lines.
+
+    Args:
+        file (BinaryIO): The file, at its start.
+
+    Returns:
+        Tuple[int, int]: The number of complete records and the length in bytes they take up.
+    """
+    offset = 0
+    is_line_complete = True
+
+    def lines() -> Iterator[str]:
+        nonlocal offset, is_line_complete
+        for line in file:
+            offset += len(line)
+            is_line_complete = line.endswith(b"\n")
+            yield line.decode("utf-8")
+
+    records = 0
+    complete_length = 0
+    try:
+        # The reader pulls the lines of one record at a time, so offset is where the record ends
+        for _ in csv.reader(lines()):
+            if not is_line_complete:
+                break
+            records += 1
+            complete_length = offset
+    except (csv.Error, UnicodeDecodeError):
+        pass  # A record cut short inside a quoted field
+
+    return records, complete_length
+
+
+class ResultWriter:
+    """
+    Writes batch results incrementally as JSON lines or CSV rows.
+    Every row is flushed as soon as it is written, so a restarted run can resume after it.
+    """
+
+    def __init__(
+        self, file: TextIO, output_format: str = JSONL, write_header: bool = True
+    ):
+        """
+        Initialize the ResultWriter.
+
+        Args:
+            file (TextIO): The file to write to, e.g. sys.stdout.
+            output_format (str): One of FORMATS.
+            write_header (bool): Whether to start a CSV file with a header row. False when appending.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+
+        self.file = file
+        self.output_format = output_format
+        self._csv_writer = None
+
+        if output_format == CSV:
+            self._csv_writer = csv.DictWriter(
+                file, fieldnames=RESULT_FIELDS, lineterminator="\n"
+            )
+            if write_header:
+                self._csv_writer.writeheader()
+
+    def write(self, record: Dict):
+        """
+        Write one result and flush it.
+
+        Args:
+            record (Dict): The result, with the keys of RESULT_FIELDS.
+        """
+        if self._csv_writer is not None:
+            self._csv_writer.writerow(
+                {
+                    **record,
+                    "timings": json.dumps(record.get("timings"), separators=(",", ":")),
+                }
+            )
+        else:
+            self.file.write(json.dumps(record, separators=(",", ":")) + "\n")
+
+        self.file.flush()
+
+
+def ordered_map(
+    function: Callable[[T], R],
+    items: Iterable[T],
+    workers: int = 1,
+    window: Optional[int] = None,
+) -> Iterator[R]:
+    """
+    Apply a function to items on a thread pool and yield the results in input order.
+    Only a window of items is submitted ahead of the result being waited for, so memory
+    stays constant however long the input is.
+
+    Args:
+        function (Callable[[T], R]): The function to apply.
+        items (Iterable[T]): The items, read lazily.
+        workers (int): The number of threads.
+        window (Optional[int]): The maximum number of items in flight. Defaults to twice the workers.
+
+    Yields:
+        R: The result of every item, in input order.
+    """
+    window = window or 2 * workers
+    items = iter(items)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        in_flight = deque(
+            executor.submit(function, item) for item in islice(items, window)
+        )
+
+        try:
+            while in_flight:
+                result = in_flight.popleft().result()
+                for item in islice(items, 1):
+                    in_flight.append(executor.submit(function, item))
+                yield result
+        finally:
+            # When the caller stops early, the items not started yet are dropped
+            for future in in_flight:
+                future.cancel()
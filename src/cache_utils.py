@@ -0,0 +1,59 @@
+import json
+import os
+import tempfile
+from typing import Any
+
+CACHE_DIR_ENV_VAR = "CURRENCY_CACHE_DIR"
+
+
+def default_cache_dir() -> str:
+    """
+    Get the directory persistent caches are stored in.
+    Can be overridden with the CURRENCY_CACHE_DIR environment variable.
+
+    Returns:
+        str: The cache directory path.
+    """
+    return os.environ.get(
+        CACHE_DIR_ENV_VAR,
+        os.path.join(os.path.expanduser("~"), ".cache", "currency-conversion-tester"),
+    )
+
+
+def read_json(path: str, default: Any) -> Any:
+    """
+    Read a JSON file, falling back to a default when it is missing or corrupt.
+
+    Args:
+        path (str): The file path.
+        default (Any): The value returned when the file cannot be read.
+
+    Returns:
+        Any: The decoded content or the default.
+    """
+    try:
+        with open(path, encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path: str, data: Any):
+    """
+    Write a JSON file atomically, so concurrent readers never see a partial file.
+
+    Args:
+        path (str): The file path.
+        data (Any): The JSON serializable content.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as file:
+            json.dump(data, file, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
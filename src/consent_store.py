@@ -0,0 +1,123 @@
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+from selenium import webdriver
+
+from src.cache_utils import default_cache_dir, read_json, write_json_atomic
+
+# Cookies set by the OneTrust banner once consent is given
+CONSENT_COOKIE_NAMES = ("OptanonAlertBoxClosed", "OptanonConsent")
+
+
+class ConsentStore:
+    """
+    Persists the cookie consent cookies of the OANDA website, so they can be injected into
+    fresh browsers before the page loads and the consent banner is not shown again.
+    """
+
+    FILE_NAME = "consent_cookies.json"
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        cookie_names: Sequence[str] = CONSENT_COOKIE_NAMES,
+    ):
+        """
+        Initialize the ConsentStore.
+
+        Args:
+            cache_dir (Optional[str]): The directory the cookies are stored in. Defaults to default_cache_dir().
+            cookie_names (Sequence[str]): The names of the cookies recording the consent.
+        """
+        self.path = os.path.join(cache_dir or default_cache_dir(), self.FILE_NAME)
+        self.cookie_names = tuple(cookie_names)
+        self._cookies: Optional[List[Dict]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def cookies(self) -> List[Dict]:
+        """
+        The stored consent cookies, loaded from disk on first use.
+
+        Returns:
+            List[Dict]: The cookies as returned by WebDriver.get_cookies.
+        """
+        with self._lock:
+            if self._cookies is None:
+                self._cookies = read_json(self.path, [])
+            return list(self._cookies)
+
+    def save(self, driver: webdriver.Chrome):
+        """
+        Store the consent cookies of the page currently loaded in a WebDriver instance.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance the consent was given in.
+        """
+        cookies = [
+            cookie
+            for cookie in driver.get_cookies()
+            if cookie.get("name") in self.cookie_names
+        ]
+        if not cookies:
+            return
+
+        with self._lock:
+            self._cookies = cookies
+            write_json_atomic(self.path, cookies)
+
+    def inject(self, driver: webdriver.Chrome) -> bool:
+        """
+        Set the stored consent cookies in a WebDriver instance before any page of the site is loaded.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance to set the cookies in.
+
+        Returns:
+            bool: True if cookies were injected, False if none are stored or the browser does not support it.
+        """
+        cookies = self.cookies
+        if not cookies:
+            return False
+
+        try:
+            for cookie in cookies:
+                driver.execute_cdp_cmd("Network.setCookie", _to_cdp_cookie(cookie))
+        except Exception:
+            return False
+
+        return True
+
+    def clear(self):
+        """
+        Drop the stored consent cookies.
+        """
+        with self._lock:
+            self._cookies = []
+            write_json_atomic(self.path, [])
+
+
+def _to_cdp_cookie(cookie: Dict) -> Dict:
+    """
+    Convert a WebDriver cookie to the parameters of the Chrome DevTools Network.setCookie command.
+
+    Args:
+        cookie (Dict): The cookie as returned by WebDriver.get_cookies.
+
+    Returns:
+        Dict: The Network.setCookie parameters.
+    """
+    cdp_cookie = {
+        "name": cookie["name"],
+        "value": cookie["value"],
+        "domain": cookie.get("domain"),
+        "path": cookie.get("path", "/"),
+        "secure": cookie.get("secure", False),
+        "httpOnly": cookie.get("httpOnly", False),
+    }
+    if "expiry" in cookie:
+        cdp_cookie["expires"] = cookie["expiry"]
+    if "sameSite" in cookie:
+        cdp_cookie["sameSite"] = cookie["sameSite"]
+    return cdp_cookie
@@ -0,0 +1,196 @@
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.cache_utils import default_cache_dir, read_json, write_json_atomic
+
+
+class CountryCache:
+    """
+    A persistent cache of country code to currency codes, stored as a compact JSON file.
+    Entries are fresh for a TTL, then served as stale for a further window while they are
+    refreshed, and dropped after that.
+    """
+
+    FILE_NAME = "countries.json"
+    FRESH = "fresh"
+    STALE = "stale"
+    MISS = "miss"
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_seconds: float = 7 * 24 * 3600,
+        stale_seconds: float = 30 * 24 * 3600,
+    ):
+        """
+        Initialize the CountryCache.
+
+        Args:
+            cache_dir (Optional[str]): The directory the cache file is stored in. Defaults to default_cache_dir().
+            ttl_seconds (float): How long an entry is fresh, in seconds.
+            stale_seconds (float): How long an expired entry may still be served while it is refreshed, in seconds.
+        """
+        self.path = os.path.join(cache_dir or default_cache_dir(), self.FILE_NAME)
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._entries: Optional[Dict[str, Tuple[float, List[str]]]] = None
+        self._lock = threading.Lock()
+
+    def get(self, country_code: str) -> Tuple[Optional[List[str]], str]:
+        """
+        Get the cached currencies of a country.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            Tuple[Optional[List[str]], str]: The currency codes (or None on a miss) and the entry's
+                                             freshness: FRESH, STALE or MISS.
+        """
+        with self._lock:
+            freshness = self._freshness(country_code)
+
+            if freshness == self.FRESH:
+                self.hits += 1
+            elif freshness == self.STALE:
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+                return None, freshness
+
+            return list(self._load()[country_code.upper()][1]), freshness
+
+    def is_fresh(self, country_code: str) -> bool:
+        """
+        Check whether a country has a fresh entry, without counting a hit or miss.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            bool: True if the entry is fresh, False otherwise.
+        """
+        with self._lock:
+            return self._freshness(country_code) == self.FRESH
+
+    def set(self, country_code: str, currencies: List[str]):
+        """
+        Store the currencies of a country.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+            currencies (List[str]): The currency codes of the country.
+        """
+        self.set_many({country_code: currencies})
+
+    def set_many(self, currency_index: Dict[str, List[str]]):
+        """
+        Store the currencies of several countries with a single write.
+
+        Args:
+            currency_index (Dict[str, List[str]]): The currency codes by country code.
+        """
+        now = time.time()
+        with self._lock:
+            entries = self._load()
+            for country_code, currencies in currency_index.items():
+                entries[country_code.upper()] = (now, list(currencies))
+            self._save()
+
+    def invalidate(self, country_code: Optional[str] = None):
+        """
+        Drop the entry of a country, or every entry when no country code is given.
+
+        Args:
+            country_code (Optional[str]): The ISO 3166-1 alpha-2 country code.
+        """
+        with self._lock:
+            entries = self._load()
+            if country_code is None:
+                entries.clear()
+            else:
+                entries.pop(country_code.upper(), None)
+            self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache hit and miss counters.
+
+        Returns:
+            Dict[str, int]: The number of fresh hits, stale hits and misses.
+        """
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+        }
+
+    def _freshness(self, country_code: str) -> str:
+        """
+        Get the freshness of a country's entry. Must be called with the lock held.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            str: FRESH, STALE or MISS.
+        """
+        entry = self._load().get(country_code.upper())
+        if entry is None:
+            return self.MISS
+
+        age = time.time() - entry[0]
+        if age <= self.ttl_seconds:
+            return self.FRESH
+        if age <= self.ttl_seconds + self.stale_seconds:
+            return self.STALE
+        return self.MISS
+
+    def _load(self) -> Dict[str, Tuple[float, List[str]]]:
+        """
+        Load the entries from disk on first use. Must be called with the lock held.
+
+        Returns:
+            Dict[str, Tuple[float, List[str]]]: The (stored at, currencies) entries by country code.
+        """
+        if self._entries is None:
+            data = read_json(self.path, {})
+            # A file of the wrong shape, e.g. edited by hand, loads as an empty cache
+            self._entries = {
+                country_code: (entry[0], entry[1])
+                for country_code, entry in (
+                    data.items() if isinstance(data, dict) else []
+                )
+                if _is_valid_entry(entry)
+            }
+        return self._entries
+
+    def _save(self):
+        """
+        Write the entries to disk. Must be called with the lock held.
+        """
+        write_json_atomic(self.path, self._entries)
+
+
+def _is_valid_entry(entry: Any) -> bool:
+    """
+    Check that a cache file entry is a (stored at, currencies) pair.
+
+    Args:
+        entry (Any): The decoded entry.
+
+    Returns:
+        bool: True if the entry can be loaded, False otherwise.
+    """
+    return (
+        isinstance(entry, list)
+        and len(entry) == 2
+        and isinstance(entry[0], (int, float))
+        and isinstance(entry[1], list)
+        and all(isinstance(currency, str) for currency in entry[1])
+    )
@@ -1,14 +1,57 @@
 import json
-from typing import Tuple, Optional
+import re
+import threading
+from typing import Any, Dict, Iterable, Iterator, List, Tuple, Optional
 
 import requests
 
+from src.country_cache import CountryCache
+from src.currency_registry import CurrencyRegistry, get_default_registry
 from src.error import Error
+from src.http_session import get_default_session
+from src.timing import PhaseTimer
 
-codes = {
-    "GB": "GBP",
-    "TR": "TRY",
-}
+CURRENCIES_KEY = re.compile(r'"currencies"\s*:\s*')
+_json_decoder = json.JSONDecoder()
+
+
+class CurrencyRecord:
+    """
+    The currencies extracted from a country response, or the error that prevented it.
+    Unpacks like a (currencies, error) tuple.
+    """
+
+    __slots__ = ("currencies", "error")
+
+    def __init__(
+        self, currencies: Optional[List[str]] = None, error: Optional[Error] = None
+    ):
+        """
+        Initialize the CurrencyRecord.
+
+        Args:
+            currencies (Optional[List[str]]): The currency codes, the main one first.
+            error (Optional[Error]): An error message (or None if no error occurs).
+        """
+        self.currencies = currencies
+        self.error = error
+
+    @property
+    def currency(self) -> Optional[str]:
+        """
+        Get the main currency.
+
+        Returns:
+            Optional[str]: The first currency code, or None if there is none.
+        """
+        return self.currencies[0] if self.currencies else None
+
+    def __iter__(self) -> Iterator:
+        yield self.currencies
+        yield self.error
+
+    def __repr__(self) -> str:
+        return f"CurrencyRecord({self.currencies!r}, {self.error!r})"
 
 
 class CountryInfo:
@@ -16,8 +59,91 @@ class CountryInfo:
     A class to fetch and extract country information, including currency details.
     """
 
-    @staticmethod
-    def fetch_country_info(country_code: str) -> requests.Response:
+    BASE_URL = "https://restcountries.com/v3.1"
+    CONNECT_TIMEOUT_SECONDS = 3.05
+    READ_TIMEOUT_SECONDS = 10
+
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        cache: Optional[CountryCache] = None,
+        registry: Optional[CurrencyRegistry] = None,
+    ):
+        """
+        Initialize the CountryInfo with an HTTP session.
+
+        Args:
+            session (Optional[requests.Session]): The connection-pooled session to send requests with.
+                                                  Defaults to the process-wide session.
+            timeout (Optional[Tuple[float, float]]): The (connect, read) timeouts in seconds.
+            cache (Optional[CountryCache]): A persistent cache consulted before any request.
+            registry (Optional[CurrencyRegistry]): The expected currencies every fetched currency is validated
+                                                   against. Defaults to the bundled registry.
+        """
+        self.session = session or get_default_session()
+        self.timeout = timeout or (
+            self.CONNECT_TIMEOUT_SECONDS,
+            self.READ_TIMEOUT_SECONDS,
+        )
+        self.cache = cache
+        self.registry = registry or get_default_registry()
+        self._currency_index: Optional[Dict[str, List[str]]] = None
+        self._revalidating = set()
+        self._revalidating_lock = threading.Lock()
+
+    @property
+    def is_prefetched(self) -> bool:
+        """
+        Check whether the currencies of all countries were prefetched.
+
+        Returns:
+            bool: True if lookups are answered from the prefetched currencies, False otherwise.
+        """
+        return self._currency_index is not None
+
+    def prefetch(
+        self, country_codes: Optional[Iterable[str]] = None
+    ) -> Optional[Error]:
+        """
+        Fetch the currencies of all countries in a single request and keep them in memory,
+        so later calls to run are answered without a request per country.
+
+        Args:
+            country_codes (Optional[Iterable[str]]): The countries that will be looked up. The request is
+                                                     skipped when all of them are fresh in the cache.
+                                                     Defaults to every country with a currency in the registry,
+                                                     e.g. when the items are streamed.
+
+        Returns:
+            Optional[Error]: An error message (or None if no error occurs).
+        """
+        if self.cache is not None:
+            if country_codes is None:
+                country_codes = self.registry.country_codes()
+            if all(self.cache.is_fresh(country_code) for country_code in country_codes):
+                return None
+
+        try:
+            response = self.session.get(
+                f"{self.BASE_URL}/all",
+                params={"fields": "cca2,currencies"},
+                timeout=self.timeout,
+            )
+        except requests.RequestException:
+            return Error("Failed to fetch country information.")
+
+        currency_index, error = self.build_currency_index(response)
+        if error:
+            return error
+
+        self._currency_index = currency_index
+        if self.cache is not None:
+            self.cache.set_many(currency_index)
+
+        return None
+
+    def fetch_country_info(self, country_code: str) -> requests.Response:
         """
         Fetch country information for a given country code.
 
@@ -27,7 +153,11 @@ class CountryInfo:
         Returns:
             requests.Response: The response object containing country information.
         """
-        return requests.get(f"https://restcountries.com/v3.1/alpha/{country_code}")
+        return self.session.get(
+            f"{self.BASE_URL}/alpha/{country_code}",
+            params={"fields": "currencies"},
+            timeout=self.timeout,
+        )
 
     @staticmethod
     def extract_currency(
@@ -40,51 +170,319 @@ class CountryInfo:
             country_response (requests.Response): The response object containing country information.
 
         Returns:
-            Tuple[Optional[str], Optional[Error]]: A tuple containing the currency code (or None if not found)
+            Tuple[Optional[str], Optional[Error]]: A tuple containing the main currency code (or None if not found)
                                                    and an error message (or None if no error occurs).
         """
+        record = CountryInfo.extract_currencies(country_response)
+        return record.currency, record.error
+
+    @staticmethod
+    def extract_currencies(country_response: requests.Response) -> CurrencyRecord:
+        """
+        Extract all currencies of a country from the country response, e.g. PAB and USD for Panama.
+        The body is decoded once, and only its currencies object is materialised.
+
+        Args:
+            country_response (requests.Response): The response object containing country information.
+
+        Returns:
+            CurrencyRecord: The currency codes, the main one first, (or None if not found)
+                            and an error message (or None if no error occurs).
+        """
         try:
+            content = country_response.content.decode("utf-8")
+
             if country_response.status_code != 200:
-                error_message = country_response.json().get("message")
-                return None, Error(error_message)
+                error_message = json.loads(content).get("message")
+                return CurrencyRecord(error=Error(error_message))
 
-            country_data = country_response.json()
-            currency_data = country_data[0].get("currencies")
+            currency_data = CountryInfo._decode_currencies(content)
             if not currency_data:
-                return None, Error("No currency data found.")
+                return CurrencyRecord(error=Error("No currency data found."))
+
+            currencies = list(currency_data.keys())
+            if any(len(currency) != 3 for currency in currencies):
+                return CurrencyRecord(error=Error("Invalid currency code format."))
+
+            return CurrencyRecord(currencies)
+
+        except (IndexError, UnicodeDecodeError, json.JSONDecodeError):
+            return CurrencyRecord(error=Error("Invalid response format."))
+
+        except AttributeError:
+            return CurrencyRecord(error=Error("API response format changed."))
+
+        except Exception as e:
+            return CurrencyRecord(error=Error(str(e)))
+
+    @staticmethod
+    def _decode_currencies(content: str) -> Any:
+        """
+        Decode the currencies object of a country document, without decoding the rest of it.
+        Both the object returned for a filtered lookup and the list returned otherwise are supported.
+
+        Args:
+            content (str): The JSON response body.
+
+        Returns:
+            Any: The decoded currencies value, or None if the country has none.
+
+        Raises:
+            json.JSONDecodeError: If the body is not valid JSON or does not end where its top-level value does.
+            IndexError: If the body is an empty list.
+        """
+        # Only the currencies value is fully parsed, so at least make sure the body was not cut short
+        document = content.strip()
+        if document[:1] + document[-1:] not in ("{}", "[]"):
+            raise json.JSONDecodeError("Incomplete document", content, len(content))
+
+        match = CURRENCIES_KEY.search(content)
+        if match is not None:
+            currency_data, _ = _json_decoder.raw_decode(content, match.end())
+            return currency_data
+
+        # Rare: fully decode to tell an invalid body from a country without currencies
+        country_data = json.loads(content)
+        if isinstance(country_data, list):
+            country_data = country_data[0]
+        return country_data.get("currencies")
+
+    @staticmethod
+    def build_currency_index(
+        countries_response: requests.Response,
+    ) -> Tuple[Optional[Dict[str, List[str]]], Optional[Error]]:
+        """
+        Build a country code to currency codes index from an "all countries" response.
+
+        Args:
+            countries_response (requests.Response): The response object containing the cca2 and currencies
+                                                    fields of every country.
+
+        Returns:
+            Tuple[Optional[Dict[str, List[str]]], Optional[Error]]: A tuple containing the index (or None if
+                                                                    the response is invalid) and an error message
+                                                                    (or None if no error occurs).
+        """
+        try:
+            if countries_response.status_code != 200:
+                error_message = countries_response.json().get("message")
+                return None, Error(error_message)
 
-            currency = list(currency_data.keys())[0]
-            if len(currency) != 3:
-                return None, Error("Invalid currency code format.")
+            currency_index = {}
+            for country_data in countries_response.json():
+                currency_data = country_data.get("currencies") or {}
+                currency_index[country_data["cca2"].upper()] = list(currency_data)
 
-            return currency, None
+            return currency_index, None
 
-        except (IndexError, json.JSONDecodeError):
+        except (KeyError, TypeError, json.JSONDecodeError):
             return None, Error("Invalid response format.")
 
         except AttributeError:
             return None, Error("API response format changed.")
 
-        except Exception as e:
-            return None, Error(str(e))
+    def lookup_currency(
+        self, country_code: str
+    ) -> Tuple[Optional[str], Optional[Error]]:
+        """
+        Look up the currency of a country in the prefetched index.
+        Falls back to fetching the country from the API when nothing was prefetched.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            Tuple[Optional[str], Optional[Error]]: A tuple containing the main currency code (or None if not found)
+                                                   and an error message (or None if no error occurs).
+        """
+        currencies, error = self.lookup_currencies(country_code)
+        if error:
+            return None, error
+
+        return currencies[0], None
 
-    def run(self, country_code: str) -> Tuple[Optional[str], Optional[Error]]:
+    def lookup_currencies(
+        self, country_code: str
+    ) -> Tuple[Optional[List[str]], Optional[Error]]:
+        """
+        Look up all currencies of a country in the prefetched index.
+        Falls back to fetching the country from the API when nothing was prefetched.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            Tuple[Optional[List[str]], Optional[Error]]: A tuple containing the currency codes (or None if not found)
+                                                         and an error message (or None if no error occurs).
+        """
+        if self._currency_index is None:
+            return self._fetch_currencies(country_code)
+
+        currencies = self._currency_index.get(country_code.upper())
+        if currencies is None:
+            return None, Error("Country not found")
+
+        if not currencies:
+            return None, Error("No currency data found.")
+
+        return currencies, None
+
+    def run(
+        self, country_code: str, timer: Optional[PhaseTimer] = None
+    ) -> Tuple[Optional[str], Optional[Error]]:
         """
         Main function to fetch and extract currency information for a given country code.
 
         Args:
             country_code (str): The ISO 3166-1 alpha-2 country code.
+            timer (Optional[PhaseTimer]): Records how long fetching and parsing the country information takes.
 
         Returns:
             Tuple[Optional[str], Optional[Error]]: A tuple containing the currency code (or None if not found)
                                                    and an error message (or None if no error occurs).
         """
-        country_response = self.fetch_country_info(country_code)
-        currency, error = self.extract_currency(country_response)
+        currency, error = self.resolve_currency(country_code, timer)
+
+        if error:
+            return None, error
+
+        # Additional checks
+        expected_currencies = self.registry.currencies(country_code)
+        if currency not in expected_currencies:
+            expected = " or ".join(expected_currencies) or None
+            return None, Error(f"Expected {expected} but got {currency}")
+
+        return currency, None
+
+    def run_currencies(
+        self, country_code: str, timer: Optional[PhaseTimer] = None
+    ) -> Tuple[Optional[List[str]], Optional[Error]]:
+        """
+        Fetch and extract all currencies of a country, keeping only those the registry expects for it.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+            timer (Optional[PhaseTimer]): Records how long fetching and parsing the country information takes.
+
+        Returns:
+            Tuple[Optional[List[str]], Optional[Error]]: A tuple containing the currency codes, the main one first,
+                                                         (or None if not found) and an error message
+                                                         (or None if no error occurs).
+        """
+        currencies, error = self.resolve_currencies(country_code, timer)
+
+        if error:
+            return None, error
 
         # Additional checks
-        expected_currency = codes.get(country_code)
-        if expected_currency != currency:
-            return None, Error(f"Expected {expected_currency} but got {currency}")
+        expected_currencies = self.registry.currencies(country_code)
+        valid_currencies = [
+            currency for currency in currencies if currency in expected_currencies
+        ]
+        if not valid_currencies:
+            expected = " or ".join(expected_currencies) or None
+            return None, Error(f"Expected {expected} but got {' or '.join(currencies)}")
+
+        return valid_currencies, None
+
+    def resolve_currency(
+        self, country_code: str, timer: Optional[PhaseTimer] = None
+    ) -> Tuple[Optional[str], Optional[Error]]:
+        """
+        Resolve the main currency of a country from the cache, the prefetched index or the API, in that order.
+        Stale cache entries are served immediately and refreshed in the background.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+            timer (Optional[PhaseTimer]): Records how long fetching and parsing the country information takes.
+
+        Returns:
+            Tuple[Optional[str], Optional[Error]]: A tuple containing the currency code (or None if not found)
+                                                   and an error message (or None if no error occurs).
+        """
+        currencies, error = self.resolve_currencies(country_code, timer)
+        if error:
+            return None, error
+
+        return currencies[0], None
+
+    def resolve_currencies(
+        self, country_code: str, timer: Optional[PhaseTimer] = None
+    ) -> Tuple[Optional[List[str]], Optional[Error]]:
+        """
+        Resolve all currencies of a country from the cache, the prefetched index or the API, in that order.
+        Stale cache entries are served immediately and refreshed in the background.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+            timer (Optional[PhaseTimer]): Records how long fetching and parsing the country information takes.
+
+        Returns:
+            Tuple[Optional[List[str]], Optional[Error]]: A tuple containing the currency codes (or None if not found)
+                                                         and an error message (or None if no error occurs).
+        """
+        if self.cache is not None:
+            currencies, freshness = self.cache.get(country_code)
+
+            if freshness == CountryCache.STALE:
+                self._revalidate(country_code)
+
+            if currencies:
+                return currencies, None
+
+        return self._fetch_currencies(country_code, timer)
+
+    def _fetch_currencies(
+        self, country_code: str, timer: Optional[PhaseTimer] = None
+    ) -> Tuple[Optional[List[str]], Optional[Error]]:
+        """
+        Get the currencies of a country from the prefetched index, or from the API and store them in the cache.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+            timer (Optional[PhaseTimer]): Records how long fetching and parsing the country information takes.
+
+        Returns:
+            Tuple[Optional[List[str]], Optional[Error]]: A tuple containing the currency codes (or None if not found)
+                                                         and an error message (or None if no error occurs).
+        """
+        if self._currency_index is not None:
+            return self.lookup_currencies(country_code)
+
+        if timer is None:
+            timer = PhaseTimer()
+
+        try:
+            with timer.phase("country_fetch"):
+                country_response = self.fetch_country_info(country_code)
+        except requests.RequestException:
+            return None, Error("Failed to fetch country information.")
+
+        with timer.phase("country_parse"):
+            currencies, error = self.extract_currencies(country_response)
+
+        if self.cache is not None and not error:
+            self.cache.set(country_code, currencies)
+
+        return currencies, error
+
+    def _revalidate(self, country_code: str):
+        """
+        Refresh a stale cache entry in a background thread, at most once at a time per country.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+        """
+        with self._revalidating_lock:
+            if country_code in self._revalidating:
+                return
+            self._revalidating.add(country_code)
+
+        def refresh():
+            try:
+                self._fetch_currencies(country_code)
+            finally:
+                with self._revalidating_lock:
+                    self._revalidating.discard(country_code)
 
-        return currency, error
+        threading.Thread(target=refresh, daemon=True).start()
@@ -1,20 +1,81 @@
-import time
-from typing import Tuple, Optional
+import sys
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Tuple, Optional, Union
 
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.remote.webelement import WebElement
 
-from src.error import Error
+from src.consent_store import CONSENT_COOKIE_NAMES, ConsentStore
+from src.currency_registry import get_default_registry
+from src.driver_factory import get_driver_factory
+from src.driver_pool import DriverPool
+from src.error import CircuitOpenError, Error, TransientError
+from src.rate_backends import RateBackend
+from src.rate_matrix import RateMatrix
+from src.resilience import (
+    CircuitBreaker,
+    RetryPolicy,
+    TransientFailure,
+    is_transient,
+)
+from src.timing import PhaseTimer
+from src.wait_conditions import RateSettled
 
+# Types the currency code into an autocomplete, waits for the option of that exact code and
+# selects it, all in one WebDriver round trip. Resolves with the selected value and option text.
+SELECT_OPTION_SCRIPT = """
+const [inputId, code, displayName, timeoutMs, done] = arguments;
+const input = document.getElementById(inputId);
+if (!input) { done(null); return; }
 
-codes = {
-    "GBP": "British Pound",
-    "TRY": "Turkish Lira",
-    "EUR": "Euro",
-}
+const setValue = Object.getOwnPropertyDescriptor(HTMLInputElement.prototype, "value").set;
+input.focus();
+setValue.call(input, code);
+input.dispatchEvent(new Event("input", {bubbles: true}));
+
+const deadline = Date.now() + timeoutMs;
+(function poll() {
+  const listbox = document.getElementById(inputId + "-listbox");
+  const options = listbox ? Array.from(listbox.querySelectorAll("[role='option']")) : [];
+  const option =
+    options.find((item) => item.textContent.trim().split(/\\s+/)[0].toUpperCase() === code) ||
+    options.find((item) => displayName && item.textContent.includes(displayName));
+
+  if (option) {
+    const text = option.textContent;
+    option.dispatchEvent(new MouseEvent("mousedown", {bubbles: true, cancelable: true}));
+    option.click();
+    setTimeout(() => done({value: input.value, option: text}), 0);
+  } else if (Date.now() > deadline) {
+    done(null);
+  } else {
+    setTimeout(poll, 25);
+  }
+})();
+"""
+
+
+class RateUnchangedError(TimeoutException):
+    """
+    Raised when the rate still shows the previous pair's value after the pair was changed.
+    """
+
+
+class CurrencySelectionError(TransientFailure):
+    """
+    Raised when an autocomplete does not show the requested currency after selecting it.
+    """
+
+
+class PageLoadError(TransientFailure):
+    """
+    Raised when the browser fails to load the converter page, e.g. on a reset connection.
+    """
 
 
 class CurrencyConverter:
@@ -25,26 +86,70 @@ class CurrencyConverter:
 
     URL = "https://www.oanda.com/currency-converter/en/"
     WAIT_SECONDS = 10
+    COOKIE_WAIT_SECONDS = 3
+    RATE_SETTLE_SECONDS = 10
+    RATE_POLL_SECONDS = 0.2
+    RATE_STABLE_POLLS = 2
     AUTOCOMPLETE_ROOT_SELECTOR = ".MuiAutocomplete-root"
     BASE_CURRENCY_INPUT_ID = "baseCurrency_currency_autocomplete"
     QUOTE_CURRENCY_INPUT_ID = "quoteCurrency_currency_autocomplete"
     RATE_INPUT_ID = "input[name='numberformat'][tabindex='4']"
     COOKIE_ID = "onetrust-accept-btn-handler"
+    OPTION_WAIT_SECONDS = 2
+    SELECT_ALL_KEY = Keys.COMMAND if sys.platform == "darwin" else Keys.CONTROL
 
-    def __init__(self, driver: webdriver.Chrome):
+    def __init__(
+        self,
+        driver: Optional[Union[str, webdriver.Chrome]] = None,
+        pool: Optional[DriverPool] = None,
+        rate_matrix: Optional[RateMatrix] = None,
+        backend: Optional[RateBackend] = None,
+        consent_store: Optional[ConsentStore] = None,
+        timer: Optional[PhaseTimer] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        tabs: int = 1,
+    ):
         """
-        Initialize the CurrencyConverter with a Selenium WebDriver instance.
+        Initialize the CurrencyConverter with a Selenium WebDriver factory or a pool of WebDriver instances.
+        The browser is only started (or borrowed) when a conversion runs.
 
         Args:
-            driver (webdriver.Chrome): The Selenium WebDriver instance to use for automation.
+            driver (Optional[Union[str, webdriver.Chrome]]): The Selenium WebDriver class to use for automation,
+                                                             or a driver name such as "lean".
+            pool (Optional[DriverPool]): A pool to borrow warm WebDriver instances from instead.
+            rate_matrix (Optional[RateMatrix]): Anchor rates to derive conversions from. Only anchor
+                                                pairs missing from it are scraped.
+            backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+            consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+            timer (Optional[PhaseTimer]): Records how long each phase of the conversions takes.
+            retry_policy (Optional[RetryPolicy]): How often transient page failures are retried.
+            breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing,
+                                                e.g. one shared by all workers of a batch.
+            tabs (int): The number of browser tabs convert_many interleaves pairs across.
         """
-        self.driver = driver()
+        if driver is None and pool is None:
+            raise ValueError("Either a driver or a driver pool is required.")
+
+        if tabs < 1:
+            raise ValueError("At least one tab is required.")
+
+        self._driver_factory = get_driver_factory(driver) if driver else None
+        self.pool = pool
+        self.rate_matrix = rate_matrix
+        self.backend = backend
+        self.consent_store = consent_store
+        self.timer = timer if timer is not None else PhaseTimer()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breaker = breaker
+        self.tabs = tabs
+        self.driver = None
 
     def convert_currency(
         self, from_currency: str, to_currency: str = "EUR"
     ) -> Tuple[Optional[float], Optional[Error]]:
         """
-        Convert currency using the OANDA currency converter.
+        Convert currency using the rate backend, or the OANDA currency converter page as a fallback.
 
         Args:
             from_currency (str): The currency code to convert from.
@@ -57,8 +162,404 @@ class CurrencyConverter:
         Raises:
             Exception: If there is an error during the conversion process.
         """
+        if self.rate_matrix is not None:
+            results = self.convert_with_rate_matrix([(from_currency, to_currency)])
+        else:
+            results = list(self.convert_many([(from_currency, to_currency)]))
+        _, _, rate, error = results[0]
+
+        return rate, error
+
+    def convert_many(
+        self, pairs: Iterable[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, str, Optional[float], Optional[Error]]]:
+        """
+        Convert several currency pairs on a single loaded OANDA page.
+        Pairs are first offered to the rate backend, if any. The page is loaded and the cookie
+        consent is handled once, when the first pair needs it; for each pair only the base and
+        quote fields are re-typed. A pair that fails leaves the page to be reloaded for the next one.
+        Results are yielded as soon as each rate is read.
+        With more than one tab, pairs are interleaved across tabs instead (see convert_in_tabs).
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): The (from_currency, to_currency) pairs to convert.
+
+        Yields:
+            Tuple[str, str, Optional[float], Optional[Error]]: The pair, the converted amount (or None if not found)
+                                                               and an error message (or None if no error occurs).
+        """
+        if self.tabs > 1:
+            yield from self.convert_in_tabs(pairs)
+            return
+
+        is_page_loaded = False  # The page is only loaded once a pair needs it
+
+        try:
+            for from_currency, to_currency in pairs:
+                result = self._convert_without_page(from_currency, to_currency)
+                if result is not None:
+                    yield (from_currency, to_currency, *result)
+                    continue
+
+                rate, error, is_page_loaded = self._convert_with_retries(
+                    from_currency, to_currency, is_page_loaded
+                )
+                self._record_outcome(error)
+
+                yield from_currency, to_currency, rate, error
+
+        finally:
+            self._release_driver()
+
+    def convert_in_tabs(
+        self, pairs: Iterable[Tuple[str, str]]
+    ) -> Iterator[Tuple[str, str, Optional[float], Optional[Error]]]:
+        """
+        Convert several currency pairs by interleaving them across the tabs of one browser.
+        The pairs of a round are typed into one tab after the other, then the rates are collected
+        tab by tab, so the rates of all tabs load and settle at the same time. A tab that fails
+        is reloaded before its next pair. Failures are not retried.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): The (from_currency, to_currency) pairs to convert.
+
+        Yields:
+            Tuple[str, str, Optional[float], Optional[Error]]: The pair, the converted amount (or None if not found)
+                                                               and an error message (or None if no error occurs),
+                                                               in input order.
+        """
+        pairs = iter(pairs)
+        handles: Optional[List[str]] = None
+        broken_handles = set()
+
         try:
-            self.driver.get(self.URL)
+            for round_pairs in iter(lambda: list(islice(pairs, self.tabs)), []):
+                results = [
+                    self._convert_without_page(from_currency, to_currency)
+                    for from_currency, to_currency in round_pairs
+                ]
+                started = []
+
+                for index, (from_currency, to_currency) in enumerate(round_pairs):
+                    if results[index] is not None:
+                        continue
+
+                    try:
+                        if handles is None:
+                            handles = self._open_tabs()
+
+                        handle = handles[len(started)]
+                        self.driver.switch_to.window(handle)
+                        if handle in broken_handles:
+                            self._load_page()
+                            broken_handles.discard(handle)
+
+                        previous_rate_value = self._start_conversion(
+                            from_currency, to_currency
+                        )
+                        started.append((index, handle, previous_rate_value))
+
+                    except Exception as e:
+                        results[index] = None, self._classify_failure(e)
+                        self._record_outcome(results[index][1])
+                        if handles is None:
+                            break  # No browser to convert the rest of the round with
+                        broken_handles.add(handles[len(started)])
+
+                for index, handle, previous_rate_value in started:
+                    try:
+                        self.driver.switch_to.window(handle)
+                        rate = self._finish_conversion(previous_rate_value)
+
+                        if self.backend is not None:
+                            self.backend.learn(self.driver)
+
+                        results[index] = rate, None
+
+                    except Exception as e:
+                        results[index] = None, self._classify_failure(e)
+                        broken_handles.add(handle)
+
+                    self._record_outcome(results[index][1])
+
+                for (from_currency, to_currency), result in zip(round_pairs, results):
+                    yield (
+                        from_currency,
+                        to_currency,
+                        *(result or (None, Error("Failed to convert currency."))),
+                    )
+
+        finally:
+            if handles is not None:
+                self._close_tabs(handles)
+            self._release_driver()
+
+    def _convert_without_page(
+        self, from_currency: str, to_currency: str
+    ) -> Optional[Tuple[Optional[float], Optional[Error]]]:
+        """
+        Answer a pair from the rate backend, or fail it fast while the circuit is open.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Optional[Tuple[Optional[float], Optional[Error]]]: The converted amount and error,
+                                                               or None if the page is needed.
+        """
+        rate, error = self._convert_with_backend(from_currency, to_currency)
+        if not error:
+            return rate, None
+
+        if self.breaker is not None and not self.breaker.allow():
+            return None, CircuitOpenError("The currency converter keeps failing.")
+
+        return None
+
+    def _record_outcome(self, error: Optional[Error]):
+        """
+        Record the outcome of a page conversion in the circuit breaker, if any.
+
+        Args:
+            error (Optional[Error]): The error of the conversion, None if it succeeded.
+        """
+        if self.breaker is None:
+            return
+
+        if error:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    @staticmethod
+    def _classify_failure(exception: Exception) -> Error:
+        """
+        Turn the exception of a failed conversion into an error.
+
+        Args:
+            exception (Exception): The exception raised by the conversion.
+
+        Returns:
+            Error: A TransientError if retrying may help, an Error otherwise.
+        """
+        if is_transient(exception):
+            return TransientError("Failed to convert currency.")
+        return Error("Failed to convert currency.")
+
+    def _open_tabs(self) -> List[str]:
+        """
+        Start or borrow a WebDriver instance and load the OANDA page in as many tabs as configured.
+        The first tab handles the cookie consent, the others are opened without waiting for each other.
+        If a tab fails to load, the tabs opened so far are closed again.
+
+        Returns:
+            List[str]: The window handles of the tabs.
+        """
+        if self.driver is None:
+            self._acquire_driver()
+
+        self._load_page()
+        first_handle = self.driver.current_window_handle
+
+        known_handles = set(self.driver.window_handles)
+        handles = [first_handle]
+
+        try:
+            with self.timer.phase("tabs_open"):
+                for _ in range(self.tabs - 1):
+                    self.driver.execute_script(
+                        "window.open(arguments[0], '_blank');", self.URL
+                    )
+
+                handles += [
+                    handle
+                    for handle in self.driver.window_handles
+                    if handle not in known_handles
+                ]
+
+                for handle in handles[1:]:
+                    self.driver.switch_to.window(handle)
+                    self._webdriver_wait().until(
+                        EC.presence_of_element_located(
+                            (By.CSS_SELECTOR, self.AUTOCOMPLETE_ROOT_SELECTOR)
+                        )
+                    )
+        except Exception:
+            # Close the tabs opened so far, as the next round opens its own
+            try:
+                handles[1:] = [
+                    handle
+                    for handle in self.driver.window_handles
+                    if handle not in known_handles
+                ]
+            except Exception:
+                pass
+            self._close_tabs(handles)
+            raise
+
+        return handles
+
+    def _close_tabs(self, handles: List[str]):
+        """
+        Close all tabs but the first, so a pooled browser is returned with a single tab.
+
+        Args:
+            handles (List[str]): The window handles of the tabs.
+        """
+        try:
+            for handle in handles[1:]:
+                self.driver.switch_to.window(handle)
+                self.driver.close()
+            self.driver.switch_to.window(handles[0])
+        except Exception:
+            pass
+
+    def _convert_with_retries(
+        self, from_currency: str, to_currency: str, is_page_loaded: bool
+    ) -> Tuple[Optional[float], Optional[Error], bool]:
+        """
+        Convert currency on the OANDA page, retrying transient failures with backoff.
+        A retry reuses the loaded page when the converter is still shown and the rate did not get stuck
+        at the previous pair's value, and reloads it otherwise.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+            is_page_loaded (bool): True if the page is loaded, False if it needs loading.
+
+        Returns:
+            Tuple[Optional[float], Optional[Error], bool]: The converted amount (or None if not found),
+                                                           an error message (or None if no error occurs)
+                                                           and whether the next pair can reuse the page.
+        """
+        for _ in self.retry_policy.backoff():
+            is_converting = False
+            try:
+                if not is_page_loaded:
+                    if self.driver is None:
+                        self._acquire_driver()
+                    self._load_page()
+                    is_page_loaded = True
+
+                is_converting = True
+                rate = self._convert_on_page(from_currency, to_currency)
+
+                if self.backend is not None:
+                    self.backend.learn(self.driver)
+
+                return rate, None, True
+
+            except Exception as e:
+                error = self._classify_failure(e)
+                if not isinstance(error, TransientError):
+                    break
+
+                # An unchanged rate is retried on a fresh page, so a pair with the same rate as the
+                # previous one (e.g. pegged currencies) is compared with the page's default pair instead
+                is_page_loaded = (
+                    is_converting
+                    and not isinstance(e, RateUnchangedError)
+                    and self._is_converter_shown()
+                )
+
+        # The next pair starts from a freshly loaded page
+        return None, error, False
+
+    def _is_converter_shown(self) -> bool:
+        """
+        Check whether the loaded page still shows the currency fields, so it can be reused.
+
+        Returns:
+            bool: True if the currency fields are on the page, False otherwise.
+        """
+        try:
+            return bool(
+                self.driver.find_elements(
+                    By.CSS_SELECTOR, self.AUTOCOMPLETE_ROOT_SELECTOR
+                )
+            )
+        except Exception:
+            return False
+
+    def _convert_with_backend(
+        self, from_currency: str, to_currency: str
+    ) -> Tuple[Optional[float], Optional[Error]]:
+        """
+        Convert currency with the rate backend, if one is set and ready.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Tuple[Optional[float], Optional[Error]]: A tuple containing the converted amount (or None if not found)
+                                                     and an error message (or None if no error occurs).
+        """
+        if self.backend is None or not self.backend.is_ready:
+            return None, Error("No rate backend available.")
+
+        try:
+            with self.timer.phase("backend_convert"):
+                return self.backend.convert(from_currency, to_currency)
+        except Exception:
+            return None, Error("Failed to convert currency.")
+
+    def convert_with_rate_matrix(
+        self, pairs: Iterable[Tuple[str, str]]
+    ) -> List[Tuple[str, str, Optional[float], Optional[Error]]]:
+        """
+        Derive several conversions from the rate matrix. The anchor rates missing for any of them
+        are scraped together on a single loaded page first.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): The (from_currency, to_currency) pairs to convert.
+
+        Returns:
+            List[Tuple[str, str, Optional[float], Optional[Error]]]: The pair, the converted amount (or None if
+                                                                     not found) and an error message (or None if
+                                                                     no error occurs), in input order.
+        """
+        pairs = list(pairs)
+        anchor_pairs = [
+            (currency, self.rate_matrix.anchor)
+            for currency in self.rate_matrix.missing_anchor_rates(pairs)
+        ]
+
+        errors: Dict[str, Error] = {}
+        for currency, _, rate, error in list(self.convert_many(anchor_pairs)):
+            if not error:
+                try:
+                    self.rate_matrix.set_anchor_rate(currency, rate)
+                    continue
+                except ValueError:
+                    error = Error("Failed to convert currency.")
+            errors[currency.upper()] = error
+
+        results = []
+        for (from_currency, to_currency), rate in zip(
+            pairs, self.rate_matrix.cross_rates(pairs)
+        ):
+            error = errors.get(from_currency.upper()) or errors.get(to_currency.upper())
+            if not error and rate is None:
+                # An anchor rate expired between scraping it and deriving the pair
+                error = Error("Failed to convert currency.")
+            results.append((from_currency, to_currency, None if error else rate, error))
+
+        return results
+
+    def _load_page(self):
+        """
+        Load the OANDA currency converter page and handle the cookie consent.
+        """
+        with self.timer.phase("page_load"):
+            if self.consent_store is not None:
+                self.consent_store.inject(self.driver)
+
+            try:
+                self.driver.get(self.URL)
+            except WebDriverException as e:
+                raise PageLoadError("The converter page failed to load.") from e
 
             # Wait for the homepage to load and the currency input fields to be present
             self._webdriver_wait().until(
@@ -67,54 +568,250 @@ class CurrencyConverter:
                 )
             )
 
-            # Wait for the cookie consent button to be clickable and click it
+        # Accept the cookie consent unless it was already given
+        with self.timer.phase("cookie_consent"):
             self._handle_cookie_consent()
 
-            # Wait for the BASE currency input fields to be present
+    def _convert_on_page(self, from_currency: str, to_currency: str) -> float:
+        """
+        Set the currency pair on the already loaded page and read the converted amount.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            float: The converted amount.
+        """
+        previous_rate_value = self._start_conversion(from_currency, to_currency)
+        return self._finish_conversion(previous_rate_value)
+
+    def _start_conversion(self, from_currency: str, to_currency: str) -> Optional[str]:
+        """
+        Set the currency pair on the already loaded page, without waiting for the rate.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Optional[str]: The rate value shown before the pair was changed.
+        """
+        # Remember the rate shown before the pair changes
+        previous_rate_value = self._read_rate_value()
+
+        # Wait for the BASE currency input fields to be present
+        with self.timer.phase("base_input"):
             self._set_currency_input(from_currency, self.BASE_CURRENCY_INPUT_ID)
 
-            # Wait for the QUOTE currency input fields to be present
+        # Wait for the QUOTE currency input fields to be present
+        with self.timer.phase("quote_input"):
             self._set_currency_input(to_currency, self.QUOTE_CURRENCY_INPUT_ID)
 
-            # Wait for the conversion to complete
-            time.sleep(4)
+        return previous_rate_value
 
-            # Wait for the rate input field to be present and retrieve the value
-            rate_element = self._webdriver_wait().until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, self.RATE_INPUT_ID))
-            )
-            rate_value = rate_element.get_attribute("value")
+    def _finish_conversion(self, previous_rate_value: Optional[str]) -> float:
+        """
+        Wait for the rate of the pair set by _start_conversion and read it.
 
-            return float(rate_value), None
+        Args:
+            previous_rate_value (Optional[str]): The rate value shown before the pair was changed.
 
-        except Exception:
-            return None, Error("Failed to convert currency.")
+        Returns:
+            float: The converted amount.
+        """
+        # Wait for the conversion to complete and the rate to settle
+        with self.timer.phase("rate_settle"):
+            rate_value = self._wait_for_rate(previous_rate_value)
+
+        return float(rate_value)
+
+    def _read_rate_value(self) -> Optional[str]:
+        """
+        Read the rate input's current value without waiting for it.
+
+        Returns:
+            Optional[str]: The current rate value, or None if the rate input is not on the page.
+        """
+        rate_elements = self.driver.find_elements(By.CSS_SELECTOR, self.RATE_INPUT_ID)
+        if not rate_elements:
+            return None
 
+        return rate_elements[0].get_attribute("value")
+
+    def _wait_for_rate(self, previous_rate_value: Optional[str]) -> str:
+        """
+        Wait until the rate input's value has changed from its previous value and settled.
+
+        Args:
+            previous_rate_value (Optional[str]): The rate value shown before the pair was changed.
+
+        Returns:
+            str: The settled rate value.
+
+        Raises:
+            TimeoutException: If no rate is shown within RATE_SETTLE_SECONDS.
+            RateUnchangedError: If the rate still shows the previous value after RATE_SETTLE_SECONDS.
+        """
+        rate_settled = RateSettled(
+            (By.CSS_SELECTOR, self.RATE_INPUT_ID),
+            previous_rate_value,
+            self.RATE_STABLE_POLLS,
+        )
+        try:
+            rate_element = WebDriverWait(
+                self.driver,
+                self.RATE_SETTLE_SECONDS,
+                poll_frequency=self.RATE_POLL_SECONDS,
+            ).until(rate_settled)
+        except TimeoutException:
+            if rate_settled.last_value is None:
+                raise
+            # The page may not have recomputed yet, so the previous pair's rate is not trusted
+            if rate_settled.last_value == previous_rate_value:
+                raise RateUnchangedError(
+                    f"The rate still shows {previous_rate_value} after changing the pair."
+                )
+            return rate_settled.last_value
+
+        return rate_element.get_attribute("value")
+
+    def _acquire_driver(self):
+        """
+        Start a new WebDriver instance or borrow one from the pool.
+        """
+        with self.timer.phase("driver_start"):
+            if self.pool is not None:
+                self.driver = self.pool.checkout()
+            else:
+                self.driver = self._driver_factory()
+
+    def _release_driver(self):
+        """
+        Return the WebDriver instance to the pool, or quit it when not pooled.
+        """
+        if self.driver is None:
+            return
+
+        try:
+            with self.timer.phase("driver_quit"):
+                if self.pool is not None:
+                    self.pool.checkin(self.driver)
+                else:
+                    self.driver.quit()
         finally:
-            self.driver.quit()
+            self.driver = None
 
     def _handle_cookie_consent(self):
         """
         Handle cookie consent for the OANDA website.
+        Nothing is waited for when the consent cookies are already set or the page has no banner,
+        and a banner that does not become clickable within COOKIE_WAIT_SECONDS is skipped.
         """
-        cookie_accept_button = self._webdriver_wait().until(
-            EC.element_to_be_clickable((By.ID, self.COOKIE_ID))
-        )
+        if any(self.driver.get_cookie(name) for name in CONSENT_COOKIE_NAMES):
+            return
+
+        if not self.driver.find_elements(By.ID, self.COOKIE_ID):
+            return
+
+        try:
+            cookie_accept_button = WebDriverWait(
+                self.driver, self.COOKIE_WAIT_SECONDS
+            ).until(EC.element_to_be_clickable((By.ID, self.COOKIE_ID)))
+        except TimeoutException:
+            return
+
         cookie_accept_button.click()
 
+        if self.consent_store is not None:
+            try:
+                # The banner sets the consent cookies asynchronously after the click
+                WebDriverWait(self.driver, self.COOKIE_WAIT_SECONDS).until(
+                    lambda driver: driver.get_cookie(CONSENT_COOKIE_NAMES[0])
+                )
+            except TimeoutException:
+                return
+
+            self.consent_store.save(self.driver)
+
     def _set_currency_input(self, currency_code: str, web_element: str):
         """
         Set the currency input field with the desired currency code.
+        The option of the exact code is selected by a script in one round trip, and typing the code
+        key by key is only used when no matching option shows up within OPTION_WAIT_SECONDS.
 
         Args:
             currency_code (str): The currency code to set.
             web_element (str): The ID of the web element to interact with.
+
+        Raises:
+            CurrencySelectionError: If the field does not show the currency after typing it either.
         """
         input_field = self._webdriver_wait().until(
             EC.element_to_be_clickable((By.ID, web_element))
         )
+        expected_value = get_default_registry().display_name(currency_code)
+
+        selection = self._select_option(currency_code, web_element, expected_value)
+        # The option text starts with the code, the input only shows the name
+        if selection is not None and (
+            selection["value"] == expected_value
+            or (
+                selection["value"]
+                and selection["option"].split()[:1] == [currency_code.upper()]
+            )
+        ):
+            return
+
+        actual_value = self._type_currency(input_field, currency_code)
+        if actual_value == expected_value or (expected_value is None and actual_value):
+            return
+
+        raise CurrencySelectionError(
+            f"Expected {expected_value} but got {actual_value}"
+        )
+
+    def _select_option(
+        self, currency_code: str, web_element: str, expected_value: Optional[str]
+    ) -> Optional[Dict[str, str]]:
+        """
+        Select the autocomplete option of a currency with SELECT_OPTION_SCRIPT.
+
+        Args:
+            currency_code (str): The currency code to select.
+            web_element (str): The ID of the autocomplete input.
+            expected_value (Optional[str]): The display name of the currency, if known.
+
+        Returns:
+            Optional[Dict[str, str]]: The input's value and the selected option's text,
+                                      or None if no matching option showed up.
+        """
+        try:
+            selection = self.driver.execute_async_script(
+                SELECT_OPTION_SCRIPT,
+                web_element,
+                currency_code.upper(),
+                expected_value,
+                int(self.OPTION_WAIT_SECONDS * 1000),
+            )
+        except WebDriverException:
+            return None
+
+        return selection if isinstance(selection, dict) else None
+
+    def _type_currency(self, input_field: WebElement, currency_code: str) -> str:
+        """
+        Select a currency by typing its code key by key, like a user would.
+
+        Args:
+            input_field (WebElement): The autocomplete input.
+            currency_code (str): The currency code to type.
+
+        Returns:
+            str: The input's value after the selection.
+        """
         input_field.click()  # Click to focus
-        input_field.send_keys(Keys.COMMAND + "a")  # Select all text
+        input_field.send_keys(self.SELECT_ALL_KEY + "a")  # Select all text
         input_field.send_keys(Keys.BACKSPACE)  # Clear the field
         input_field.send_keys(currency_code)  # Enter the desired currency code
         input_field.send_keys(
@@ -122,11 +819,7 @@ class CurrencyConverter:
         )  # Press the down arrow key to select the first suggestion
         input_field.send_keys(Keys.RETURN)  # Confirm the selection
 
-        # Additional checks
-        actual_value = input_field.get_attribute("value")
-        expected_value = codes.get(currency_code)
-        if actual_value != expected_value:
-            print(f"Expected {expected_value} but got {actual_value}")
+        return input_field.get_attribute("value")
 
     def _webdriver_wait(self) -> WebDriverWait:
         """
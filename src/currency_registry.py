@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "currencies.json")
+
+_default_registry: Optional["CurrencyRegistry"] = None
+_default_registry_lock = threading.Lock()
+
+
+class CurrencyRegistry:
+    """
+    An index of the currencies used by every country and their OANDA display names.
+    The bundled data file is only read on the first lookup.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initialize the CurrencyRegistry.
+
+        Args:
+            path (Optional[str]): The JSON data file to load. Defaults to the bundled src/data/currencies.json.
+        """
+        self.path = path or DEFAULT_DATA_PATH
+        self._country_currencies: Optional[Dict[str, Tuple[str, ...]]] = None
+        self._currency_countries: Dict[str, Tuple[str, ...]] = {}
+        self._display_names: Dict[str, str] = {}
+        self._currencies_by_name: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def currencies(self, country_code: str) -> Tuple[str, ...]:
+        """
+        Get the ISO 4217 currency codes used in a country, the primary currency first.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            Tuple[str, ...]: The currency codes, empty if the country is unknown or has no currency.
+        """
+        return self._load().get(country_code.upper(), ())
+
+    def primary_currency(self, country_code: str) -> Optional[str]:
+        """
+        Get the main currency of a country.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            Optional[str]: The currency code, or None if the country is unknown or has no currency.
+        """
+        currencies = self.currencies(country_code)
+        return currencies[0] if currencies else None
+
+    def countries(self, currency_code: str) -> Tuple[str, ...]:
+        """
+        Get the countries that use a currency.
+
+        Args:
+            currency_code (str): The ISO 4217 currency code.
+
+        Returns:
+            Tuple[str, ...]: The ISO 3166-1 alpha-2 country codes, in alphabetical order.
+        """
+        self._load()
+        return self._currency_countries.get(currency_code.upper(), ())
+
+    def display_name(self, currency_code: str) -> Optional[str]:
+        """
+        Get the name the OANDA autocomplete shows for a currency.
+
+        Args:
+            currency_code (str): The ISO 4217 currency code.
+
+        Returns:
+            Optional[str]: The display name, or None if the currency is unknown.
+        """
+        self._load()
+        return self._display_names.get(currency_code.upper())
+
+    def currency_for_name(self, display_name: str) -> Optional[str]:
+        """
+        Get the currency code behind an OANDA display name.
+
+        Args:
+            display_name (str): The display name, e.g. "British Pound".
+
+        Returns:
+            Optional[str]: The currency code, or None if the name is unknown.
+        """
+        self._load()
+        return self._currencies_by_name.get(display_name.casefold())
+
+    def country_codes(self) -> Tuple[str, ...]:
+        """
+        Get the countries that use at least one currency.
+
+        Returns:
+            Tuple[str, ...]: The ISO 3166-1 alpha-2 country codes, in alphabetical order.
+        """
+        return tuple(
+            sorted(code for code, currencies in self._load().items() if currencies)
+        )
+
+    def is_known_country(self, country_code: str) -> bool:
+        """
+        Check whether a country is in the registry.
+
+        Args:
+            country_code (str): The ISO 3166-1 alpha-2 country code.
+
+        Returns:
+            bool: True if the country is known, even if it has no currency.
+        """
+        return country_code.upper() in self._load()
+
+    def _load(self) -> Dict[str, Tuple[str, ...]]:
+        """
+        Read the data file and build the indexes, once.
+
+        Returns:
+            Dict[str, Tuple[str, ...]]: The country code to currency codes index.
+        """
+        if self._country_currencies is not None:
+            return self._country_currencies
+
+        with self._lock:
+            if self._country_currencies is None:
+                with open(self.path, encoding="utf-8") as file:
+                    data = json.load(file)
+
+                self._display_names = data["currencies"]
+                self._currencies_by_name = {
+                    name.casefold(): code for code, name in self._display_names.items()
+                }
+
+                currency_countries: Dict[str, List[str]] = {}
+                for country_code, currencies in sorted(data["countries"].items()):
+                    for currency_code in currencies:
+                        currency_countries.setdefault(currency_code, []).append(
+                            country_code
+                        )
+                self._currency_countries = {
+                    code: tuple(countries)
+                    for code, countries in currency_countries.items()
+                }
+
+                # Assigned last, as its presence marks the registry as loaded
+                self._country_currencies = {
+                    code: tuple(currencies)
+                    for code, currencies in data["countries"].items()
+                }
+
+        return self._country_currencies
+
+
+def get_default_registry() -> CurrencyRegistry:
+    """
+    Get the registry of the bundled data file shared by the whole process.
+
+    Returns:
+        CurrencyRegistry: The shared registry.
+    """
+    global _default_registry
+
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = CurrencyRegistry()
+        return _default_registry
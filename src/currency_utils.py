@@ -1,15 +1,106 @@
-from typing import Optional, Tuple
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple, Union
 
 from selenium import webdriver
 
+from src.consent_store import ConsentStore
 from src.country_info import CountryInfo
 from src.currency_converter import CurrencyConverter
+from src.driver_pool import DriverPool
 from src.error import Error
+from src.rate_backends import RateBackend
+from src.rate_cache import RateCache
+from src.rate_matrix import RateMatrix
+from src.resilience import CircuitBreaker
+from src.timing import PhaseTimer
+
+DEFAULT_QUOTE_CURRENCY = "EUR"
+
+RateRow = Tuple[str, str, Optional[float], Optional[Error]]
+
+
+class SingleFlight:
+    """
+    Deduplicates concurrent identical calls: while a call for a key is in flight, callers with
+    the same key wait for it and share its result instead of making the call again.
+    Safe to share between threads.
+    """
+
+    def __init__(self):
+        """
+        Initialize the SingleFlight.
+        """
+        self.calls = 0
+        self.shared = 0
+        self._in_flight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, function: Callable[..., Any], *args, **kwargs) -> Any:
+        """
+        Call a function, or wait for the call already in flight for the same key.
+
+        Args:
+            key (Hashable): Identifies identical calls, e.g. the currency pair.
+            function (Callable[..., Any]): The function to call.
+            *args: Passed on to the function.
+            **kwargs: Passed on to the function.
+
+        Returns:
+            Any: The result of the function, shared with the callers that waited for it.
+        """
+        with self._lock:
+            future = self._in_flight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._in_flight[key] = Future()
+                self.calls += 1
+            else:
+                self.shared += 1
+
+        if not is_leader:
+            return future.result()
+
+        try:
+            result = function(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the number of calls made and of calls saved by waiting for one in flight.
+
+        Returns:
+            Dict[str, int]: The number of calls and shared results.
+        """
+        return {"calls": self.calls, "shared": self.shared}
+
+
+# Shared by every caller in the process, so concurrent workers coalesce their lookups and conversions
+country_lookups = SingleFlight()
+conversions = SingleFlight()
 
 
 def get_currency_rate(
     driver: webdriver,
     country_code: str,
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    rate_matrix: Optional[RateMatrix] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    timer: Optional[PhaseTimer] = None,
+    breaker: Optional[CircuitBreaker] = None,
 ) -> Tuple[Optional[float], Optional[str], Optional[Error]]:
     """
     Retrieve the currency exchange rate for a given country code.
@@ -17,18 +108,44 @@ def get_currency_rate(
     Args:
         driver (webdriver): The Selenium WebDriver instance.
         country_code (str): The ISO 3166-1 alpha-2 country code.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow from instead of starting a new one.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currency with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        rate_matrix (Optional[RateMatrix]): Anchor rates to derive conversions from instead of scraping every pair.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        timer (Optional[PhaseTimer]): Records how long each phase of the lookup and conversion takes.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing.
 
     Returns:
         Optional[float]: The exchange rate if successful, None otherwise.
         Optional[str]: The currency code if successful, None otherwise.
         Optional[Error]: An error object if an error occurs, None otherwise.
     """
-    currency, error = CountryInfo().run(country_code)
+    if country_info is None:
+        country_info = CountryInfo()
+
+    currency, error = country_lookups.do(
+        _lookup_key(country_info, country_code),
+        country_info.run,
+        country_code,
+        timer=timer,
+    )
 
     if error:
         return None, currency, error
 
-    rate, error = CurrencyConverter(driver).convert_currency(currency)
+    rate, error = _convert_currency(
+        driver,
+        currency,
+        pool,
+        rate_cache,
+        rate_matrix,
+        backend,
+        consent_store,
+        timer,
+        breaker=breaker,
+    )
 
     if error:
         return None, currency, error
@@ -36,6 +153,377 @@ def get_currency_rate(
     return rate, currency, None
 
 
+def get_pair_rate(
+    driver: webdriver,
+    from_currency: str,
+    to_currency: str = DEFAULT_QUOTE_CURRENCY,
+    pool: Optional[DriverPool] = None,
+    rate_cache: Optional[RateCache] = None,
+    rate_matrix: Optional[RateMatrix] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    timer: Optional[PhaseTimer] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Tuple[Optional[float], Optional[Error]]:
+    """
+    Retrieve the exchange rate between two currencies, without a country lookup.
+
+    Args:
+        driver (webdriver): The Selenium WebDriver instance.
+        from_currency (str): The currency code to convert from.
+        to_currency (str): The currency code to convert to.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow from instead of starting a new one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        rate_matrix (Optional[RateMatrix]): Anchor rates to derive conversions from instead of scraping every pair.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        timer (Optional[PhaseTimer]): Records how long each phase of the conversion takes.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing.
+
+    Returns:
+        Tuple[Optional[float], Optional[Error]]: A tuple containing the exchange rate (or None if not found)
+                                                 and an error message (or None if no error occurs).
+    """
+    return _convert_currency(
+        driver,
+        from_currency,
+        pool,
+        rate_cache,
+        rate_matrix,
+        backend,
+        consent_store,
+        timer,
+        quote_currency=to_currency,
+        breaker=breaker,
+    )
+
+
+def get_currency_rate_table(
+    driver: webdriver,
+    country_code: str,
+    quote_currencies: Sequence[str] = (DEFAULT_QUOTE_CURRENCY,),
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    rate_matrix: Optional[RateMatrix] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    timer: Optional[PhaseTimer] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Tuple[List[RateRow], Optional[Error]]:
+    """
+    Retrieve the exchange rates from every currency of a country to every quote currency.
+    Pairs missing from the rate cache are converted together on a single loaded page, or with a
+    rate matrix, the anchor rates they are missing are.
+
+    Args:
+        driver (webdriver): The Selenium WebDriver instance.
+        country_code (str): The ISO 3166-1 alpha-2 country code.
+        quote_currencies (Sequence[str]): The currency codes to convert to.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow from instead of starting a new one.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currencies with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        rate_matrix (Optional[RateMatrix]): Anchor rates to derive conversions from instead of scraping every pair.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        timer (Optional[PhaseTimer]): Records how long each phase of the lookup and conversions takes.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing.
+
+    Returns:
+        Tuple[List[RateRow], Optional[Error]]: The (currency, quote currency, rate, error) rows, in currency then
+                                               quote order, and an error message if the country lookup failed.
+    """
+    if country_info is None:
+        country_info = CountryInfo()
+
+    currencies, error = country_info.run_currencies(country_code, timer=timer)
+
+    if error:
+        return [], error
+
+    pairs = [
+        (currency, quote_currency)
+        for currency in currencies
+        for quote_currency in quote_currencies
+    ]
+
+    rates: Dict[Tuple[str, str], Tuple[Optional[float], Optional[Error]]] = {}
+    if rate_cache is not None:
+        for pair in pairs:
+            rate = rate_cache.get(*pair)
+            if rate is not None:
+                rates[pair] = rate, None
+
+    missing_pairs = [pair for pair in pairs if pair not in rates]
+    if missing_pairs:
+        converter = CurrencyConverter(
+            driver,
+            pool=pool,
+            rate_matrix=rate_matrix,
+            backend=backend,
+            consent_store=consent_store,
+            timer=timer,
+            breaker=breaker,
+        )
+
+        if rate_matrix is not None:
+            converted = converter.convert_with_rate_matrix(missing_pairs)
+        else:
+            converted = converter.convert_many(missing_pairs)
+
+        for currency, quote_currency, rate, error in converted:
+            rates[currency, quote_currency] = rate, error
+            if not error and rate_cache is not None:
+                rate_cache.set(currency, quote_currency, rate)
+
+    return [(*pair, *rates[pair]) for pair in pairs], None
+
+
+def get_currency_rates_in_tabs(
+    driver: webdriver,
+    country_codes: Sequence[str],
+    tabs: int = 4,
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    timer: Optional[PhaseTimer] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> List[Tuple[Optional[float], Optional[str], Optional[Error]]]:
+    """
+    Retrieve the currency exchange rates for many country codes with a single browser,
+    interleaving the conversions across several of its tabs.
+
+    Args:
+        driver (webdriver): The Selenium WebDriver instance.
+        country_codes (Sequence[str]): The ISO 3166-1 alpha-2 country codes.
+        tabs (int): The number of tabs conversions are interleaved across.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow the browser from.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currencies with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        timer (Optional[PhaseTimer]): Records how long each phase of the lookups and conversions takes.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing.
+
+    Returns:
+        List[Tuple[Optional[float], Optional[str], Optional[Error]]]: The exchange rate, currency code and error
+                                                                      of every country, in input order.
+    """
+    if country_info is None:
+        country_info = CountryInfo()
+
+    results: List[Tuple[Optional[float], Optional[str], Optional[Error]]] = []
+    pending = []  # Indexes of the results still waiting for a conversion
+
+    for country_code in country_codes:
+        currency, error = country_info.run(country_code, timer=timer)
+        rate = None
+        if not error and rate_cache is not None:
+            rate = rate_cache.get(currency, DEFAULT_QUOTE_CURRENCY)
+
+        if not error and rate is None:
+            pending.append(len(results))
+        results.append((rate, currency, error))
+
+    if pending:
+        converted = CurrencyConverter(
+            driver,
+            pool=pool,
+            backend=backend,
+            consent_store=consent_store,
+            timer=timer,
+            breaker=breaker,
+            tabs=tabs,
+        ).convert_many(
+            [(results[index][1], DEFAULT_QUOTE_CURRENCY) for index in pending]
+        )
+
+        for index, (currency, _, rate, error) in zip(pending, converted):
+            results[index] = rate, currency, error
+            if not error and rate_cache is not None:
+                rate_cache.set(currency, DEFAULT_QUOTE_CURRENCY, rate)
+
+    return results
+
+
+async def get_currency_rates(
+    driver: webdriver,
+    country_codes: Sequence[str],
+    concurrency: int = 4,
+    pool: Optional[DriverPool] = None,
+    country_info: Optional[CountryInfo] = None,
+    rate_cache: Optional[RateCache] = None,
+    rate_matrix: Optional[RateMatrix] = None,
+    backend: Optional[RateBackend] = None,
+    consent_store: Optional[ConsentStore] = None,
+    breaker: Optional[CircuitBreaker] = None,
+) -> List[Tuple[Optional[float], Optional[str], Optional[Error]]]:
+    """
+    Retrieve the currency exchange rates for many country codes.
+    Country lookups and browser conversions run in separate executors, so the currencies of
+    upcoming countries are resolved while the browsers convert the current ones.
+
+    Args:
+        driver (webdriver): The Selenium WebDriver instance.
+        country_codes (Sequence[str]): The ISO 3166-1 alpha-2 country codes.
+        concurrency (int): The maximum number of lookups, and of conversions, in flight at the same time.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances. One sized to the concurrency is used when None.
+        country_info (Optional[CountryInfo]): The CountryInfo to resolve the currencies with, e.g. a prefetched one.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates consulted before starting a browser.
+        rate_matrix (Optional[RateMatrix]): Anchor rates to derive conversions from instead of scraping every pair.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing.
+
+    Returns:
+        List[Tuple[Optional[float], Optional[str], Optional[Error]]]: The exchange rate, currency code and error
+                                                                      of every country, in input order.
+    """
+    if country_info is None:
+        country_info = CountryInfo()
+
+    owns_pool = pool is None
+    if owns_pool:
+        pool = DriverPool(driver, size=concurrency)
+
+    loop = asyncio.get_running_loop()
+    lookup_executor = ThreadPoolExecutor(concurrency)
+    conversion_executor = ThreadPoolExecutor(concurrency)
+    lookup_slots = asyncio.Semaphore(concurrency)
+    conversion_slots = asyncio.Semaphore(concurrency)
+
+    async def get_rate(
+        country_code: str,
+    ) -> Tuple[Optional[float], Optional[str], Optional[Error]]:
+        async with lookup_slots:
+            currency, error = await loop.run_in_executor(
+                lookup_executor,
+                country_lookups.do,
+                _lookup_key(country_info, country_code),
+                country_info.run,
+                country_code,
+            )
+
+        if error:
+            return None, currency, error
+
+        async with conversion_slots:
+            rate, error = await loop.run_in_executor(
+                conversion_executor,
+                partial(
+                    _convert_currency,
+                    driver,
+                    currency,
+                    pool,
+                    rate_cache,
+                    rate_matrix,
+                    backend,
+                    consent_store,
+                    None,
+                    breaker=breaker,
+                ),
+            )
+
+        if error:
+            return None, currency, error
+
+        return rate, currency, None
+
+    try:
+        return await asyncio.gather(
+            *(get_rate(country_code) for country_code in country_codes)
+        )
+    finally:
+        lookup_executor.shutdown()
+        conversion_executor.shutdown()
+        if owns_pool:
+            pool.close()
+
+
+def _convert_currency(
+    driver: webdriver,
+    currency: str,
+    pool: Optional[DriverPool],
+    rate_cache: Optional[RateCache],
+    rate_matrix: Optional[RateMatrix],
+    backend: Optional[RateBackend],
+    consent_store: Optional[ConsentStore],
+    timer: Optional[PhaseTimer],
+    quote_currency: str = DEFAULT_QUOTE_CURRENCY,
+    breaker: Optional[CircuitBreaker] = None,
+) -> Tuple[Optional[float], Optional[Error]]:
+    """
+    Convert a currency to the quote currency, using the rate cache when possible.
+    Concurrent conversions of the same pair with the same backend and rate matrix wait for a single one.
+    A caller that waited gets the result without its timer recording any phase.
+
+    Args:
+        driver (webdriver): The Selenium WebDriver instance.
+        currency (str): The currency code to convert from.
+        pool (Optional[DriverPool]): A pool of warm WebDriver instances to borrow from.
+        rate_cache (Optional[RateCache]): A cache of recently scraped rates.
+        rate_matrix (Optional[RateMatrix]): Anchor rates to derive conversions from.
+        backend (Optional[RateBackend]): A faster source of rates tried before the OANDA page.
+        consent_store (Optional[ConsentStore]): Persists the cookie consent between browsers and runs.
+        timer (Optional[PhaseTimer]): Records how long each phase of the conversion takes.
+        quote_currency (str): The currency code to convert to.
+        breaker (Optional[CircuitBreaker]): Fails conversions fast while the OANDA page keeps failing.
+
+    Returns:
+        Tuple[Optional[float], Optional[Error]]: A tuple containing the exchange rate (or None if not found)
+                                                 and an error message (or None if no error occurs).
+    """
+    if rate_cache is not None:
+        rate = rate_cache.get(currency, quote_currency)
+        if rate is not None:
+            return rate, None
+
+    def convert() -> Tuple[Optional[float], Optional[Error]]:
+        rate, error = CurrencyConverter(
+            driver,
+            pool=pool,
+            rate_matrix=rate_matrix,
+            backend=backend,
+            consent_store=consent_store,
+            timer=timer,
+            breaker=breaker,
+        ).convert_currency(currency, quote_currency)
+
+        if not error and rate_cache is not None:
+            rate_cache.set(currency, quote_currency, rate)
+
+        return rate, error
+
+    # Countries sharing a currency are converted once when checked at the same time
+    return conversions.do(
+        (currency.upper(), quote_currency.upper(), backend, rate_matrix), convert
+    )
+
+
+def _lookup_key(country_info: CountryInfo, country_code: str) -> Hashable:
+    """
+    Identify a country lookup for coalescing. CountryInfo instances that answer it the same way share
+    the key, e.g. the new one of every plain get_currency_rate call. Instances with another API,
+    registry or cache, or with their own prefetched currencies, do not.
+
+    Args:
+        country_info (CountryInfo): The CountryInfo the lookup runs on.
+        country_code (str): The ISO 3166-1 alpha-2 country code.
+
+    Returns:
+        Hashable: The key of the lookup.
+    """
+    return (
+        country_info.BASE_URL,
+        country_info.registry,
+        country_info.cache,
+        country_info if country_info.is_prefetched else None,
+        country_code.upper(),
+    )
+
+
 def check_threshold(rate: float, threshold: int) -> bool:
     """
     Check if the exchange rate is above a certain threshold.
@@ -48,3 +536,57 @@ def check_threshold(rate: float, threshold: int) -> bool:
         bool: True if the rate is above the threshold, False otherwise.
     """
     return rate > threshold
+
+
+def check_thresholds(
+    rate_table: Sequence[RateRow], threshold: Union[int, Dict[str, int]]
+) -> List[Tuple[str, str, Optional[bool]]]:
+    """
+    Check every rate of a rate table against a threshold.
+
+    Args:
+        rate_table (Sequence[RateRow]): The rows returned by get_currency_rate_table.
+        threshold (Union[int, Dict[str, int]]): The threshold value, or a threshold per quote currency.
+
+    Returns:
+        List[Tuple[str, str, Optional[bool]]]: The currency, quote currency and whether the rate is above
+                                               the threshold, for every row. None if the rate is missing
+                                               or no threshold is set for the quote currency.
+    """
+    results = []
+    for currency, quote_currency, rate, error in rate_table:
+        quote_threshold = (
+            threshold.get(quote_currency) if isinstance(threshold, dict) else threshold
+        )
+
+        if error or rate is None or quote_threshold is None:
+            results.append((currency, quote_currency, None))
+        else:
+            results.append(
+                (currency, quote_currency, check_threshold(rate, quote_threshold))
+            )
+
+    return results
+
+
+def check_cross_threshold(
+    rate_matrix: RateMatrix, from_currency: str, to_currency: str, threshold: int
+) -> Optional[bool]:
+    """
+    Check if a cross rate derived from the rate matrix is above a certain threshold.
+
+    Args:
+        rate_matrix (RateMatrix): The anchor rates to derive the cross rate from.
+        from_currency (str): The currency code to convert from.
+        to_currency (str): The currency code to convert to.
+        threshold (float): The threshold value.
+
+    Returns:
+        Optional[bool]: True if the rate is above the threshold, False otherwise.
+                        Returns None if the cross rate cannot be derived.
+    """
+    rate = rate_matrix.cross_rate(from_currency, to_currency)
+    if rate is None:
+        return None
+
+    return check_threshold(rate, threshold)
@@ -0,0 +1,108 @@
+from functools import partial
+from typing import Callable, Union
+
+from selenium import webdriver
+
+# Requests matching these patterns are never sent. Consent (OneTrust) scripts are kept,
+# the cookie banner is needed to accept cookies.
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*.mp4",
+    "*.webm",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*facebook.net*",
+    "*hotjar.com*",
+    "*bing.com*",
+    "*linkedin.com*",
+    "*twitter.com*",
+    "*adroll.com*",
+    "*quantserve.com*",
+    "*demdex.net*",
+]
+
+
+def lean_chrome(capture_network: bool = False) -> webdriver.Chrome:
+    """
+    Start a headless Chrome tuned for scraping: images, media, fonts and trackers are not
+    downloaded, extensions are disabled and pages are handed over once the DOM is ready.
+
+    Args:
+        capture_network (bool): Record network events in the performance log, which the
+                                NetworkRateBackend reads the rate endpoint from.
+
+    Returns:
+        webdriver.Chrome: The WebDriver instance.
+    """
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1280,900")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    # Keep background tabs rendering at full speed for CurrencyConverter(tabs=...)
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-backgrounding-occluded-windows")
+    options.add_experimental_option(
+        "prefs",
+        {
+            "profile.managed_default_content_settings.images": 2,
+            "profile.default_content_setting_values.notifications": 2,
+        },
+    )
+    options.page_load_strategy = "eager"
+    if capture_network:
+        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+    driver = webdriver.Chrome(options=options)
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    return driver
+
+
+DRIVER_FACTORIES = {
+    "chrome": webdriver.Chrome,
+    "lean": lean_chrome,
+    "lean-network": partial(lean_chrome, capture_network=True),
+}
+
+
+def get_driver_factory(
+    driver: Union[str, Callable[[], webdriver.Chrome]],
+) -> Callable[[], webdriver.Chrome]:
+    """
+    Resolve a driver factory by name.
+
+    Args:
+        driver (Union[str, Callable[[], webdriver.Chrome]]): A name from DRIVER_FACTORIES, or a factory
+                                                             which is returned unchanged.
+
+    Returns:
+        Callable[[], webdriver.Chrome]: The driver factory.
+
+    Raises:
+        ValueError: If the name is unknown.
+    """
+    if not isinstance(driver, str):
+        return driver
+
+    try:
+        return DRIVER_FACTORIES[driver]
+    except KeyError:
+        raise ValueError(
+            f"Unknown driver {driver!r}, expected one of {', '.join(DRIVER_FACTORIES)}."
+        ) from None
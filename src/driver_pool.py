@@ -0,0 +1,177 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Optional, Union
+
+from selenium import webdriver
+
+from src.driver_factory import get_driver_factory
+
+
+class DriverPool:
+    """
+    A bounded pool of reusable Selenium WebDriver instances.
+    Browsers are created lazily, handed out with checkout/checkin and recycled
+    after a fixed number of uses or when they no longer respond.
+    """
+
+    def __init__(
+        self,
+        driver: Union[str, Callable[[], webdriver.Chrome]],
+        size: int = 2,
+        max_uses: int = 50,
+        checkout_timeout: Optional[float] = None,
+    ):
+        """
+        Initialize the DriverPool.
+
+        Args:
+            driver (Union[str, Callable[[], webdriver.Chrome]]): The factory used to create new WebDriver instances,
+                                                                 or a driver name such as "lean".
+            size (int): The maximum number of WebDriver instances alive at the same time.
+            max_uses (int): The number of checkouts after which a WebDriver instance is recycled.
+            checkout_timeout (Optional[float]): Seconds to wait for a free WebDriver instance.
+                                                Waits indefinitely when None.
+        """
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+
+        self._driver_factory = get_driver_factory(driver)
+        self.size = size
+        self.max_uses = max_uses
+        self.checkout_timeout = checkout_timeout
+        self._idle = queue.LifoQueue()  # LIFO hands out the most recently used browser
+        self._slots = threading.BoundedSemaphore(size)
+        self._uses: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def checkout(self) -> webdriver.Chrome:
+        """
+        Borrow a healthy WebDriver instance from the pool, creating one if none is idle.
+
+        Returns:
+            webdriver.Chrome: The borrowed WebDriver instance.
+
+        Raises:
+            RuntimeError: If the pool has been closed.
+            TimeoutError: If no WebDriver instance becomes available within the checkout timeout.
+        """
+        if self._closed:
+            raise RuntimeError("Driver pool is closed.")
+
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError("No WebDriver available in the pool.")
+
+        try:
+            while True:
+                try:
+                    driver = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._create()
+
+                if self._is_healthy(driver):
+                    return driver
+
+                self._discard(driver)
+
+        except Exception:
+            self._slots.release()
+            raise
+
+    def checkin(self, driver: webdriver.Chrome, healthy: bool = True):
+        """
+        Return a borrowed WebDriver instance to the pool.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance to return.
+            healthy (bool): False if the caller knows the browser is broken and must be recycled.
+        """
+        try:
+            with self._lock:
+                uses = self._uses.get(id(driver), 0) + 1
+                self._uses[id(driver)] = uses
+
+            if self._closed or not healthy or uses >= self.max_uses:
+                self._discard(driver)
+            else:
+                self._idle.put(driver)
+
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def borrow(self) -> Iterator[webdriver.Chrome]:
+        """
+        Context manager that checks out a WebDriver instance and checks it back in on exit.
+
+        Yields:
+            webdriver.Chrome: The borrowed WebDriver instance.
+        """
+        driver = self.checkout()
+        try:
+            yield driver
+        finally:
+            self.checkin(driver)
+
+    def close(self):
+        """
+        Close the pool and quit every idle WebDriver instance.
+        Instances still checked out are quit when they are checked back in.
+        """
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def _create(self) -> webdriver.Chrome:
+        """
+        Create a new WebDriver instance.
+
+        Returns:
+            webdriver.Chrome: The new WebDriver instance.
+        """
+        driver = self._driver_factory()
+        with self._lock:
+            self._uses[id(driver)] = 0
+        return driver
+
+    def _discard(self, driver: webdriver.Chrome):
+        """
+        Quit a WebDriver instance and forget its usage count.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance to discard.
+        """
+        with self._lock:
+            self._uses.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(driver: webdriver.Chrome) -> bool:
+        """
+        Check whether a WebDriver instance still responds.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance to check.
+
+        Returns:
+            bool: True if the browser session is alive, False otherwise.
+        """
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def __enter__(self) -> "DriverPool":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
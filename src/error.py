@@ -8,3 +8,15 @@ class Error:
 
     def __str__(self):
         return f"Error: {self.message}"
+
+
+class TransientError(Error):
+    """
+    An error that may not happen again when retried, e.g. a slow page or a stale element.
+    """
+
+
+class CircuitOpenError(Error):
+    """
+    An error returned without trying, because too many recent attempts failed.
+    """
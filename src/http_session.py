@@ -0,0 +1,61 @@
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+_default_session: Optional[requests.Session] = None
+_default_session_lock = threading.Lock()
+
+
+def create_session(
+    retries: int = 3,
+    backoff_factor: float = 0.5,
+    pool_size: int = 10,
+) -> requests.Session:
+    """
+    Create a connection-pooled HTTP session that retries idempotent requests.
+
+    Args:
+        retries (int): The number of retries on connection errors and on 429/5xx responses.
+        backoff_factor (float): The exponential backoff factor between retries, in seconds.
+        pool_size (int): The number of keep-alive connections kept per host.
+                         Should be at least the number of threads sharing the session.
+
+    Returns:
+        requests.Session: The configured session.
+    """
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_default_session() -> requests.Session:
+    """
+    Get the process-wide HTTP session, creating it on first use.
+
+    Returns:
+        requests.Session: The shared session.
+    """
+    global _default_session
+
+    with _default_session_lock:
+        if _default_session is None:
+            _default_session = create_session()
+        return _default_session
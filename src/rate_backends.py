@@ -0,0 +1,192 @@
+import json
+import threading
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import requests
+from selenium import webdriver
+
+from src.error import Error
+from src.http_session import get_default_session
+
+
+class RateBackend(ABC):
+    """
+    Interface of an alternative source of exchange rates for the CurrencyConverter.
+    The converter asks the backend first and falls back to automating the OANDA page
+    when the backend is not ready or fails.
+    """
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        Whether the backend can answer conversions.
+
+        Returns:
+            bool: True if convert can be called, False otherwise.
+        """
+        return True
+
+    def learn(self, driver: webdriver.Chrome):
+        """
+        Hook called with the WebDriver instance after a conversion on the OANDA page succeeded.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance that loaded the page.
+        """
+
+    @abstractmethod
+    def convert(
+        self, from_currency: str, to_currency: str
+    ) -> Tuple[Optional[float], Optional[Error]]:
+        """
+        Convert currency.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Tuple[Optional[float], Optional[Error]]: A tuple containing the converted amount (or None if not found)
+                                                     and an error message (or None if no error occurs).
+        """
+
+
+class NetworkRateBackend(RateBackend):
+    """
+    A backend that queries the JSON endpoint the OANDA page fetches its rates from.
+    The endpoint is captured once from Chrome's performance log after a conversion on the page,
+    then queried over HTTP with the base and quote currencies of each pair.
+    The WebDriver instance must log performance events ("goog:loggingPrefs"), as the lean driver does.
+    """
+
+    RATE_REQUEST_PATH = "/cc-api/currencies"
+    BASE_PARAM = "base"
+    QUOTE_PARAM = "quote"
+    CONNECT_TIMEOUT_SECONDS = 3.05
+    READ_TIMEOUT_SECONDS = 10
+
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Initialize the NetworkRateBackend.
+
+        Args:
+            session (Optional[requests.Session]): The connection-pooled session to send requests with.
+                                                  Defaults to the process-wide session.
+        """
+        self.session = session or get_default_session()
+        self.endpoint: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_ready(self) -> bool:
+        """
+        Whether the rate endpoint has been captured.
+
+        Returns:
+            bool: True if convert can be called, False otherwise.
+        """
+        return self.endpoint is not None
+
+    def learn(self, driver: webdriver.Chrome):
+        """
+        Capture the rate endpoint from the WebDriver instance's performance log.
+
+        Args:
+            driver (webdriver.Chrome): The WebDriver instance that loaded the page.
+        """
+        if self.is_ready:
+            return
+
+        try:
+            entries = driver.get_log("performance")
+        except Exception:
+            return
+
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+                if message.get("method") != "Network.requestWillBeSent":
+                    continue
+                url = message["params"]["request"]["url"]
+            except (KeyError, TypeError, ValueError):
+                continue
+
+            query = dict(parse_qsl(urlsplit(url).query))
+            if self.RATE_REQUEST_PATH in url and self.BASE_PARAM in query:
+                with self._lock:
+                    self.endpoint = url
+
+    def convert(
+        self, from_currency: str, to_currency: str
+    ) -> Tuple[Optional[float], Optional[Error]]:
+        """
+        Convert currency by querying the captured rate endpoint.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Tuple[Optional[float], Optional[Error]]: A tuple containing the converted amount (or None if not found)
+                                                     and an error message (or None if no error occurs).
+        """
+        if not self.is_ready:
+            return None, Error("Rate endpoint has not been captured.")
+
+        try:
+            response = self.session.get(
+                self._build_url(from_currency, to_currency),
+                timeout=(self.CONNECT_TIMEOUT_SECONDS, self.READ_TIMEOUT_SECONDS),
+            )
+        except requests.RequestException:
+            return None, Error("Failed to fetch the rate.")
+
+        return self.extract_rate(response)
+
+    @staticmethod
+    def extract_rate(
+        rate_response: requests.Response,
+    ) -> Tuple[Optional[float], Optional[Error]]:
+        """
+        Extract the rate from a rate endpoint response, as the midpoint of the latest average bid and ask.
+
+        Args:
+            rate_response (requests.Response): The response object of the rate endpoint.
+
+        Returns:
+            Tuple[Optional[float], Optional[Error]]: A tuple containing the rate (or None if not found)
+                                                     and an error message (or None if no error occurs).
+        """
+        try:
+            if rate_response.status_code != 200:
+                return None, Error(
+                    f"Rate endpoint returned {rate_response.status_code}."
+                )
+
+            latest_rate = rate_response.json()["response"][-1]
+            bid = float(latest_rate["average_bid"])
+            ask = float(latest_rate["average_ask"])
+
+            return (bid + ask) / 2, None
+
+        except (KeyError, IndexError, TypeError, ValueError):
+            return None, Error("Invalid response format.")
+
+    def _build_url(self, from_currency: str, to_currency: str) -> str:
+        """
+        Build the rate endpoint URL of a currency pair from the captured URL.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            str: The URL to query.
+        """
+        scheme, netloc, path, query, fragment = urlsplit(self.endpoint)
+        params = dict(parse_qsl(query))
+        params[self.BASE_PARAM] = from_currency
+        params[self.QUOTE_PARAM] = to_currency
+        return urlunsplit((scheme, netloc, path, urlencode(params), fragment))
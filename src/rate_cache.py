@@ -0,0 +1,161 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from src.cache_utils import read_json, write_json_atomic
+
+
+class RateCache:
+    """
+    A least-recently-used cache of exchange rates keyed by (base, quote) currency codes.
+    Rates are served while they are younger than the freshness window and can optionally
+    be persisted to a JSON file, so they are shared between runs and jobs.
+    """
+
+    FILE_NAME = "rates.json"
+
+    def __init__(
+        self,
+        max_age_seconds: float = 300,
+        max_entries: int = 1024,
+        cache_dir: Optional[str] = None,
+    ):
+        """
+        Initialize the RateCache.
+
+        Args:
+            max_age_seconds (float): How long a scraped rate may be served, in seconds.
+            max_entries (int): The number of pairs kept before the least recently used one is evicted.
+            cache_dir (Optional[str]): The directory to persist rates in. Rates are kept in memory only when None.
+        """
+        self.max_age_seconds = max_age_seconds
+        self.max_entries = max_entries
+        self.path = os.path.join(cache_dir, self.FILE_NAME) if cache_dir else None
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, float]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        if self.path:
+            self._load()
+
+    def get(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """
+        Get a fresh cached rate.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Optional[float]: The cached rate, or None if there is no fresh rate.
+        """
+        key = (from_currency.upper(), to_currency.upper())
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None or time.time() - entry[0] > self.max_age_seconds:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, from_currency: str, to_currency: str, rate: float):
+        """
+        Store a scraped rate.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+            rate (float): The exchange rate.
+        """
+        key = (from_currency.upper(), to_currency.upper())
+        with self._lock:
+            self._entries[key] = (time.time(), rate)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+            if self.path:
+                self._save()
+
+    def clear(self):
+        """
+        Drop every cached rate.
+        """
+        with self._lock:
+            self._entries.clear()
+
+            if self.path:
+                self._save()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Get the cache hit and miss counters.
+
+        Returns:
+            Dict[str, int]: The number of hits, misses and cached pairs.
+        """
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+    def _load(self):
+        """
+        Load the persisted rates, oldest first, dropping the ones that are no longer fresh.
+        """
+        now = time.time()
+        data = read_json(self.path, [])
+        # A file of the wrong shape, e.g. edited by hand, loads as an empty cache
+        rows = sorted(
+            (
+                row
+                for row in (data if isinstance(data, list) else [])
+                if _is_valid_row(row)
+            ),
+            key=lambda row: row[2],
+        )
+        for from_currency, to_currency, stored_at, rate in rows:
+            if now - stored_at <= self.max_age_seconds:
+                self._entries[(from_currency, to_currency)] = (stored_at, rate)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _save(self):
+        """
+        Write the rates to disk. Must be called with the lock held.
+        """
+        write_json_atomic(
+            self.path,
+            [
+                [from_currency, to_currency, stored_at, rate]
+                for (from_currency, to_currency), (
+                    stored_at,
+                    rate,
+                ) in self._entries.items()
+            ],
+        )
+
+
+def _is_valid_row(row: Any) -> bool:
+    """
+    Check that a cache file row is a (from currency, to currency, stored at, rate) list.
+
+    Args:
+        row (Any): The decoded row.
+
+    Returns:
+        bool: True if the row can be loaded, False otherwise.
+    """
+    return (
+        isinstance(row, list)
+        and len(row) == 4
+        and all(isinstance(currency, str) for currency in row[:2])
+        and all(isinstance(number, (int, float)) for number in row[2:])
+    )
@@ -0,0 +1,285 @@
+import mmap
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import BinaryIO, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows, where only threads are serialized
+    fcntl = None
+
+RECORD_SIZE = 2 * array("d").itemsize  # timestamp, rate
+
+
+class RateHistory:
+    """
+    An append-only history of the exchange rates seen for every currency pair.
+    Each pair has its own binary file of (timestamp, rate) records packed as native doubles,
+    16 bytes per sample, read through a memory map without parsing.
+    Records are appended in time order, so time ranges are found by bisection. Appends are serialized
+    between threads, and between processes where file locks are available.
+    """
+
+    FILE_SUFFIX = ".rates"
+
+    def __init__(self, directory: str):
+        """
+        Initialize the RateHistory.
+
+        Args:
+            directory (str): The directory the history files are kept in, created if missing.
+        """
+        self.directory = directory
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def append(
+        self,
+        from_currency: str,
+        to_currency: str,
+        rate: float,
+        timestamp: Optional[float] = None,
+    ):
+        """
+        Record a rate.
+
+        Args:
+            from_currency (str): The currency code converted from.
+            to_currency (str): The currency code converted to.
+            rate (float): The exchange rate.
+            timestamp (Optional[float]): When the rate was seen, in seconds since the epoch. Defaults to now,
+                                         or the time of the last record if the clock is behind it.
+
+        Raises:
+            ValueError: If the timestamp is older than the last record of the pair.
+        """
+        with self._lock:
+            with open(self._path(from_currency, to_currency), "a+b") as file:
+                if fcntl is not None:
+                    # Released when the file is closed
+                    fcntl.flock(file, fcntl.LOCK_EX)
+
+                size = file.seek(0, os.SEEK_END)
+                end = size - size % RECORD_SIZE
+                if end < size:
+                    # A record cut short by a crash would shift every record after it
+                    file.truncate(end)
+
+                now = time.time() if timestamp is None else timestamp
+                previous = _read_records(file, max(end - RECORD_SIZE, 0), end)
+                if previous and now < previous[0]:
+                    if timestamp is not None:
+                        raise ValueError(
+                            "The timestamp is older than the last record of the pair."
+                        )
+                    now = previous[0]
+
+                array("d", [now, rate]).tofile(file)
+
+    def series(
+        self, from_currency: str, to_currency: str, since: Optional[float] = None
+    ) -> Tuple[array, array]:
+        """
+        Read the recorded timestamps and rates of a pair as two columns.
+
+        Args:
+            from_currency (str): The currency code converted from.
+            to_currency (str): The currency code converted to.
+            since (Optional[float]): Only read the samples recorded at or after this time.
+
+        Returns:
+            Tuple[array, array]: The timestamps and the rates, oldest first. Empty if the pair has no history.
+        """
+        path = self._path(from_currency, to_currency)
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            return array("d"), array("d")
+
+        # A record cut short by a crash is ignored
+        size -= size % RECORD_SIZE
+        if size == 0:
+            return array("d"), array("d")
+
+        with open(path, "rb") as file:
+            with mmap.mmap(file.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view, view.cast("d") as values:
+                    with values[0::2] as column:
+                        start = 0 if since is None else bisect_left(column, since)
+                        timestamps = array("d", column[start:])
+                    rates = array("d", values[2 * start + 1 :: 2])
+
+        return timestamps, rates
+
+    def last(
+        self, from_currency: str, to_currency: str, count: int
+    ) -> List[Tuple[float, float]]:
+        """
+        Get the most recent samples of a pair.
+
+        Args:
+            from_currency (str): The currency code converted from.
+            to_currency (str): The currency code converted to.
+            count (int): The number of samples.
+
+        Returns:
+            List[Tuple[float, float]]: Up to count (timestamp, rate) samples, oldest first.
+        """
+        if count <= 0:
+            return []
+
+        try:
+            file = open(self._path(from_currency, to_currency), "rb")
+        except OSError:
+            return []
+
+        with file:
+            size = file.seek(0, os.SEEK_END)
+            # A record cut short by a crash is ignored
+            end = size - size % RECORD_SIZE
+            records = _read_records(file, max(end - count * RECORD_SIZE, 0), end)
+
+        return list(zip(records[0::2], records[1::2]))
+
+    def rolling_extremes(
+        self,
+        from_currency: str,
+        to_currency: str,
+        window: int,
+        since: Optional[float] = None,
+    ) -> List[Tuple[float, float, float]]:
+        """
+        Get the lowest and highest rate of a pair over a sliding window of samples.
+
+        Args:
+            from_currency (str): The currency code converted from.
+            to_currency (str): The currency code converted to.
+            window (int): The number of samples in the window.
+            since (Optional[float]): Only use the samples recorded at or after this time.
+
+        Returns:
+            List[Tuple[float, float, float]]: The (timestamp, min, max) of the window ending at every sample,
+                                              starting with the first full window.
+        """
+        timestamps, rates = self.series(from_currency, to_currency, since)
+        lows, highs = rolling_extremes(rates, window)
+        return list(zip(timestamps[window - 1 :], lows, highs))
+
+    def first_crossing(
+        self,
+        from_currency: str,
+        to_currency: str,
+        threshold: float,
+        since: Optional[float] = None,
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Find the first sample where a pair's rate crossed a threshold, in either direction.
+
+        Args:
+            from_currency (str): The currency code converted from.
+            to_currency (str): The currency code converted to.
+            threshold (float): The threshold value, as used by currency_utils.check_threshold.
+            since (Optional[float]): Only use the samples recorded at or after this time.
+
+        Returns:
+            Optional[Tuple[float, float]]: The (timestamp, rate) of the first sample above the threshold after one
+                                           that was not, or the other way round. None if the rate never crossed it.
+        """
+        timestamps, rates = self.series(from_currency, to_currency, since)
+        index = first_crossing(rates, threshold)
+        return None if index is None else (timestamps[index], rates[index])
+
+    def _path(self, from_currency: str, to_currency: str) -> str:
+        """
+        Get the history file of a pair.
+
+        Args:
+            from_currency (str): The currency code converted from.
+            to_currency (str): The currency code converted to.
+
+        Returns:
+            str: The file path.
+        """
+        return os.path.join(
+            self.directory,
+            f"{from_currency.upper()}_{to_currency.upper()}{self.FILE_SUFFIX}",
+        )
+
+
+def _read_records(file: BinaryIO, start: int, end: int) -> array:
+    """
+    Read whole records from a history file without reading the rest of it.
+
+    Args:
+        file (BinaryIO): The history file.
+        start (int): The offset of the first record.
+        end (int): The offset after the last record.
+
+    Returns:
+        array: The timestamps and rates of the records, interleaved.
+    """
+    records = array("d")
+    file.seek(start)
+    records.fromfile(file, (end - start) // records.itemsize)
+    return records
+
+
+def rolling_extremes(rates: array, window: int) -> Tuple[array, array]:
+    """
+    Compute the minimum and maximum of every window of samples in one pass, using monotonic queues.
+
+    Args:
+        rates (array): The rates, oldest first.
+        window (int): The number of samples in the window.
+
+    Returns:
+        Tuple[array, array]: The minimum and maximum of the window ending at every sample,
+                             starting with the first full window.
+    """
+    if window < 1:
+        raise ValueError("The window must hold at least one sample.")
+
+    lows, highs = array("d"), array("d")
+    low_indexes, high_indexes = deque(), deque()
+
+    for index, rate in enumerate(rates):
+        while low_indexes and rates[low_indexes[-1]] >= rate:
+            low_indexes.pop()
+        while high_indexes and rates[high_indexes[-1]] <= rate:
+            high_indexes.pop()
+        low_indexes.append(index)
+        high_indexes.append(index)
+
+        if low_indexes[0] <= index - window:
+            low_indexes.popleft()
+        if high_indexes[0] <= index - window:
+            high_indexes.popleft()
+
+        if index >= window - 1:
+            lows.append(rates[low_indexes[0]])
+            highs.append(rates[high_indexes[0]])
+
+    return lows, highs
+
+
+def first_crossing(rates: array, threshold: float) -> Optional[int]:
+    """
+    Find the first sample on the other side of a threshold than the sample before it.
+
+    Args:
+        rates (array): The rates, oldest first.
+        threshold (float): The threshold value. A rate crosses it when it is above it and the previous
+                           rate was not, or the other way round.
+
+    Returns:
+        Optional[int]: The index of the sample, or None if the rates never crossed the threshold.
+    """
+    above = [rate > threshold for rate in rates]
+    return next(
+        (index for index in range(1, len(above)) if above[index] != above[index - 1]),
+        None,
+    )
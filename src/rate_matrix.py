@@ -0,0 +1,192 @@
+import math
+import threading
+import time
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+
+class RateMatrix:
+    """
+    Exchange rates of many currencies against a single anchor currency, stored as one compact
+    array of doubles. Any cross rate is derived by triangulation through the anchor, so only
+    the anchor pairs ever need to be scraped.
+    Anchor rates older than the freshness window are treated as unknown, so they are scraped again.
+    """
+
+    def __init__(self, anchor: str = "EUR", max_age_seconds: Optional[float] = 300):
+        """
+        Initialize the RateMatrix.
+
+        Args:
+            anchor (str): The currency code every stored rate is quoted in.
+            max_age_seconds (Optional[float]): How long an anchor rate may be used, in seconds. None keeps them forever.
+        """
+        self.anchor = anchor.upper()
+        self.max_age_seconds = max_age_seconds
+        self._positions: Dict[str, int] = {self.anchor: 0}
+        self._anchor_rates = array("d", [1.0])
+        self._stored_at = array("d", [math.inf])  # The anchor itself never expires
+        self._lock = threading.Lock()
+
+    def set_anchor_rate(self, currency: str, rate: float):
+        """
+        Store the rate of a currency against the anchor.
+
+        Args:
+            currency (str): The currency code.
+            rate (float): The value of one unit of the currency in the anchor currency.
+
+        Raises:
+            ValueError: If the rate is not a positive number.
+        """
+        if not (rate > 0 and math.isfinite(rate)):
+            raise ValueError(f"Invalid anchor rate for {currency}: {rate}")
+
+        currency = currency.upper()
+        if currency == self.anchor:
+            return
+
+        with self._lock:
+            position = self._positions.get(currency)
+            if position is None:
+                self._positions[currency] = len(self._anchor_rates)
+                self._anchor_rates.append(rate)
+                self._stored_at.append(time.time())
+            else:
+                self._anchor_rates[position] = rate
+                self._stored_at[position] = time.time()
+
+    def has_anchor_rate(self, currency: str) -> bool:
+        """
+        Check whether a fresh rate of a currency against the anchor is known.
+
+        Args:
+            currency (str): The currency code.
+
+        Returns:
+            bool: True if the rate is known and fresh, False otherwise.
+        """
+        with self._lock:
+            return self._position(currency.upper(), time.time()) is not None
+
+    def missing_anchor_rates(self, pairs: Iterable[Tuple[str, str]]) -> List[str]:
+        """
+        List the currencies whose anchor rates are needed to derive the given pairs.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): The (from_currency, to_currency) pairs.
+
+        Returns:
+            List[str]: The currency codes with unknown or expired anchor rates, in first-seen order.
+        """
+        now = time.time()
+        missing: List[str] = []
+        seen: Set[str] = set()
+        with self._lock:
+            for pair in pairs:
+                for currency in pair:
+                    currency = currency.upper()
+                    if currency not in seen and self._position(currency, now) is None:
+                        missing.append(currency)
+                    seen.add(currency)
+        return missing
+
+    def cross_rate(self, from_currency: str, to_currency: str) -> Optional[float]:
+        """
+        Derive the rate between two currencies.
+
+        Args:
+            from_currency (str): The currency code to convert from.
+            to_currency (str): The currency code to convert to.
+
+        Returns:
+            Optional[float]: The cross rate, or None if either anchor rate is unknown or expired.
+        """
+        return self.cross_rates([(from_currency, to_currency)])[0]
+
+    def cross_rates(self, pairs: Iterable[Tuple[str, str]]) -> List[Optional[float]]:
+        """
+        Derive the rates of many currency pairs in one pass.
+
+        Args:
+            pairs (Iterable[Tuple[str, str]]): The (from_currency, to_currency) pairs.
+
+        Returns:
+            List[Optional[float]]: The cross rate of every pair, or None where an anchor rate is unknown or expired.
+        """
+        pairs = list(pairs)
+
+        with self._lock:
+            from_rates = self._lookup([from_currency for from_currency, _ in pairs])
+            to_rates = self._lookup([to_currency for _, to_currency in pairs])
+
+        return [
+            None
+            if math.isnan(from_rate) or math.isnan(to_rate)
+            else from_rate / to_rate
+            for from_rate, to_rate in zip(from_rates, to_rates)
+        ]
+
+    def to_matrix(self, currencies: Iterable[str]) -> List[array]:
+        """
+        Build the full cross rate matrix of the given currencies.
+
+        Args:
+            currencies (Iterable[str]): The currency codes, used for both rows and columns.
+
+        Returns:
+            List[array]: One row of doubles per currency, where row[i][j] converts currency i to currency j.
+                         Unknown and expired rates are NaN.
+        """
+        currencies = list(currencies)
+        with self._lock:
+            anchor_rates = self._lookup(currencies)
+
+        return [
+            array("d", (from_rate / to_rate for to_rate in anchor_rates))
+            for from_rate in anchor_rates
+        ]
+
+    def _lookup(self, currencies: List[str]) -> array:
+        """
+        Look up the anchor rates of several currencies. Must be called with the lock held.
+
+        Args:
+            currencies (List[str]): The currency codes.
+
+        Returns:
+            array: The anchor rate of every currency, NaN where it is unknown or expired.
+        """
+        now = time.time()
+        anchor_rates = self._anchor_rates
+        positions = (self._position(currency.upper(), now) for currency in currencies)
+        return array(
+            "d",
+            (
+                math.nan if position is None else anchor_rates[position]
+                for position in positions
+            ),
+        )
+
+    def _position(self, currency: str, now: float) -> Optional[int]:
+        """
+        Find where the fresh anchor rate of a currency is stored. Must be called with the lock held.
+
+        Args:
+            currency (str): The upper-cased currency code.
+            now (float): The current time, in seconds since the epoch.
+
+        Returns:
+            Optional[int]: The position in the rate array, or None if the rate is unknown or expired.
+        """
+        position = self._positions.get(currency)
+        if position is None:
+            return None
+
+        if (
+            self.max_age_seconds is not None
+            and now - self._stored_at[position] > self.max_age_seconds
+        ):
+            return None
+
+        return position
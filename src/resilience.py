@@ -0,0 +1,206 @@
+import random
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterator, Optional
+
+from selenium.common.exceptions import (
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+    StaleElementReferenceException,
+    TimeoutException,
+)
+
+
+class TransientFailure(Exception):
+    """
+    Raised by our own checks for failures worth retrying, e.g. a wrong autocomplete selection.
+    """
+
+
+TRANSIENT_EXCEPTIONS = (
+    TransientFailure,
+    TimeoutException,
+    StaleElementReferenceException,
+    ElementClickInterceptedException,
+    ElementNotInteractableException,
+    NoSuchElementException,
+)
+
+
+def is_transient(exception: BaseException) -> bool:
+    """
+    Check whether a failure is worth retrying, e.g. a slow page or a re-rendered element.
+
+    Args:
+        exception (BaseException): The exception raised by the failed attempt.
+
+    Returns:
+        bool: True if the same attempt may succeed when retried, False otherwise.
+    """
+    return isinstance(exception, TRANSIENT_EXCEPTIONS)
+
+
+class RetryPolicy:
+    """
+    How often and how long to back off before retrying a failed attempt.
+    Delays grow exponentially and are fully jittered, so workers failing together
+    do not retry together.
+    """
+
+    def __init__(
+        self,
+        attempts: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 5.0,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initialize the RetryPolicy.
+
+        Args:
+            attempts (int): The maximum number of attempts, including the first one.
+            base_delay (float): The upper bound of the first delay, in seconds. Doubled after every attempt.
+            max_delay (float): The upper bound of any delay, in seconds.
+            sleep (Callable[[float], None]): The function used to wait between attempts.
+        """
+        if attempts < 1:
+            raise ValueError("At least one attempt is required.")
+
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+    def delays(self) -> Iterator[float]:
+        """
+        Generate the delay before each retry.
+
+        Yields:
+            float: A random delay between 0 and the capped exponential backoff, in seconds.
+        """
+        for attempt in range(self.attempts - 1):
+            yield random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+    def backoff(self) -> Iterator[int]:
+        """
+        Iterate over the attempt numbers, sleeping before every attempt after the first.
+        Stop iterating once an attempt succeeds.
+
+        Yields:
+            int: The attempt number, starting at 1.
+        """
+        yield 1
+        for attempt, delay in enumerate(self.delays(), start=2):
+            self.sleep(delay)
+            yield attempt
+
+
+class CircuitBreaker:
+    """
+    Fails fast once the failure rate of recent attempts crosses a threshold.
+    After a cool-down a single trial attempt is let through: its success closes the
+    circuit again, its failure keeps it open for another cool-down.
+    Safe to share between threads.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        min_attempts: int = 5,
+        reset_seconds: float = 30,
+    ):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            failure_rate (float): The share of failed attempts in the window that opens the circuit.
+            window (int): The number of most recent attempts the failure rate is computed over.
+            min_attempts (int): The number of attempts needed before the circuit can open.
+            reset_seconds (float): The time the circuit stays open before a trial attempt is allowed.
+        """
+        self.failure_rate = failure_rate
+        self.min_attempts = min_attempts
+        self.reset_seconds = reset_seconds
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """
+        Get the state of the circuit.
+
+        Returns:
+            str: CLOSED, OPEN or HALF_OPEN.
+        """
+        with self._lock:
+            return self._current_state()
+
+    def allow(self) -> bool:
+        """
+        Check whether an attempt may be made. Must be followed by record_success or
+        record_failure when it returns True.
+
+        Returns:
+            bool: True if the attempt may go ahead, False if it should fail fast.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Record a successful attempt.
+        """
+        with self._lock:
+            if self._current_state() == self.HALF_OPEN:
+                self._outcomes.clear()
+                self._state = self.CLOSED
+            self._trial_running = False
+            self._outcomes.append(True)
+
+    def record_failure(self):
+        """
+        Record a failed attempt.
+        """
+        with self._lock:
+            state = self._current_state()
+            self._trial_running = False
+            self._outcomes.append(False)
+
+            failures = self._outcomes.count(False)
+            if state == self.HALF_OPEN or (
+                len(self._outcomes) >= self.min_attempts
+                and failures / len(self._outcomes) >= self.failure_rate
+            ):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def _current_state(self) -> str:
+        """
+        Get the state of the circuit, moving from OPEN to HALF_OPEN once the cool-down is over.
+        Must be called with the lock held.
+
+        Returns:
+            str: CLOSED, OPEN or HALF_OPEN.
+        """
+        if (
+            self._state == self.OPEN
+            and time.monotonic() - self._opened_at >= self.reset_seconds
+        ):
+            self._state = self.HALF_OPEN
+        return self._state
@@ -0,0 +1,136 @@
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+
+class PhaseTimer:
+    """
+    Records how long each phase of a conversion takes, and in which phase it failed.
+    Phases run more than once (e.g. base input in a batch) are summed.
+    """
+
+    def __init__(self, labels: Optional[Dict[str, str]] = None):
+        """
+        Initialize the PhaseTimer.
+
+        Args:
+            labels (Optional[Dict[str, str]]): Labels identifying the measured work, e.g. the country code.
+        """
+        self.labels = dict(labels or {})
+        self.spans: List[Tuple[str, float]] = []
+        self.failed_phase: Optional[str] = None
+        self.failure: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Context manager timing one phase. The first phase raising an exception is recorded as the failed one.
+
+        Args:
+            name (str): The phase name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            with self._lock:
+                if self.failed_phase is None:
+                    self.failed_phase = name
+                    self.failure = type(e).__name__
+            raise
+        finally:
+            with self._lock:
+                self.spans.append((name, time.perf_counter() - start))
+
+    def durations(self) -> Dict[str, float]:
+        """
+        Get the time spent in each phase.
+
+        Returns:
+            Dict[str, float]: The seconds spent per phase, in the order the phases first ran.
+        """
+        durations: Dict[str, float] = {}
+        with self._lock:
+            for name, seconds in self.spans:
+                durations[name] = durations.get(name, 0.0) + seconds
+        return durations
+
+    def to_dict(self) -> Dict:
+        """
+        Get the timings as a JSON serializable dictionary.
+
+        Returns:
+            Dict: The labels, the seconds per phase, the total seconds and the failure, if any.
+        """
+        durations = self.durations()
+        return {
+            **self.labels,
+            "phases": {name: round(seconds, 6) for name, seconds in durations.items()},
+            "total_seconds": round(sum(durations.values()), 6),
+            "failed_phase": self.failed_phase,
+            "failure": self.failure,
+        }
+
+    def to_json_line(self) -> str:
+        """
+        Get the timings as a single JSON line.
+
+        Returns:
+            str: The JSON encoded timings, without a trailing newline.
+        """
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+
+def write_json_lines(timers: Iterable[PhaseTimer], file: TextIO):
+    """
+    Write timings as JSON lines, one per timer.
+
+    Args:
+        timers (Iterable[PhaseTimer]): The timers to write.
+        file (TextIO): The file to write to.
+    """
+    for timer in timers:
+        file.write(timer.to_json_line() + "\n")
+
+
+def format_prometheus(
+    timers: Iterable[PhaseTimer], metric: str = "currency_conversion_phase_seconds"
+) -> str:
+    """
+    Format timings in the Prometheus text exposition format.
+
+    Args:
+        timers (Iterable[PhaseTimer]): The timers to format.
+        metric (str): The metric name.
+
+    Returns:
+        str: One sample per timer and phase, labelled with the timer's labels and the phase name.
+    """
+    lines = [
+        f"# HELP {metric} Seconds spent in each phase of a currency conversion.",
+        f"# TYPE {metric} gauge",
+    ]
+    for timer in timers:
+        for name, seconds in timer.durations().items():
+            labels = {**timer.labels, "phase": name}
+            label_text = ",".join(
+                f'{key}="{_escape_label(str(value))}"' for key, value in labels.items()
+            )
+            lines.append(f"{metric}{{{label_text}}} {seconds:.6f}")
+    return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: str) -> str:
+    """
+    Escape a Prometheus label value.
+
+    Args:
+        value (str): The label value.
+
+    Returns:
+        str: The escaped label value.
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
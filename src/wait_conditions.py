@@ -0,0 +1,56 @@
+from typing import Optional, Tuple, Union
+
+from selenium import webdriver
+from selenium.webdriver.remote.webelement import WebElement
+
+
+class RateSettled:
+    """
+    A WebDriverWait condition that is met once an input's value has changed from a previous
+    value and then stayed the same for a number of consecutive polls.
+    """
+
+    def __init__(
+        self,
+        locator: Tuple[str, str],
+        previous_value: Optional[str] = None,
+        stable_polls: int = 2,
+    ):
+        """
+        Initialize the RateSettled condition.
+
+        Args:
+            locator (Tuple[str, str]): The (By, value) locator of the input to observe.
+            previous_value (Optional[str]): The value shown before the change was triggered.
+            stable_polls (int): The number of consecutive polls the new value must be observed for.
+        """
+        self.locator = locator
+        self.previous_value = previous_value
+        self.stable_polls = stable_polls
+        self.last_value: Optional[str] = None
+        self._stable_count = 0
+
+    def __call__(self, driver: webdriver.Chrome) -> Union[WebElement, bool]:
+        """
+        Poll the observed input once.
+
+        Args:
+            driver (webdriver.Chrome): The Selenium WebDriver instance.
+
+        Returns:
+            Union[WebElement, bool]: The input element once its value has settled, False otherwise.
+        """
+        element = driver.find_element(*self.locator)
+        value = element.get_attribute("value")
+
+        if value and value == self.last_value:
+            self._stable_count += 1
+        else:
+            self._stable_count = 1 if value else 0
+
+        self.last_value = value or None
+
+        if value == self.previous_value or self._stable_count < self.stable_polls:
+            return False
+
+        return element
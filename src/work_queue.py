@@ -0,0 +1,571 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+try:
+    import redis
+except ImportError:  # Only needed for RedisWorkQueue
+    redis = None
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+ABANDONED = "abandoned"
+
+
+class Job(NamedTuple):
+    """
+    A unit of work leased from a queue.
+    """
+
+    key: str
+    row: int  # The position the item was queued at, starting at 0
+    item: Tuple[str, ...]
+    attempt: int
+
+
+def job_key(item: Tuple[str, ...]) -> str:
+    """
+    Get the idempotency key of an item: the same item is only queued and completed once.
+
+    Args:
+        item (Tuple[str, ...]): A country code, or a from and to currency code pair.
+
+    Returns:
+        str: The key, e.g. "GB" or "GBP/EUR".
+    """
+    return "/".join(code.upper() for code in item)
+
+
+def default_worker_id() -> str:
+    """
+    Get an identifier of this worker that is unique across hosts.
+
+    Returns:
+        str: The host name, process ID and a random suffix.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class WorkQueue(ABC):
+    """
+    Interface of a queue of conversion jobs shared by workers on any number of hosts.
+    A worker leases a job for a limited time and completes it with its result.
+    Jobs whose lease runs out, e.g. because their worker crashed, are handed out again
+    until they were leased max_attempts times.
+    Jobs and results are keyed by job_key, so queueing or completing a job twice is harmless.
+    """
+
+    @abstractmethod
+    def put(self, item: Tuple[str, ...]) -> bool:
+        """
+        Queue an item, unless it is already queued.
+
+        Args:
+            item (Tuple[str, ...]): A country code, or a from and to currency code pair.
+
+        Returns:
+            bool: True if the item was queued, False if its key already was.
+        """
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float = 300) -> Optional[Job]:
+        """
+        Take the oldest job that is pending or whose lease ran out.
+
+        Args:
+            worker_id (str): The worker taking the job, e.g. default_worker_id().
+            lease_seconds (float): The time the worker has to complete the job before it is handed out again.
+
+        Returns:
+            Optional[Job]: The job, or None if no job is available right now.
+        """
+
+    @abstractmethod
+    def complete(self, key: str, result: Dict) -> bool:
+        """
+        Store the result of a job. The first result stored for a key wins.
+
+        Args:
+            key (str): The key of the job.
+            result (Dict): The JSON serializable result.
+
+        Returns:
+            bool: True if the result was stored, False if the job already had one.
+        """
+
+    @abstractmethod
+    def release(self, key: str, worker_id: str) -> bool:
+        """
+        Hand a leased job back without a result, e.g. when the worker cannot work on it right now.
+        The lease does not count as an attempt.
+
+        Args:
+            key (str): The key of the job.
+            worker_id (str): The worker holding the lease.
+
+        Returns:
+            bool: True if the job is pending again, False if the worker no longer held its lease.
+        """
+
+    @abstractmethod
+    def results(self) -> Iterator[Dict]:
+        """
+        Iterate over the stored results in the order their items were queued.
+
+        Yields:
+            Dict: The result of every completed job.
+        """
+
+    @abstractmethod
+    def counts(self) -> Dict[str, int]:
+        """
+        Count the jobs by state.
+
+        Returns:
+            Dict[str, int]: The number of pending, leased, done and abandoned jobs.
+        """
+
+    def close(self):
+        """
+        Release the connection to the queue.
+        """
+
+
+class SqliteWorkQueue(WorkQueue):
+    """
+    A WorkQueue in a SQLite database file, for workers on one host or a test setup.
+    Every operation runs in its own transaction, so separate processes can share the file.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            row INTEGER PRIMARY KEY AUTOINCREMENT,
+            key TEXT NOT NULL UNIQUE,
+            item TEXT NOT NULL,
+            state TEXT NOT NULL,
+            worker_id TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT
+        )
+    """
+
+    def __init__(self, path: str, max_attempts: int = 3):
+        """
+        Initialize the SqliteWorkQueue.
+
+        Args:
+            path (str): The database file, created if missing.
+            max_attempts (int): The number of leases a job gets before it is abandoned.
+        """
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Transactions are started explicitly, see _transaction
+        self._connection = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(self.SCHEMA)
+
+    def put(self, item: Tuple[str, ...]) -> bool:
+        """
+        Queue an item in the jobs table, unless its key is already there.
+
+        Args:
+            item (Tuple[str, ...]): A country code, or a from and to currency code pair.
+
+        Returns:
+            bool: True if the item was queued, False if its key already was.
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO jobs (key, item, state) VALUES (?, ?, ?)",
+                (job_key(item), json.dumps(list(item)), PENDING),
+            )
+            return cursor.rowcount == 1
+
+    def lease(self, worker_id: str, lease_seconds: float = 300) -> Optional[Job]:
+        """
+        Take the oldest job that is pending or whose lease ran out, abandoning the ones out of attempts.
+
+        Args:
+            worker_id (str): The worker taking the job, e.g. default_worker_id().
+            lease_seconds (float): The time the worker has to complete the job before it is handed out again.
+
+        Returns:
+            Optional[Job]: The job, or None if no job is available right now.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET state = ? WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (ABANDONED, LEASED, now, self.max_attempts),
+            )
+            found = connection.execute(
+                "SELECT row, key, item, attempts FROM jobs "
+                "WHERE state = ? OR (state = ? AND lease_expires < ?) "
+                "ORDER BY row LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if found is None:
+                return None
+
+            row, key, item, attempts = found
+            connection.execute(
+                "UPDATE jobs SET state = ?, worker_id = ?, lease_expires = ?, attempts = ? "
+                "WHERE row = ?",
+                (LEASED, worker_id, now + lease_seconds, attempts + 1, row),
+            )
+            return Job(key, row - 1, tuple(json.loads(item)), attempts + 1)
+
+    def complete(self, key: str, result: Dict) -> bool:
+        """
+        Store the result of a job, unless it already has one.
+
+        Args:
+            key (str): The key of the job.
+            result (Dict): The JSON serializable result.
+
+        Returns:
+            bool: True if the result was stored, False if the job already had one.
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, lease_expires = NULL, result = ? "
+                "WHERE key = ? AND state != ?",
+                (DONE, json.dumps(result, separators=(",", ":")), key, DONE),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key: str, worker_id: str) -> bool:
+        """
+        Hand a leased job back without a result. The lease does not count as an attempt.
+
+        Args:
+            key (str): The key of the job.
+            worker_id (str): The worker holding the lease.
+
+        Returns:
+            bool: True if the job is pending again, False if the worker no longer held its lease.
+        """
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET state = ?, worker_id = NULL, lease_expires = NULL, "
+                "attempts = attempts - 1 WHERE key = ? AND state = ? AND worker_id = ?",
+                (PENDING, key, LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+
+    def results(self) -> Iterator[Dict]:
+        """
+        Iterate over the stored results in the order their items were queued.
+
+        Yields:
+            Dict: The result of every completed job.
+        """
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT result FROM jobs WHERE state = ? ORDER BY row", (DONE,)
+            ).fetchall()
+
+        for (result,) in rows:
+            yield json.loads(result)
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Count the jobs by state. Expired leases count as pending, or abandoned when out of attempts.
+
+        Returns:
+            Dict[str, int]: The number of pending, leased, done and abandoned jobs.
+        """
+        now = time.time()
+        counts = dict.fromkeys((PENDING, LEASED, DONE, ABANDONED), 0)
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT CASE "
+                "WHEN state = ? AND lease_expires < ? AND attempts >= ? THEN ? "
+                "WHEN state = ? AND lease_expires < ? THEN ? "
+                "ELSE state END, COUNT(*) FROM jobs GROUP BY 1",
+                (LEASED, now, self.max_attempts, ABANDONED, LEASED, now, PENDING),
+            ).fetchall()
+
+        counts.update(rows)
+        return counts
+
+    def close(self):
+        """
+        Close the database connection.
+        """
+        with self._lock:
+            self._connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Run a block in a write transaction, serialized with the other threads and processes using the file.
+
+        Yields:
+            sqlite3.Connection: The connection to run the statements on.
+        """
+        with self._lock:
+            self._connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute("ROLLBACK")
+                raise
+            self._connection.execute("COMMIT")
+
+
+class RedisWorkQueue(WorkQueue):
+    """
+    A WorkQueue in Redis, or any server speaking its protocol, for workers on many hosts.
+    Every change runs as a MULTI transaction that is retried when a key it read was changed by
+    another worker in the meantime, and lease expiry uses the server's clock.
+    Needs the redis package.
+    """
+
+    def __init__(self, client, name: str = "currency-jobs", max_attempts: int = 3):
+        """
+        Initialize the RedisWorkQueue.
+
+        Args:
+            client: A redis.Redis client, e.g. from RedisWorkQueue.from_url.
+            name (str): The prefix of the queue's keys, so several queues can share a server.
+            max_attempts (int): The number of leases a job gets before it is abandoned.
+        """
+        self.client = client
+        self.name = name
+        self.max_attempts = max_attempts
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisWorkQueue":
+        """
+        Connect to a queue, e.g. "redis://localhost:6379/0".
+
+        Args:
+            url (str): The server URL.
+            **kwargs: Passed on to the constructor.
+
+        Returns:
+            RedisWorkQueue: The queue.
+        """
+        if redis is None:
+            raise RuntimeError(
+                "The redis package is needed for a redis:// queue: pip install redis"
+            )
+
+        return cls(redis.Redis.from_url(url, decode_responses=True), **kwargs)
+
+    def put(self, item: Tuple[str, ...]) -> bool:
+        """
+        Queue an item in the pending list, unless its key is already there.
+
+        Args:
+            item (Tuple[str, ...]): A country code, or a from and to currency code pair.
+
+        Returns:
+            bool: True if the item was queued, False if its key already was.
+        """
+        key = job_key(item)
+        items = self._key("items")
+
+        def put(pipe) -> bool:
+            if pipe.hexists(items, key):
+                return False
+
+            # Items are never removed, so their count is the next row
+            row = pipe.hlen(items)
+            pipe.multi()
+            pipe.hset(items, key, json.dumps([row, list(item)]))
+            pipe.rpush(self._key("pending"), key)
+            return True
+
+        return self.client.transaction(put, items, value_from_callable=True)
+
+    def lease(self, worker_id: str, lease_seconds: float = 300) -> Optional[Job]:
+        """
+        Take the next pending job, after re-queueing the jobs whose lease ran out.
+        Jobs that already have a result are skipped, and jobs out of attempts are abandoned.
+
+        Args:
+            worker_id (str): The worker taking the job, e.g. default_worker_id().
+            lease_seconds (float): The time the worker has to complete the job before it is handed out again.
+
+        Returns:
+            Optional[Job]: The job, or None if no job is available right now.
+        """
+        pending, leases = self._key("pending"), self._key("leases")
+        attempts_key = self._key("attempts")
+
+        def lease(pipe) -> Tuple[bool, Optional[Job]]:
+            seconds, microseconds = pipe.time()
+            now = seconds + microseconds / 1000000
+            expired = pipe.zrangebyscore(leases, "-inf", now)
+            # With nothing pending, the first expired job ends up at the front once re-queued
+            key = pipe.lindex(pending, 0) or (expired[0] if expired else None)
+            if key is None:
+                return False, None
+
+            is_done = pipe.hexists(self._key("results"), key)
+            attempts = int(pipe.hget(attempts_key, key) or 0) + 1
+            row, item = json.loads(pipe.hget(self._key("items"), key))
+
+            pipe.multi()
+            if expired:
+                pipe.zrem(leases, *expired)
+                pipe.rpush(pending, *expired)
+            pipe.lpop(pending)
+            if is_done:
+                return True, None
+            if attempts > self.max_attempts:
+                pipe.sadd(self._key("abandoned"), key)
+                return True, None
+
+            pipe.hset(attempts_key, key, attempts)
+            pipe.zadd(leases, {key: now + lease_seconds})
+            pipe.hset(self._key("workers"), key, worker_id)
+            return True, Job(key, row, tuple(item), attempts)
+
+        while True:
+            taken, job = self.client.transaction(
+                lease,
+                pending,
+                leases,
+                attempts_key,
+                self._key("results"),
+                value_from_callable=True,
+            )
+            # A skipped job was taken off the pending list, so the next one is tried
+            if job is not None or not taken:
+                return job
+
+    def complete(self, key: str, result: Dict) -> bool:
+        """
+        Store the result of a job, unless it already has one.
+
+        Args:
+            key (str): The key of the job.
+            result (Dict): The JSON serializable result.
+
+        Returns:
+            bool: True if the result was stored, False if the job already had one.
+        """
+        with self.client.pipeline() as pipe:
+            pipe.hsetnx(
+                self._key("results"), key, json.dumps(result, separators=(",", ":"))
+            )
+            pipe.zrem(self._key("leases"), key)
+            stored, _ = pipe.execute()
+        return bool(stored)
+
+    def release(self, key: str, worker_id: str) -> bool:
+        """
+        Hand a leased job back to the front of the pending list. The lease does not count as an attempt.
+
+        Args:
+            key (str): The key of the job.
+            worker_id (str): The worker holding the lease.
+
+        Returns:
+            bool: True if the job is pending again, False if the worker no longer held its lease.
+        """
+        leases = self._key("leases")
+
+        def release(pipe) -> bool:
+            if (
+                pipe.zscore(leases, key) is None
+                or pipe.hget(self._key("workers"), key) != worker_id
+            ):
+                return False
+
+            pipe.multi()
+            pipe.zrem(leases, key)
+            pipe.hincrby(self._key("attempts"), key, -1)
+            pipe.lpush(self._key("pending"), key)
+            return True
+
+        return self.client.transaction(
+            release, leases, self._key("workers"), value_from_callable=True
+        )
+
+    def results(self) -> Iterator[Dict]:
+        """
+        Iterate over the stored results in the order their items were queued.
+
+        Yields:
+            Dict: The result of every completed job.
+        """
+        results = self.client.hgetall(self._key("results"))
+        items = self.client.hmget(self._key("items"), list(results))
+        rows = {key: json.loads(item)[0] for key, item in zip(results, items)}
+
+        for key in sorted(results, key=rows.__getitem__):
+            yield json.loads(results[key])
+
+    def counts(self) -> Dict[str, int]:
+        """
+        Count the jobs by state. Expired leases count as leased until the next lease call re-queues them.
+
+        Returns:
+            Dict[str, int]: The number of pending, leased, done and abandoned jobs.
+        """
+        done = self.client.hlen(self._key("results"))
+        return {
+            PENDING: self.client.llen(self._key("pending")),
+            LEASED: self.client.zcard(self._key("leases")),
+            DONE: done,
+            ABANDONED: self.client.scard(self._key("abandoned")),
+        }
+
+    def close(self):
+        """
+        Close the connections to the server.
+        """
+        self.client.close()
+
+    def _key(self, suffix: str) -> str:
+        """
+        Get the name of one of the queue's Redis keys.
+
+        Args:
+            suffix (str): The part of the queue, e.g. "pending".
+
+        Returns:
+            str: The key.
+        """
+        return f"{self.name}:{suffix}"
+
+
+def open_queue(url: str, **kwargs) -> WorkQueue:
+    """
+    Open a queue from a URL: "redis://..." or "rediss://..." for Redis, a file path or
+    "sqlite:///path" for SQLite.
+
+    Args:
+        url (str): The queue URL.
+        **kwargs: Passed on to the queue constructor, e.g. max_attempts.
+
+    Returns:
+        WorkQueue: The queue.
+    """
+    if url.startswith(("redis://", "rediss://")):
+        return RedisWorkQueue.from_url(url, **kwargs)
+
+    if url.startswith("sqlite://"):
+        url = url[len("sqlite://") :]
+    return SqliteWorkQueue(url, **kwargs)
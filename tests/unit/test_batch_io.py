@@ -0,0 +1,141 @@
+import io
+import json
+import time
+
+from src.batch_io import (
+    ResultWriter,
+    count_completed_rows,
+    infer_format,
+    ordered_map,
+    read_items,
+)
+
+
+def test_read_items_streams_codes_and_pairs():
+    """
+    Test that country codes and currency pairs are read, skipping headers, comments and blank lines.
+    """
+    file = io.StringIO("country_code\ngb\n\n# comment\nTR \nGBP,eur\n")
+
+    assert list(read_items(file)) == [("GB",), ("TR",), ("GBP", "EUR")]
+
+
+def test_infer_format():
+    """
+    Test that the output format is inferred from the file extension.
+    """
+    assert infer_format("results.csv") == "csv"
+    assert infer_format("results.jsonl") == "jsonl"
+    assert infer_format("-") == "jsonl"
+
+
+def test_result_writer_writes_csv_rows():
+    """
+    Test that results are written as CSV rows with the timings encoded as JSON.
+    """
+    file = io.StringIO()
+    writer = ResultWriter(file, "csv")
+    writer.write(
+        {
+            "row": 0,
+            "country_code": "GB",
+            "currency": "GBP",
+            "quote_currency": "EUR",
+            "rate": 1.17,
+            "threshold_met": True,
+            "error": None,
+            "timings": {"page_load": 1.5},
+        }
+    )
+
+    assert file.getvalue().splitlines() == [
+        "row,country_code,currency,quote_currency,rate,threshold_met,error,timings",
+        '0,GB,GBP,EUR,1.17,True,,"{""page_load"":1.5}"',
+    ]
+
+
+def test_result_writer_writes_json_lines():
+    """
+    Test that results are written as one JSON object per line.
+    """
+    file = io.StringIO()
+    ResultWriter(file).write({"row": 0, "rate": 1.17})
+
+    assert json.loads(file.getvalue()) == {"row": 0, "rate": 1.17}
+
+
+def test_count_completed_rows_drops_partial_row(tmp_path):
+    """
+    Test that complete rows are counted and a row cut short by a crash is removed.
+    """
+    path = tmp_path / "results.csv"
+    path.write_text("row,rate\n0,1.17\n1,0.02\n2,0.")
+
+    assert count_completed_rows(path, "csv") == 2
+    assert path.read_text() == "row,rate\n0,1.17\n1,0.02\n"
+    assert count_completed_rows(tmp_path / "missing.jsonl", "jsonl") == 0
+
+
+def test_count_completed_rows_reads_quoted_newlines(tmp_path):
+    """
+    Test that CSV records are counted by the CSV reader, so quoted newlines do not count as rows.
+    """
+    path = tmp_path / "results.csv"
+    path.write_text('row,error\n0,"Error: line one\nline two"\n1,\n2,"Error: cut')
+
+    assert count_completed_rows(path, "csv") == 2
+    assert path.read_text() == 'row,error\n0,"Error: line one\nline two"\n1,\n'
+
+
+def test_count_completed_rows_of_header_only_file(tmp_path):
+    """
+    Test that a CSV file holding only its header has no completed rows and is kept as is.
+    """
+    path = tmp_path / "results.csv"
+    path.write_text("row,rate\n")
+
+    assert count_completed_rows(path, "csv") == 0
+    assert path.read_text() == "row,rate\n"
+
+
+def test_ordered_map_keeps_order_and_bounds_in_flight_items():
+    """
+    Test that results come back in input order while only a window of items is read ahead.
+    """
+    read = []
+    max_ahead = 0
+
+    def items():
+        for number in range(20):
+            read.append(number)
+            yield number
+
+    def slow_double(number):
+        time.sleep(0.001 * (number % 3))
+        return number * 2
+
+    results = []
+    for result in ordered_map(slow_double, items(), workers=2, window=4):
+        max_ahead = max(max_ahead, len(read) - len(results))
+        results.append(result)
+
+    assert results == [number * 2 for number in range(20)]
+    assert max_ahead <= 4 + 1  # the window and the result being yielded
+
+
+def test_ordered_map_drops_items_not_started_when_stopped_early():
+    """
+    Test that the items not started yet are dropped when the caller stops reading results.
+    """
+    started = []
+
+    def record(number):
+        started.append(number)
+        time.sleep(0.01)
+        return number
+
+    for result in ordered_map(record, range(20), workers=1, window=10):
+        break
+
+    assert result == 0
+    assert len(started) < 10
@@ -0,0 +1,54 @@
+import os
+
+from benchmarks.fake_servers import FakeServers
+from benchmarks.run_benchmarks import (
+    load_latest_results,
+    percentile,
+    process_tree_rss_bytes,
+    save_results,
+)
+from src.country_info import CountryInfo
+
+
+def test_percentile_interpolates_between_ranks():
+    """
+    Test that percentiles interpolate between the closest measured values.
+    """
+    latencies = [0.4, 0.1, 0.3, 0.2]
+
+    assert percentile(latencies, 0.5) == 0.25
+    assert percentile(latencies, 1.0) == 0.4
+    assert percentile([], 0.95) is None
+
+
+def test_fake_restcountries_serves_country_lookups(monkeypatch):
+    """
+    Test that the restcountries stand-in answers both single and prefetch lookups.
+    """
+    with FakeServers(api_delay_ms=0) as servers:
+        monkeypatch.setattr(CountryInfo, "BASE_URL", servers.restcountries_url)
+        country_info = CountryInfo()
+
+        assert country_info.run("GB") == ("GBP", None)
+        assert country_info.prefetch() is None
+        assert country_info.lookup_currency("TR") == ("TRY", None)
+
+
+def test_save_and_load_latest_results(tmp_path):
+    """
+    Test that the most recently saved results are loaded for comparison.
+    """
+    save_results({"started_at": "2024-01-01T00:00:00+00:00", "runs": []}, tmp_path)
+    save_results({"started_at": "2024-01-02T00:00:00+00:00", "runs": []}, tmp_path)
+
+    assert load_latest_results(tmp_path)["started_at"] == "2024-01-02T00:00:00+00:00"
+    assert load_latest_results(tmp_path / "missing") is None
+
+
+def test_process_tree_rss_includes_current_process():
+    """
+    Test that the resident memory of the current process is measured on Linux.
+    """
+    rss_bytes = process_tree_rss_bytes(os.getpid())
+
+    assert rss_bytes is None or rss_bytes > 0
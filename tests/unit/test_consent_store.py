@@ -0,0 +1,56 @@
+from unittest.mock import MagicMock
+
+from src.consent_store import ConsentStore
+
+CONSENT_COOKIE = {
+    "name": "OptanonAlertBoxClosed",
+    "value": "2026-10-18T10:00:00.000Z",
+    "domain": ".oanda.com",
+    "path": "/",
+    "secure": False,
+    "httpOnly": False,
+    "expiry": 1792000000,
+}
+
+
+def test_save_keeps_only_consent_cookies(tmp_path):
+    """
+    Test that only the consent cookies are persisted.
+    """
+    mock_driver = MagicMock()
+    mock_driver.get_cookies.return_value = [
+        CONSENT_COOKIE,
+        {"name": "session", "value": "abc"},
+    ]
+
+    ConsentStore(str(tmp_path)).save(mock_driver)
+
+    assert ConsentStore(str(tmp_path)).cookies == [CONSENT_COOKIE]
+
+
+def test_inject_sets_cookies_through_devtools(tmp_path):
+    """
+    Test that stored cookies are set with the Network.setCookie command.
+    """
+    store = ConsentStore(str(tmp_path))
+    mock_driver = MagicMock()
+    mock_driver.get_cookies.return_value = [CONSENT_COOKIE]
+    store.save(mock_driver)
+
+    assert store.inject(mock_driver) is True
+
+    name, params = mock_driver.execute_cdp_cmd.call_args.args
+    assert name == "Network.setCookie"
+    assert params["name"] == "OptanonAlertBoxClosed"
+    assert params["domain"] == ".oanda.com"
+    assert params["expires"] == 1792000000
+
+
+def test_inject_without_stored_cookies(tmp_path):
+    """
+    Test that nothing is injected when no consent was stored.
+    """
+    mock_driver = MagicMock()
+
+    assert ConsentStore(str(tmp_path)).inject(mock_driver) is False
+    mock_driver.execute_cdp_cmd.assert_not_called()
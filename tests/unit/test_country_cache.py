@@ -0,0 +1,105 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from src.country_cache import CountryCache
+
+
+def test_get_returns_fresh_entry(tmp_path):
+    """
+    Test that a stored entry is returned as fresh and counted as a hit.
+    """
+    cache = CountryCache(str(tmp_path))
+    cache.set("GB", ["GBP"])
+
+    assert cache.get("gb") == (["GBP"], CountryCache.FRESH)
+    assert cache.stats() == {"hits": 1, "stale_hits": 0, "misses": 0}
+
+
+def test_get_returns_miss_for_unknown_country(tmp_path):
+    """
+    Test that an unknown country is a miss.
+    """
+    cache = CountryCache(str(tmp_path))
+
+    assert cache.get("GB") == (None, CountryCache.MISS)
+    assert cache.stats()["misses"] == 1
+
+
+@patch("src.country_cache.time.time")
+def test_get_expires_entries(mock_time, tmp_path):
+    """
+    Test that entries turn stale after the TTL and are dropped after the stale window.
+    """
+    cache = CountryCache(str(tmp_path), ttl_seconds=10, stale_seconds=20)
+    mock_time.return_value = 1000
+    cache.set("GB", ["GBP"])
+
+    mock_time.return_value = 1015
+    assert cache.get("GB") == (["GBP"], CountryCache.STALE)
+
+    mock_time.return_value = 1031
+    assert cache.get("GB") == (None, CountryCache.MISS)
+
+
+def test_entries_are_persisted(tmp_path):
+    """
+    Test that entries written by one cache instance are read by another.
+    """
+    CountryCache(str(tmp_path)).set_many({"GB": ["GBP"], "PA": ["PAB", "USD"]})
+
+    cache = CountryCache(str(tmp_path))
+
+    assert cache.get("PA") == (["PAB", "USD"], CountryCache.FRESH)
+
+
+def test_invalidate(tmp_path):
+    """
+    Test that invalidate drops a single entry or all of them.
+    """
+    cache = CountryCache(str(tmp_path))
+    cache.set_many({"GB": ["GBP"], "TR": ["TRY"]})
+
+    cache.invalidate("GB")
+    assert cache.get("GB")[0] is None
+    assert cache.get("TR")[0] == ["TRY"]
+
+    cache.invalidate()
+    assert CountryCache(str(tmp_path)).get("TR")[0] is None
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        [["GB", ["GBP"]]],
+        {"GB": ["GBP"]},
+        {"GB": [1.0]},
+        {"GB": ["yesterday", ["GBP"]]},
+        {"GB": [1.0, "GBP"]},
+    ],
+)
+def test_file_of_wrong_shape_loads_as_empty(tmp_path, content):
+    """
+    Test that a cache file that is valid JSON but not a cache is treated as empty instead of crashing.
+    """
+    cache = CountryCache(str(tmp_path))
+    with open(cache.path, "w", encoding="utf-8") as file:
+        json.dump(content, file)
+
+    assert cache.get("GB") == (None, CountryCache.MISS)
+
+    cache.set("FR", ["EUR"])
+    assert CountryCache(str(tmp_path)).get("FR") == (["EUR"], CountryCache.FRESH)
+
+
+def test_invalid_entries_are_dropped(tmp_path):
+    """
+    Test that only the entries of the wrong shape are dropped from an otherwise valid file.
+    """
+    cache = CountryCache(str(tmp_path))
+    with open(cache.path, "w", encoding="utf-8") as file:
+        json.dump({"GB": [1e12, ["GBP"]], "FR": None}, file)
+
+    assert cache.get("GB") == (["GBP"], CountryCache.FRESH)
+    assert cache.get("FR") == (None, CountryCache.MISS)
@@ -1,6 +1,8 @@
 import requests
 import json
+from unittest.mock import MagicMock
 
+from src.country_cache import CountryCache
 from src.country_info import CountryInfo
 
 
@@ -166,3 +168,236 @@ def test_extract_currency_with_empty_response_body():
     assert currency is None
     assert error is not None
     assert str(error) == "Error: Invalid response format."
+
+
+def test_fetch_country_info_uses_session_and_timeout():
+    """
+    Test that fetch_country_info sends the request through the session with timeouts.
+    """
+    mock_session = MagicMock()
+
+    CountryInfo(session=mock_session, timeout=(1, 2)).fetch_country_info("GB")
+
+    mock_session.get.assert_called_once_with(
+        "https://restcountries.com/v3.1/alpha/GB",
+        params={"fields": "currencies"},
+        timeout=(1, 2),
+    )
+
+
+def test_run_with_request_timeout():
+    """
+    Test the run function when the request times out.
+    """
+    mock_session = MagicMock()
+    mock_session.get.side_effect = requests.Timeout()
+
+    currency, error = CountryInfo(session=mock_session).run("GB")
+
+    assert currency is None
+    assert str(error) == "Error: Failed to fetch country information."
+
+
+def test_build_currency_index():
+    """
+    Test the build_currency_index function with a filtered "all countries" response.
+    """
+    mock_response = [
+        {"cca2": "GB", "currencies": {"GBP": {}}},
+        {"cca2": "PA", "currencies": {"PAB": {}, "USD": {}}},
+        {"cca2": "AQ", "currencies": {}},
+    ]
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(mock_response).encode("utf-8")
+
+    currency_index, error = CountryInfo().build_currency_index(response)
+
+    assert currency_index == {"GB": ["GBP"], "PA": ["PAB", "USD"], "AQ": []}
+    assert error is None
+
+
+def test_run_after_prefetch_uses_index():
+    """
+    Test that run answers from the prefetched index without a request per country.
+    """
+    mock_response = [{"cca2": "GB", "currencies": {"GBP": {}}}]
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps(mock_response).encode("utf-8")
+    mock_session = MagicMock()
+    mock_session.get.return_value = response
+
+    country_info = CountryInfo(session=mock_session)
+    assert country_info.prefetch() is None
+
+    currency, error = country_info.run("GB")
+
+    assert currency == "GBP"
+    assert error is None
+    mock_session.get.assert_called_once_with(
+        "https://restcountries.com/v3.1/all",
+        params={"fields": "cca2,currencies"},
+        timeout=country_info.timeout,
+    )
+
+
+def test_prefetch_without_codes_skips_request_when_cache_covers_registry(tmp_path):
+    """
+    Test that a prefetch for streamed items, whose codes are not known up front, is skipped
+    when the cache is fresh for every country of the registry.
+    """
+    registry = MagicMock()
+    registry.country_codes.return_value = ("FR", "GB")
+    cache = CountryCache(str(tmp_path))
+    cache.set("GB", ["GBP"])
+    mock_session = MagicMock()
+    country_info = CountryInfo(session=mock_session, cache=cache, registry=registry)
+
+    mock_session.get.side_effect = requests.ConnectionError()
+    assert country_info.prefetch() is not None
+
+    cache.set("FR", ["EUR"])
+    mock_session.get.reset_mock()
+    assert country_info.prefetch() is None
+    mock_session.get.assert_not_called()
+
+
+def test_run_with_cache_hit_skips_request(tmp_path):
+    """
+    Test that run answers from the country cache without sending a request.
+    """
+    cache = CountryCache(str(tmp_path))
+    cache.set("GB", ["GBP"])
+    mock_session = MagicMock()
+
+    currency, error = CountryInfo(session=mock_session, cache=cache).run("GB")
+
+    assert currency == "GBP"
+    assert error is None
+    mock_session.get.assert_not_called()
+
+
+def test_run_with_cache_miss_stores_currency(tmp_path):
+    """
+    Test that run stores a fetched currency in the country cache.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps([{"currencies": {"GBP": {}}}]).encode("utf-8")
+    mock_session = MagicMock()
+    mock_session.get.return_value = response
+    cache = CountryCache(str(tmp_path))
+
+    CountryInfo(session=mock_session, cache=cache).run("GB")
+
+    assert cache.get("GB") == (["GBP"], CountryCache.FRESH)
+
+
+def test_run_accepts_any_currency_of_a_multi_currency_country():
+    """
+    Test that the fetched currency is validated against all currencies of the country.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"currencies":{"PAB":{},"USD":{}}}'
+    mock_session = MagicMock()
+    mock_session.get.return_value = response
+
+    assert CountryInfo(session=mock_session).run("PA") == ("PAB", None)
+
+
+def test_run_with_unexpected_currency():
+    """
+    Test the run function when the fetched currency is not used in the country.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"currencies":{"USD":{}}}'
+    mock_session = MagicMock()
+    mock_session.get.return_value = response
+
+    currency, error = CountryInfo(session=mock_session).run("GB")
+
+    assert currency is None
+    assert str(error) == "Error: Expected GBP but got USD"
+
+
+def test_extract_currencies_keeps_all_legal_tenders():
+    """
+    Test that extract_currencies returns every currency of the country, the main one first.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = json.dumps([{"currencies": {"PAB": {}, "USD": {}}}]).encode(
+        "utf-8"
+    )
+
+    assert tuple(CountryInfo.extract_currencies(response)) == (["PAB", "USD"], None)
+
+
+def test_run_currencies_caches_all_currencies(tmp_path):
+    """
+    Test that run_currencies returns and caches every currency the registry expects.
+    """
+    cache = CountryCache(str(tmp_path))
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"currencies":{"PAB":{},"USD":{},"XXX":{}}}'
+    mock_session = MagicMock()
+    mock_session.get.return_value = response
+
+    currencies, error = CountryInfo(session=mock_session, cache=cache).run_currencies(
+        "PA"
+    )
+
+    assert currencies == ["PAB", "USD"]
+    assert error is None
+    assert cache.get("PA")[0] == ["PAB", "USD", "XXX"]
+
+
+def test_extract_currencies_decodes_only_the_currencies_object():
+    """
+    Test that the currencies of a filtered lookup are read without decoding the rest of the body.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = (
+        b'{"currencies":{"GBP":{"name":"British pound"}},"rest": not json}'
+    )
+
+    record = CountryInfo.extract_currencies(response)
+
+    assert record.currency == "GBP"
+    assert record.error is None
+    assert not hasattr(record, "__dict__")
+
+
+def test_lookup_currency_without_prefetch_fetches_country():
+    """
+    Test that looking up a currency before prefetching falls back to the API.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{"currencies":{"GBP":{}}}'
+    mock_session = MagicMock()
+    mock_session.get.return_value = response
+
+    assert CountryInfo(session=mock_session).lookup_currency("GB") == ("GBP", None)
+    mock_session.get.assert_called_once()
+
+
+def test_extract_currencies_rejects_truncated_body():
+    """
+    Test that a body cut short after its currencies object is not trusted, so it is never cached.
+    """
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'[{"currencies":{"GBP":{"name":"British pound"}},"name":{"com'
+
+    record = CountryInfo.extract_currencies(response)
+
+    assert record.currencies is None
+    assert str(record.error) == "Error: Invalid response format."
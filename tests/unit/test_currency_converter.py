@@ -1,10 +1,17 @@
-from unittest.mock import MagicMock, patch
+from unittest.mock import MagicMock, PropertyMock, patch
 
 import pytest
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.keys import Keys
 
-from src.currency_converter import CurrencyConverter
-from src.error import Error
+from src.currency_converter import (
+    CurrencyConverter,
+    CurrencySelectionError,
+    RateUnchangedError,
+)
+from src.error import CircuitOpenError, Error, TransientError
+from src.rate_matrix import RateMatrix
+from src.resilience import CircuitBreaker, RetryPolicy, is_transient
 
 
 @pytest.fixture
@@ -15,7 +22,18 @@ def mock_driver():
 
 @pytest.fixture
 def converter(mock_driver):
-    return CurrencyConverter(mock_driver)
+    converter = CurrencyConverter(mock_driver)
+    converter.retry_policy = RetryPolicy(sleep=lambda seconds: None)
+    # No cookie consent given yet
+    mock_driver.return_value.get_cookie.return_value = None
+    # The scripted selection picks the requested option
+    mock_driver.return_value.execute_async_script.side_effect = (
+        lambda script, input_id, code, name, timeout: {
+            "value": name,
+            "option": f"{code} {name}",
+        }
+    )
+    return converter
 
 
 @patch("src.currency_converter.WebDriverWait")
@@ -61,26 +79,542 @@ def test_handle_cookie_consent(MockWebDriverWait, converter: CurrencyConverter):
     mock_wait = MockWebDriverWait.return_value
     mock_cookie_button = MagicMock()
     mock_wait.until.return_value = mock_cookie_button
+    converter.driver = converter._driver_factory.return_value
 
     converter._handle_cookie_consent()
 
     mock_cookie_button.click.assert_called_once()
 
 
+@patch("src.currency_converter.WebDriverWait")
+def test_handle_cookie_consent_already_given(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that the _handle_cookie_consent method does not wait when the consent cookie is set.
+    """
+    converter.driver = converter._driver_factory.return_value
+    converter.driver.get_cookie.return_value = {"name": "OptanonAlertBoxClosed"}
+
+    converter._handle_cookie_consent()
+
+    MockWebDriverWait.return_value.until.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_handle_cookie_consent_without_banner(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that the _handle_cookie_consent method carries on without waiting when no banner is shown.
+    """
+    converter.driver = converter._driver_factory.return_value
+    converter.driver.find_elements.return_value = []
+
+    converter._handle_cookie_consent()
+
+    MockWebDriverWait.return_value.until.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_handle_cookie_consent_banner_not_clickable(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that the _handle_cookie_consent method carries on when the banner never becomes clickable.
+    """
+    MockWebDriverWait.return_value.until.side_effect = TimeoutException()
+    converter.driver = converter._driver_factory.return_value
+    converter.driver.find_elements.return_value = [MagicMock()]
+
+    converter._handle_cookie_consent()
+
+
 @patch("src.currency_converter.WebDriverWait")
 def test_set_currency_input(MockWebDriverWait, converter: CurrencyConverter):
     """
-    Test the _set_currency_input method.
+    Test that _set_currency_input selects the option of the code with one script call.
     """
     mock_wait = MockWebDriverWait.return_value
     mock_input_field = MagicMock()
     mock_wait.until.return_value = mock_input_field
+    converter.driver = converter._driver_factory.return_value
 
     converter._set_currency_input("GBP", "baseCurrency_currency_autocomplete")
 
+    args = converter.driver.execute_async_script.call_args.args
+    assert args[1:4] == ("baseCurrency_currency_autocomplete", "GBP", "British Pound")
+    mock_input_field.send_keys.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_set_currency_input_falls_back_to_typing(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that _set_currency_input types the code when the option does not show up.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_input_field = MagicMock()
+    mock_input_field.get_attribute.return_value = "British Pound"
+    mock_wait.until.return_value = mock_input_field
+    converter.driver = converter._driver_factory.return_value
+    converter.driver.execute_async_script.side_effect = None
+    converter.driver.execute_async_script.return_value = None
+    converter.SELECT_ALL_KEY = Keys.CONTROL
+
+    converter._set_currency_input("GBP", "baseCurrency_currency_autocomplete")
+
+    converter.driver.execute_async_script.assert_called_once()
+    assert converter.driver.execute_async_script.call_args.args[4] == 2000
     mock_input_field.click.assert_called_once()
-    mock_input_field.send_keys.assert_any_call(Keys.COMMAND + "a")
+    mock_input_field.send_keys.assert_any_call(Keys.CONTROL + "a")
     mock_input_field.send_keys.assert_any_call(Keys.BACKSPACE)
     mock_input_field.send_keys.assert_any_call("GBP")
     mock_input_field.send_keys.assert_any_call(Keys.ARROW_DOWN)
     mock_input_field.send_keys.assert_any_call(Keys.RETURN)
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_set_currency_input_wrong_selection(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that _set_currency_input raises a transient error when another currency got selected.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_input_field = MagicMock()
+    mock_input_field.get_attribute.return_value = "Gibraltar Pound"
+    mock_wait.until.return_value = mock_input_field
+    converter.driver = converter._driver_factory.return_value
+    converter.driver.execute_async_script.side_effect = None
+    converter.driver.execute_async_script.return_value = {
+        "value": "Gibraltar Pound",
+        "option": "GIP Gibraltar Pound",
+    }
+
+    with pytest.raises(CurrencySelectionError) as excinfo:
+        converter._set_currency_input("GBP", "baseCurrency_currency_autocomplete")
+
+    assert is_transient(excinfo.value)
+    assert str(excinfo.value) == "Expected British Pound but got Gibraltar Pound"
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_with_pool(MockWebDriverWait):
+    """
+    Test that a pooled converter borrows a driver and returns it instead of quitting it.
+    """
+    mock_pool = MagicMock()
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = Exception("Some error")
+
+    converter = CurrencyConverter(pool=mock_pool)
+    converter.convert_currency("GBP", "EUR")
+
+    mock_pool.checkout.assert_called_once()
+    mock_pool.checkin.assert_called_once_with(mock_pool.checkout.return_value)
+    mock_pool.checkout.return_value.quit.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_many_loads_page_once(MockWebDriverWait, converter: CurrencyConverter):
+    """
+    Test that convert_many loads the page once and streams a result per pair.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = [
+        MagicMock(),  # For initial page load
+        MagicMock(),  # For cookie consent
+        MagicMock(),  # For first base currency input
+        MagicMock(),  # For first quote currency input
+        MagicMock(get_attribute=MagicMock(return_value="1.17")),  # For first rate
+        MagicMock(),  # For second base currency input
+        MagicMock(),  # For second quote currency input
+        MagicMock(get_attribute=MagicMock(return_value="0.03")),  # For second rate
+    ]
+
+    results = list(converter.convert_many([("GBP", "EUR"), ("TRY", "EUR")]))
+
+    assert results == [("GBP", "EUR", 1.17, None), ("TRY", "EUR", 0.03, None)]
+    assert converter._driver_factory.return_value.get.call_count == 1
+
+
+def test_convert_currency_with_rate_matrix_hit(converter: CurrencyConverter):
+    """
+    Test that a derivable conversion is answered from the rate matrix without a browser.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+    rate_matrix.set_anchor_rate("TRY", 0.03)
+    converter.rate_matrix = rate_matrix
+
+    rate, error = converter.convert_currency("TRY", "GBP")
+
+    assert rate == 0.03 / 1.2
+    assert error is None
+    converter._driver_factory.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_with_rate_matrix_scrapes_anchor_pairs(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that only the missing anchor pair is scraped and stored in the rate matrix.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = [
+        MagicMock(),  # For initial page load
+        MagicMock(),  # For cookie consent
+        MagicMock(),  # For base currency input
+        MagicMock(),  # For quote currency input
+        MagicMock(get_attribute=MagicMock(return_value="0.03")),  # For rate element
+    ]
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+    converter.rate_matrix = rate_matrix
+
+    rate, error = converter.convert_currency("TRY", "GBP")
+
+    assert rate == 0.03 / 1.2
+    assert error is None
+    assert rate_matrix.has_anchor_rate("TRY")
+
+
+def test_convert_with_rate_matrix_scrapes_missing_anchors_together(
+    converter: CurrencyConverter,
+):
+    """
+    Test that the anchor rates missing for several pairs are scraped in one batch,
+    and a failed anchor only fails the pairs that need it.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+    converter.rate_matrix = rate_matrix
+    anchor_rates = {
+        "CHF": (1.05, None),
+        "USD": (None, Error("Failed to convert currency.")),
+    }
+
+    with patch.object(
+        converter,
+        "convert_many",
+        side_effect=lambda pairs: [
+            (currency, anchor, *anchor_rates[currency]) for currency, anchor in pairs
+        ],
+    ) as mock_convert_many:
+        results = converter.convert_with_rate_matrix(
+            [("CHF", "GBP"), ("GBP", "EUR"), ("USD", "CHF")]
+        )
+
+    mock_convert_many.assert_called_once_with([("CHF", "EUR"), ("USD", "EUR")])
+    assert results[:2] == [("CHF", "GBP", 1.05 / 1.2, None), ("GBP", "EUR", 1.2, None)]
+    assert results[2][2] is None
+    assert isinstance(results[2][3], Error)
+
+
+def test_convert_currency_with_rate_matrix_fails_on_expired_anchor(
+    converter: CurrencyConverter,
+):
+    """
+    Test that a cross rate that can no longer be derived, e.g. because an anchor rate expired
+    after it was scraped, is returned as an error instead of a missing rate.
+    """
+    converter.rate_matrix = MagicMock()
+    converter.rate_matrix.missing_anchor_rates.return_value = []
+    converter.rate_matrix.cross_rates.return_value = [None]
+
+    rate, error = converter.convert_currency("TRY", "GBP")
+
+    assert rate is None
+    assert isinstance(error, Error)
+
+
+def test_convert_currency_with_ready_backend(converter: CurrencyConverter):
+    """
+    Test that a ready rate backend answers without starting a browser.
+    """
+    converter.backend = MagicMock(is_ready=True)
+    converter.backend.convert.return_value = (1.17, None)
+
+    rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate == 1.17
+    assert error is None
+    converter._driver_factory.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_falls_back_to_page(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that a failing rate backend falls back to the page and learns from it.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = [
+        MagicMock(),  # For initial page load
+        MagicMock(),  # For cookie consent
+        MagicMock(),  # For base currency input
+        MagicMock(),  # For quote currency input
+        MagicMock(get_attribute=MagicMock(return_value="1.23")),  # For rate element
+    ]
+    converter.backend = MagicMock(is_ready=True)
+    converter.backend.convert.return_value = (None, Error("Rate endpoint down."))
+
+    rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate == 1.23
+    assert error is None
+    converter.backend.learn.assert_called_once()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_records_failed_phase(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that the timer records the phase a failed conversion stopped in.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = TimeoutException()
+
+    converter.convert_currency("GBP", "EUR")
+
+    assert converter.timer.failed_phase == "page_load"
+    assert converter.timer.failure == "TimeoutException"
+    assert list(converter.timer.durations()) == [
+        "driver_start",
+        "page_load",
+        "driver_quit",
+    ]
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_retries_on_loaded_page(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that a transient failure is retried on the already loaded page.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = [
+        MagicMock(),  # For initial page load
+        MagicMock(),  # For cookie consent
+        TimeoutException(),  # For base currency input
+        MagicMock(),  # For base currency input, retried
+        MagicMock(),  # For quote currency input
+        MagicMock(get_attribute=MagicMock(return_value="1.23")),  # For rate element
+    ]
+    driver = converter._driver_factory.return_value
+    driver.find_elements.return_value = [MagicMock()]
+
+    rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate == 1.23
+    assert error is None
+    driver.get.assert_called_once()
+
+
+def test_wait_for_rate_rejects_previous_rate(converter: CurrencyConverter):
+    """
+    Test that a rate still showing the previous pair's value is not returned as the new pair's rate.
+    """
+    converter.driver = converter._driver_factory.return_value
+    converter.driver.find_element.return_value.get_attribute.return_value = "1.17"
+    converter.RATE_SETTLE_SECONDS = 0.05
+    converter.RATE_POLL_SECONDS = 0.01
+
+    with pytest.raises(RateUnchangedError) as excinfo:
+        converter._wait_for_rate("1.17")
+
+    assert is_transient(excinfo.value)
+    assert converter._wait_for_rate("0.03") == "1.17"
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_reloads_page_when_rate_unchanged(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that a rate stuck at the previous value is retried on a freshly loaded page.
+    """
+    MockWebDriverWait.return_value.until.return_value = MagicMock()
+    driver = converter._driver_factory.return_value
+    driver.find_elements.return_value = [MagicMock()]
+
+    with patch.object(
+        converter, "_wait_for_rate", side_effect=[RateUnchangedError(), "1.23"]
+    ):
+        rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate == 1.23
+    assert error is None
+    assert driver.get.call_count == 2
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_gives_up_after_retries(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that a transient failure returns a transient error once all attempts are used.
+    """
+    MockWebDriverWait.return_value.until.side_effect = TimeoutException()
+
+    rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate is None
+    assert isinstance(error, TransientError)
+    assert converter._driver_factory.return_value.get.call_count == 3
+
+
+def test_convert_currency_fails_fast_when_circuit_is_open(
+    converter: CurrencyConverter,
+):
+    """
+    Test that an open circuit fails the conversion without starting a browser.
+    """
+    converter.breaker = MagicMock()
+    converter.breaker.allow.return_value = False
+
+    rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate is None
+    assert isinstance(error, CircuitOpenError)
+    converter._driver_factory.assert_not_called()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_records_outcome_in_breaker(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that failed conversions are recorded in the circuit breaker.
+    """
+    MockWebDriverWait.return_value.until.side_effect = Exception("Some error")
+    converter.breaker = CircuitBreaker(min_attempts=1)
+
+    converter.convert_currency("GBP", "EUR")
+
+    assert converter.breaker.state == CircuitBreaker.OPEN
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_currency_retries_failed_page_load(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that a browser error while loading the page, e.g. a reset connection, is retried.
+    """
+    MockWebDriverWait.return_value.until.return_value = MagicMock()
+    driver = converter._driver_factory.return_value
+    driver.get.side_effect = [WebDriverException("net::ERR_CONNECTION_RESET"), None]
+
+    with patch.object(converter, "_convert_on_page", return_value=1.23):
+        rate, error = converter.convert_currency("GBP", "EUR")
+
+    assert rate == 1.23
+    assert error is None
+    assert driver.get.call_count == 2
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_many_reloads_page_after_failed_load(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that a page that failed to load only fails its own pair: the next pair reloads it,
+    and the breaker records one outcome per pair.
+    """
+    MockWebDriverWait.return_value.until.return_value = MagicMock()
+    driver = converter._driver_factory.return_value
+    driver.get.side_effect = [WebDriverException("net::ERR_CONNECTION_RESET"), None]
+    converter.retry_policy = RetryPolicy(attempts=1, sleep=lambda seconds: None)
+    converter.breaker = CircuitBreaker(min_attempts=3)
+    pairs = [("GBP", "EUR"), ("TRY", "EUR"), ("USD", "EUR"), ("JPY", "EUR")]
+
+    with patch.object(converter, "_convert_on_page", return_value=1.23):
+        results = list(converter.convert_many(pairs))
+
+    assert [rate for _, _, rate, _ in results] == [None, 1.23, 1.23, 1.23]
+    assert isinstance(results[0][3], TransientError)
+    assert converter.breaker.state == CircuitBreaker.CLOSED
+    assert driver.get.call_count == 2
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_many_interleaves_pairs_across_tabs(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that both pairs are typed into their own tab before any rate is collected.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = [
+        MagicMock(),  # For initial page load
+        MagicMock(),  # For cookie consent
+        MagicMock(),  # For the second tab's page load
+        MagicMock(),  # For base currency input, tab 1
+        MagicMock(),  # For quote currency input, tab 1
+        MagicMock(),  # For base currency input, tab 2
+        MagicMock(),  # For quote currency input, tab 2
+        MagicMock(get_attribute=MagicMock(return_value="1.17")),  # For rate, tab 1
+        MagicMock(get_attribute=MagicMock(return_value="0.03")),  # For rate, tab 2
+    ]
+    driver = converter._driver_factory.return_value
+    driver.current_window_handle = "tab-1"
+    type(driver).window_handles = PropertyMock(
+        side_effect=[["tab-1"], ["tab-1", "tab-2"]]
+    )
+    converter.tabs = 2
+
+    results = list(converter.convert_many([("GBP", "EUR"), ("TRY", "EUR")]))
+
+    assert results == [("GBP", "EUR", 1.17, None), ("TRY", "EUR", 0.03, None)]
+    switched_to = [call.args[0] for call in driver.switch_to.window.call_args_list]
+    assert switched_to[:5] == ["tab-2", "tab-1", "tab-2", "tab-1", "tab-2"]
+    driver.close.assert_called_once()
+    driver.get.assert_called_once()
+
+
+@patch("src.currency_converter.WebDriverWait")
+def test_convert_many_closes_tabs_opened_by_a_failed_round(
+    MockWebDriverWait, converter: CurrencyConverter
+):
+    """
+    Test that the tabs opened before a tab failed to load are closed, not left in the browser.
+    """
+    mock_wait = MockWebDriverWait.return_value
+    mock_wait.until.side_effect = [
+        MagicMock(),  # For initial page load
+        MagicMock(),  # For cookie consent
+        TimeoutException(),  # For the second tab's page load
+    ]
+    driver = converter._driver_factory.return_value
+    driver.current_window_handle = "tab-1"
+    type(driver).window_handles = PropertyMock(
+        side_effect=[
+            ["tab-1"],
+            ["tab-1", "tab-2", "tab-3"],
+            ["tab-1", "tab-2", "tab-3"],
+        ]
+    )
+    converter.tabs = 3
+
+    results = list(converter.convert_many([("GBP", "EUR")]))
+
+    assert results[0][2] is None
+    assert isinstance(results[0][3], TransientError)
+    switched_to = [call.args[0] for call in driver.switch_to.window.call_args_list]
+    assert switched_to == ["tab-2", "tab-2", "tab-3", "tab-1"]
+    assert driver.close.call_count == 2
+
+
+def test_converter_requires_a_tab():
+    """
+    Test that a converter without tabs is rejected.
+    """
+    with pytest.raises(ValueError):
+        CurrencyConverter(MagicMock(), tabs=0)
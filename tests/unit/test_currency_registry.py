@@ -0,0 +1,74 @@
+import json
+
+from src.currency_registry import CurrencyRegistry, get_default_registry
+
+
+def test_bundled_registry_covers_the_world():
+    """
+    Test that the bundled data file maps every country to currencies with display names.
+    """
+    registry = CurrencyRegistry()
+
+    assert registry.primary_currency("gb") == "GBP"
+    assert registry.primary_currency("TR") == "TRY"
+    assert registry.currencies("PA") == ("PAB", "USD")
+    assert registry.currencies("AQ") == ()
+    assert registry.is_known_country("AQ")
+    assert not registry.is_known_country("ZZ")
+    assert registry.display_name("GBP") == "British Pound"
+    assert registry.display_name("TRY") == "Turkish Lira"
+    assert registry.display_name("EUR") == "Euro"
+
+
+def test_reverse_lookups(tmp_path):
+    """
+    Test that countries and currency codes are found from a currency and a display name.
+    """
+    path = tmp_path / "currencies.json"
+    path.write_text(
+        json.dumps(
+            {
+                "currencies": {"EUR": "Euro", "USD": "US Dollar"},
+                "countries": {"FR": ["EUR"], "DE": ["EUR"], "EC": ["USD"]},
+            }
+        )
+    )
+    registry = CurrencyRegistry(path)
+
+    assert registry.countries("eur") == ("DE", "FR")
+    assert registry.countries("GBP") == ()
+    assert registry.currency_for_name("us dollar") == "USD"
+    assert registry.currency_for_name("Pound") is None
+
+
+def test_registry_is_loaded_lazily(tmp_path):
+    """
+    Test that the data file is only read on the first lookup.
+    """
+    registry = CurrencyRegistry(tmp_path / "missing.json")
+
+    assert registry.path == tmp_path / "missing.json"
+
+
+def test_default_registry_is_shared():
+    """
+    Test that the default registry is created once per process.
+    """
+    assert get_default_registry() is get_default_registry()
+
+
+def test_country_codes_with_currency(tmp_path):
+    """
+    Test that only the countries using a currency are listed.
+    """
+    path = tmp_path / "currencies.json"
+    path.write_text(
+        json.dumps(
+            {
+                "currencies": {"EUR": "Euro"},
+                "countries": {"FR": ["EUR"], "AQ": [], "DE": ["EUR"]},
+            }
+        )
+    )
+
+    assert CurrencyRegistry(path).country_codes() == ("DE", "FR")
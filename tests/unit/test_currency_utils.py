@@ -1,6 +1,29 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
 from unittest.mock import patch, MagicMock
 
-from src.currency_utils import get_currency_rate, check_threshold
+import pytest
+
+from src.currency_utils import (
+    SingleFlight,
+    conversions,
+    country_lookups,
+    _lookup_key,
+    get_pair_rate,
+    get_currency_rate,
+    get_currency_rate_table,
+    get_currency_rates_in_tabs,
+    get_currency_rates,
+    check_threshold,
+    check_thresholds,
+    check_cross_threshold,
+)
+from src.country_info import CountryInfo
+from src.rate_cache import RateCache
+from src.rate_matrix import RateMatrix
 
 
 @patch("src.currency_utils.CountryInfo")
@@ -68,3 +91,381 @@ def test_check_threshold_below():
     Test the check_threshold function for rate below threshold.
     """
     assert check_threshold(0.5, 1) is False
+
+
+@patch("src.currency_utils.CountryInfo")
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_currency_rate_uses_rate_cache(mock_currency_converter, mock_country_info):
+    """
+    Test that a cached rate is returned without starting a browser.
+    """
+    mock_country_info.return_value.run.return_value = ("GBP", None)
+    rate_cache = RateCache()
+    rate_cache.set("GBP", "EUR", 1.17)
+
+    rate, currency, error = get_currency_rate(MagicMock(), "GB", rate_cache=rate_cache)
+
+    assert rate == 1.17
+    assert currency == "GBP"
+    assert error is None
+    mock_currency_converter.assert_not_called()
+
+
+@patch("src.currency_utils.CountryInfo")
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_currency_rate_stores_scraped_rate(
+    mock_currency_converter, mock_country_info
+):
+    """
+    Test that a scraped rate is stored in the rate cache.
+    """
+    mock_country_info.return_value.run.return_value = ("GBP", None)
+    mock_currency_converter.return_value.convert_currency.return_value = (1.2, None)
+    rate_cache = RateCache()
+
+    get_currency_rate(MagicMock(), "GB", rate_cache=rate_cache)
+
+    assert rate_cache.get("GBP", "EUR") == 1.2
+
+
+@patch("src.currency_utils.CountryInfo")
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_currency_rates(mock_currency_converter, mock_country_info):
+    """
+    Test the async get_currency_rates function returns results in input order.
+    """
+    currencies = {"GB": ("GBP", None), "TR": ("TRY", None), "ZZ": (None, "error")}
+    rates = {"GBP": (1.17, None), "TRY": (0.03, None)}
+    mock_country_info.return_value.run.side_effect = lambda country_code: currencies[
+        country_code
+    ]
+    mock_currency_converter.return_value.convert_currency.side_effect = (
+        lambda currency, quote: rates[currency]
+    )
+
+    results = asyncio.run(
+        get_currency_rates(MagicMock(), ["GB", "ZZ", "TR"], concurrency=2)
+    )
+
+    assert results == [
+        (1.17, "GBP", None),
+        (None, None, "error"),
+        (0.03, "TRY", None),
+    ]
+
+
+def test_check_cross_threshold():
+    """
+    Test the check_cross_threshold function with a derivable and an unknown pair.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+    rate_matrix.set_anchor_rate("TRY", 0.03)
+
+    assert check_cross_threshold(rate_matrix, "GBP", "TRY", 1) is True
+    assert check_cross_threshold(rate_matrix, "TRY", "GBP", 1) is False
+    assert check_cross_threshold(rate_matrix, "USD", "GBP", 1) is None
+
+
+@patch("src.currency_utils.CountryInfo")
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_currency_rate_table(mock_currency_converter, mock_country_info):
+    """
+    Test that every currency and quote pair missing from the rate cache is converted in one batch.
+    """
+    mock_country_info.return_value.run_currencies.return_value = (["PAB", "USD"], None)
+    mock_currency_converter.return_value.convert_many.side_effect = lambda pairs: (
+        (from_currency, to_currency, 2.0, None) for from_currency, to_currency in pairs
+    )
+    rate_cache = RateCache()
+    rate_cache.set("USD", "EUR", 0.9)
+
+    table, error = get_currency_rate_table(
+        MagicMock(), "PA", ["EUR", "GBP"], rate_cache=rate_cache
+    )
+
+    assert error is None
+    assert table == [
+        ("PAB", "EUR", 2.0, None),
+        ("PAB", "GBP", 2.0, None),
+        ("USD", "EUR", 0.9, None),
+        ("USD", "GBP", 2.0, None),
+    ]
+    mock_currency_converter.return_value.convert_many.assert_called_once_with(
+        [("PAB", "EUR"), ("PAB", "GBP"), ("USD", "GBP")]
+    )
+    assert rate_cache.get("PAB", "GBP") == 2.0
+
+
+@patch("src.currency_utils.CountryInfo")
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_currency_rate_table_with_rate_matrix_converts_in_one_batch(
+    mock_currency_converter, mock_country_info
+):
+    """
+    Test that with a rate matrix, all missing pairs are derived in one batch instead of one page load each.
+    """
+    mock_country_info.return_value.run_currencies.return_value = (["PAB", "USD"], None)
+    mock_currency_converter.return_value.convert_with_rate_matrix.side_effect = (
+        lambda pairs: [(*pair, 2.0, None) for pair in pairs]
+    )
+
+    table, error = get_currency_rate_table(
+        MagicMock(), "PA", ["EUR", "GBP"], rate_matrix=RateMatrix("EUR")
+    )
+
+    assert error is None
+    assert [rate for _, _, rate, _ in table] == [2.0] * 4
+    mock_currency_converter.return_value.convert_with_rate_matrix.assert_called_once()
+    mock_currency_converter.return_value.convert_currency.assert_not_called()
+
+
+@patch("src.currency_utils.CountryInfo")
+def test_get_currency_rate_table_country_info_error(mock_country_info):
+    """
+    Test that a failed country lookup returns an empty table and the error.
+    """
+    mock_country_info.return_value.run_currencies.return_value = (None, "error")
+
+    assert get_currency_rate_table(MagicMock(), "ZZ") == ([], "error")
+
+
+def test_check_thresholds():
+    """
+    Test that every row is checked against its quote currency's threshold.
+    """
+    table = [
+        ("GBP", "EUR", 1.17, None),
+        ("GBP", "USD", 1.27, None),
+        ("GBP", "JPY", None, "error"),
+        ("GBP", "CHF", 1.1, None),
+    ]
+
+    assert check_thresholds(table, {"EUR": 1.2, "USD": 1.2, "JPY": 100}) == [
+        ("GBP", "EUR", False),
+        ("GBP", "USD", True),
+        ("GBP", "JPY", None),
+        ("GBP", "CHF", None),
+    ]
+    assert [met for _, _, met in check_thresholds(table, 1)] == [True, True, None, True]
+
+
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_currency_rates_in_tabs(mock_currency_converter):
+    """
+    Test that only the countries missing from the rate cache are converted, in one tabbed batch.
+    """
+    country_info = MagicMock()
+    country_info.run.side_effect = lambda country_code, timer=None: {
+        "GB": ("GBP", None),
+        "TR": ("TRY", None),
+        "ZZ": (None, "error"),
+    }[country_code]
+    mock_currency_converter.return_value.convert_many.return_value = iter(
+        [("TRY", "EUR", 0.03, None)]
+    )
+    rate_cache = RateCache()
+    rate_cache.set("GBP", "EUR", 1.17)
+
+    results = get_currency_rates_in_tabs(
+        MagicMock(),
+        ["GB", "TR", "ZZ"],
+        tabs=2,
+        country_info=country_info,
+        rate_cache=rate_cache,
+    )
+
+    assert results == [(1.17, "GBP", None), (0.03, "TRY", None), (None, None, "error")]
+    assert mock_currency_converter.call_args.kwargs["tabs"] == 2
+    mock_currency_converter.return_value.convert_many.assert_called_once_with(
+        [("TRY", "EUR")]
+    )
+
+
+def _wait_for(condition: Callable[[], bool], timeout: float = 5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "Timed out waiting for the condition."
+        time.sleep(0.01)
+
+
+def test_single_flight_shares_in_flight_call():
+    """
+    Test that concurrent callers with the same key wait for one call and share its result.
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def convert(pair):
+        calls.append(pair)
+        started.set()
+        release.wait(5)
+        return 1.17, None
+
+    with ThreadPoolExecutor(4) as executor:
+        leader = executor.submit(flight.do, "GBP/EUR", convert, "GBP/EUR")
+        started.wait(5)
+        followers = [
+            executor.submit(flight.do, "GBP/EUR", convert, "GBP/EUR") for _ in range(3)
+        ]
+        _wait_for(lambda: flight.stats()["shared"] >= 3)
+        release.set()
+
+        assert [future.result() for future in [leader, *followers]] == [
+            (1.17, None)
+        ] * 4
+
+    assert calls == ["GBP/EUR"]
+    assert flight.stats() == {"calls": 1, "shared": 3}
+    # Finished calls are not reused
+    assert flight.do("GBP/EUR", lambda: (1.18, None)) == (1.18, None)
+
+
+def test_single_flight_shares_exception():
+    """
+    Test that the waiting callers get the exception of the call they waited for.
+    """
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("browser crashed")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(flight.do, "GBP/EUR", fail)
+        started.wait(5)
+        follower = executor.submit(flight.do, "GBP/EUR", fail)
+        _wait_for(lambda: flight.stats()["shared"] >= 1)
+        release.set()
+
+        for future in (leader, follower):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_pair_rate_coalesces_concurrent_conversions(mock_currency_converter):
+    """
+    Test that concurrent conversions of the same pair scrape the page once.
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def convert_currency(from_currency, to_currency):
+        started.set()
+        release.wait(5)
+        return 0.92, None
+
+    mock_currency_converter.return_value.convert_currency.side_effect = convert_currency
+    shared = conversions.stats()["shared"]
+
+    with ThreadPoolExecutor(3) as executor:
+        first = executor.submit(get_pair_rate, MagicMock(), "USD", "EUR")
+        started.wait(5)
+        others = [
+            executor.submit(get_pair_rate, MagicMock(), "usd", "EUR") for _ in range(2)
+        ]
+        _wait_for(lambda: conversions.stats()["shared"] >= shared + 2)
+        release.set()
+
+        assert [future.result() for future in [first, *others]] == [(0.92, None)] * 3
+
+    mock_currency_converter.return_value.convert_currency.assert_called_once_with(
+        "USD", "EUR"
+    )
+
+
+@patch("src.currency_utils._convert_currency")
+@patch("src.currency_utils.CountryInfo")
+def test_get_currency_rate_coalesces_lookups_without_shared_country_info(
+    mock_country_info, mock_convert_currency
+):
+    """
+    Test that concurrent lookups of the same country share one request,
+    even when every caller gets its own CountryInfo.
+    """
+    started = threading.Event()
+    release = threading.Event()
+
+    def run(country_code, timer=None):
+        started.set()
+        release.wait(5)
+        return "GBP", None
+
+    instances = []
+    registry = MagicMock()
+
+    def country_info():
+        instance = MagicMock(
+            BASE_URL="https://restcountries.com/v3.1",
+            registry=registry,
+            cache=None,
+            is_prefetched=False,
+        )
+        instance.run.side_effect = run
+        instances.append(instance)
+        return instance
+
+    mock_country_info.side_effect = country_info
+    mock_convert_currency.return_value = (1.17, None)
+    shared = country_lookups.stats()["shared"]
+
+    with ThreadPoolExecutor(2) as executor:
+        first = executor.submit(get_currency_rate, MagicMock(), "GB")
+        started.wait(5)
+        second = executor.submit(get_currency_rate, MagicMock(), "gb")
+        _wait_for(lambda: country_lookups.stats()["shared"] >= shared + 1)
+        release.set()
+
+        assert [first.result(), second.result()] == [(1.17, "GBP", None)] * 2
+
+    assert len(instances) == 2
+    assert sum(instance.run.call_count for instance in instances) == 1
+
+
+def test_lookup_key_separates_country_info_context():
+    """
+    Test that lookups are only shared between CountryInfo instances that answer them the same way.
+    """
+    plain = CountryInfo()
+    cached = CountryInfo(cache=MagicMock())
+    prefetched = CountryInfo()
+    prefetched._currency_index = {"GB": ["GBP"]}
+
+    assert _lookup_key(plain, "gb") == _lookup_key(CountryInfo(), "GB")
+    assert _lookup_key(cached, "GB") != _lookup_key(plain, "GB")
+    assert _lookup_key(prefetched, "GB") != _lookup_key(plain, "GB")
+    assert _lookup_key(prefetched, "GB") == _lookup_key(prefetched, "GB")
+
+
+@patch("src.currency_utils.CurrencyConverter")
+def test_get_pair_rate_does_not_share_conversions_between_backends(
+    mock_currency_converter,
+):
+    """
+    Test that concurrent conversions of the same pair with different backends are not coalesced.
+    """
+    started = []
+    release = threading.Event()
+
+    def convert_currency(from_currency, to_currency):
+        started.append(from_currency)
+        release.wait(5)
+        return 0.92, None
+
+    mock_currency_converter.return_value.convert_currency.side_effect = convert_currency
+
+    with ThreadPoolExecutor(2) as executor:
+        futures = [
+            executor.submit(get_pair_rate, MagicMock(), "USD", "EUR", backend=backend)
+            for backend in (MagicMock(), MagicMock())
+        ]
+        _wait_for(lambda: len(started) == 2)
+        release.set()
+
+        assert [future.result() for future in futures] == [(0.92, None)] * 2
@@ -0,0 +1,39 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from src.driver_factory import BLOCKED_URL_PATTERNS, get_driver_factory, lean_chrome
+
+
+@patch("src.driver_factory.webdriver.Chrome")
+def test_lean_chrome_options(MockChrome):
+    """
+    Test that the lean driver runs headless, eager and blocks heavy resources.
+    """
+    driver = lean_chrome()
+
+    options = MockChrome.call_args.kwargs["options"]
+    assert "--headless=new" in options.arguments
+    assert "--disable-extensions" in options.arguments
+    assert options.page_load_strategy == "eager"
+    driver.execute_cdp_cmd.assert_any_call(
+        "Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS}
+    )
+
+
+def test_get_driver_factory_by_name():
+    """
+    Test that driver names are resolved and factories are returned unchanged.
+    """
+    factory = MagicMock()
+
+    assert get_driver_factory("lean") is lean_chrome
+    assert get_driver_factory(factory) is factory
+
+
+def test_get_driver_factory_with_unknown_name():
+    """
+    Test that an unknown driver name is rejected.
+    """
+    with pytest.raises(ValueError):
+        get_driver_factory("firefox")
@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock, PropertyMock
+
+import pytest
+
+from src.driver_pool import DriverPool
+
+
+def test_checkout_reuses_checked_in_driver():
+    """
+    Test that a checked-in driver is handed out again instead of starting a new one.
+    """
+    factory = MagicMock()
+    pool = DriverPool(factory, size=1)
+
+    driver = pool.checkout()
+    pool.checkin(driver)
+
+    assert pool.checkout() is driver
+    factory.assert_called_once()
+
+
+def test_checkin_recycles_driver_after_max_uses():
+    """
+    Test that a driver is quit and replaced once it reaches the maximum number of uses.
+    """
+    factory = MagicMock(side_effect=[MagicMock(), MagicMock()])
+    pool = DriverPool(factory, size=1, max_uses=1)
+
+    first = pool.checkout()
+    pool.checkin(first)
+    second = pool.checkout()
+
+    first.quit.assert_called_once()
+    assert second is not first
+
+
+def test_checkout_discards_crashed_driver():
+    """
+    Test that an idle driver failing the health check is replaced.
+    """
+    crashed = MagicMock()
+    type(crashed).current_url = PropertyMock(side_effect=Exception("session deleted"))
+    factory = MagicMock(side_effect=[crashed, MagicMock()])
+    pool = DriverPool(factory, size=1)
+
+    pool.checkin(pool.checkout())
+    driver = pool.checkout()
+
+    crashed.quit.assert_called_once()
+    assert driver is not crashed
+
+
+def test_checkout_times_out_when_pool_is_exhausted():
+    """
+    Test that checkout raises when every driver is borrowed.
+    """
+    pool = DriverPool(MagicMock(), size=1, checkout_timeout=0.01)
+    pool.checkout()
+
+    with pytest.raises(TimeoutError):
+        pool.checkout()
+
+
+def test_close_quits_idle_drivers():
+    """
+    Test that closing the pool quits idle drivers.
+    """
+    pool = DriverPool(MagicMock(), size=1)
+    with pool.borrow() as driver:
+        pass
+
+    pool.close()
+
+    driver.quit.assert_called_once()
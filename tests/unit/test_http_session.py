@@ -0,0 +1,22 @@
+from src.http_session import create_session, get_default_session
+
+
+def test_create_session_configures_retries_and_pool():
+    """
+    Test that the session retries 429/5xx responses and keeps a sized connection pool.
+    """
+    session = create_session(retries=2, backoff_factor=0.1, pool_size=4)
+    adapter = session.get_adapter("https://restcountries.com")
+
+    assert adapter.max_retries.total == 2
+    assert adapter.max_retries.backoff_factor == 0.1
+    assert 429 in adapter.max_retries.status_forcelist
+    assert 503 in adapter.max_retries.status_forcelist
+    assert adapter._pool_maxsize == 4
+
+
+def test_get_default_session_is_shared():
+    """
+    Test that the default session is created once and reused.
+    """
+    assert get_default_session() is get_default_session()
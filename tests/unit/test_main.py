@@ -0,0 +1,407 @@
+import io
+import json
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from main import (
+    check_item,
+    parse_args,
+    run,
+    run_batch,
+    run_stream,
+    run_worker,
+    summarize,
+)
+from src.error import CircuitOpenError
+from src.rate_history import RateHistory
+from src.work_queue import DONE, SqliteWorkQueue
+
+
+@patch("main.CountryInfo")
+@patch("main.get_currency_rate")
+def test_run_batch_keeps_input_order(mock_get_currency_rate, mock_country_info):
+    """
+    Test that run_batch returns one result per country in input order.
+    """
+    rates = {
+        "GB": (1.17, "GBP", None),
+        "TR": (0.02, "TRY", None),
+        "ZZ": (None, None, "error"),
+    }
+    mock_get_currency_rate.side_effect = lambda driver, country_code, **kwargs: rates[
+        country_code
+    ]
+    mock_country_info.return_value.prefetch.return_value = None
+
+    results = run_batch(["GB", "TR", "ZZ"], threshold=1, workers=3, driver=MagicMock())
+
+    assert results == [("GB", True), ("TR", False), ("ZZ", None)]
+    mock_country_info.return_value.prefetch.assert_called_once()
+
+
+@patch("main.CountryInfo")
+@patch("main.get_currency_rate")
+def test_run_batch_reports_prefetch_failure_on_stderr(
+    mock_get_currency_rate, mock_country_info, capsys
+):
+    """
+    Test that a failed prefetch is reported on stderr, not mixed into the results on stdout.
+    """
+    mock_get_currency_rate.return_value = (1.17, "GBP", None)
+    mock_country_info.return_value.prefetch.return_value = "Error: timed out"
+
+    run_batch(["GB"], threshold=1, driver=MagicMock())
+
+    captured = capsys.readouterr()
+    assert "Falling back" not in captured.out
+    assert "Falling back to per-country lookups." in captured.err
+
+
+@patch("main.get_pair_rate")
+def test_check_item_returns_row_and_error(mock_get_pair_rate):
+    """
+    Test that check_item returns the result row along with the error that failed the check.
+    """
+    error = CircuitOpenError("Circuit open.")
+    mock_get_pair_rate.return_value = (None, error)
+
+    record, returned_error = check_item(
+        3, ("GBP", "USD"), 1, country_info=MagicMock(), driver=MagicMock()
+    )
+
+    assert returned_error is error
+    assert record["row"] == 3
+    assert record["threshold_met"] is None
+    assert record["error"] == str(error)
+
+
+def test_summarize():
+    """
+    Test that summarize counts passed, failed and errored countries.
+    """
+    summary = summarize([("GB", True), ("TR", False), ("ZZ", None), ("US", True)])
+
+    assert summary == {"total": 4, "passed": 2, "failed": 1, "errors": 1}
+
+
+def test_parse_args_defaults():
+    """
+    Test the default command line arguments.
+    """
+    args = parse_args([])
+
+    assert args.country_codes == ["TR", "GB"]
+    assert args.threshold == 1
+    assert args.workers == 1
+
+
+@patch("main.CountryInfo")
+@patch("main.get_pair_rate")
+@patch("main.get_currency_rate")
+def test_run_stream_writes_rows_and_skips_completed(
+    mock_get_currency_rate, mock_get_pair_rate, mock_country_info
+):
+    """
+    Test that run_stream skips completed rows and writes a result row per remaining item.
+    """
+    mock_get_currency_rate.return_value = (1.17, "GBP", None)
+    mock_get_pair_rate.return_value = (None, "error")
+    mock_country_info.return_value.prefetch.return_value = None
+    output = io.StringIO()
+
+    summary = run_stream(
+        [("TR",), ("GB",), ("GBP", "USD")],
+        output,
+        threshold=1,
+        skip=1,
+        driver=MagicMock(),
+    )
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row["row"] for row in rows] == [1, 2]
+    assert rows[0]["threshold_met"] is True
+    assert rows[1]["quote_currency"] == "USD"
+    assert rows[1]["error"] == "error"
+    assert summary == {"total": 2, "passed": 1, "failed": 0, "errors": 1}
+    assert mock_get_currency_rate.call_args.args[1] == "GB"
+
+
+@patch("main.CountryInfo")
+@patch("main.get_currency_rate")
+def test_run_stream_stops_at_open_circuit(mock_get_currency_rate, mock_country_info):
+    """
+    Test that run_stream stops without writing the row failed by an open circuit breaker,
+    so a resumed run checks it again.
+    """
+    mock_get_currency_rate.side_effect = [
+        (1.17, "GBP", None),
+        (None, "TRY", CircuitOpenError("Circuit open.")),
+        (0.92, "USD", None),
+    ]
+    mock_country_info.return_value.prefetch.return_value = None
+    output = io.StringIO()
+
+    summary = run_stream(
+        [("GB",), ("TR",), ("US",)], output, threshold=1, driver=MagicMock()
+    )
+
+    rows = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert [row["row"] for row in rows] == [0]
+    assert summary == {"total": 1, "passed": 1, "failed": 0, "errors": 0}
+
+
+def test_parse_args_resume_needs_output_file():
+    """
+    Test that resuming is rejected when results are written to stdout.
+    """
+    with pytest.raises(SystemExit):
+        parse_args(["--input", "codes.txt", "--resume"])
+
+    args = parse_args(["--input", "codes.txt", "--output", "out.csv", "--resume"])
+    assert args.format == "csv"
+
+
+@pytest.mark.parametrize(
+    "argv",
+    [
+        ["--workers", "0"],
+        ["--tabs", "0"],
+        ["--backend", "network"],
+        ["--backend", "network", "--browser", "lean"],
+    ],
+)
+def test_parse_args_rejects_invalid_combinations(argv):
+    """
+    Test that too few workers or tabs, and the network backend without a browser logging
+    network events, are rejected.
+    """
+    with pytest.raises(SystemExit):
+        parse_args(argv)
+
+
+def test_parse_args_network_backend_with_network_browser():
+    """
+    Test that the network backend is accepted with the browser that logs network events.
+    """
+    args = parse_args(["--backend", "network", "--browser", "lean-network"])
+
+    assert args.backend == "network"
+
+
+@patch("main.CountryInfo")
+@patch("main.get_currency_rates_in_tabs")
+def test_run_batch_in_tabs_splits_countries_between_workers(
+    mock_get_currency_rates_in_tabs, mock_country_info
+):
+    """
+    Test that with tabs every worker checks an even share of the countries, in input order.
+    """
+    rates = {
+        "GB": (1.17, "GBP", None),
+        "TR": (0.02, "TRY", None),
+        "ZZ": (None, None, "error"),
+    }
+    mock_get_currency_rates_in_tabs.side_effect = (
+        lambda driver, country_codes, tabs, **kwargs: [
+            rates[code] for code in country_codes
+        ]
+    )
+    mock_country_info.return_value.prefetch.return_value = None
+
+    results = run_batch(
+        ["GB", "TR", "ZZ"], threshold=1, workers=2, driver=MagicMock(), tabs=4
+    )
+
+    assert results == [("GB", True), ("TR", False), ("ZZ", None)]
+    shares = sorted(
+        call.args[1] for call in mock_get_currency_rates_in_tabs.call_args_list
+    )
+    assert shares == [["GB", "TR"], ["ZZ"]]
+
+
+@patch("main.CountryInfo")
+@patch("main.get_pair_rate")
+@patch("main.get_currency_rate")
+def test_run_worker_completes_queued_items(
+    mock_get_currency_rate, mock_get_pair_rate, mock_country_info, tmp_path
+):
+    """
+    Test that run_worker checks every queued item and stores its result row in the queue.
+    """
+    mock_get_currency_rate.return_value = (1.17, "GBP", None)
+    mock_get_pair_rate.return_value = (None, "error")
+    mock_country_info.return_value.prefetch.return_value = None
+    queue = SqliteWorkQueue(str(tmp_path / "queue.db"))
+    for item in [("GB",), ("GBP", "USD"), ("gb",)]:
+        queue.put(item)
+
+    summary = run_worker(queue, threshold=1, workers=2, driver=MagicMock())
+
+    rows = list(queue.results())
+    assert [(row["row"], row["currency"]) for row in rows] == [(0, "GBP"), (1, "GBP")]
+    assert rows[1]["error"] == "error"
+    assert summary == {"total": 2, "passed": 1, "failed": 0, "errors": 1}
+    assert queue.counts()[DONE] == 2
+    queue.close()
+
+
+@patch("main.time.sleep")
+@patch("main.CountryInfo")
+@patch("main.get_currency_rate")
+def test_run_worker_releases_jobs_failed_by_open_circuit(
+    mock_get_currency_rate, mock_country_info, mock_sleep, tmp_path
+):
+    """
+    Test that run_worker hands a job back and backs off when the circuit breaker fails it,
+    instead of storing the failure as its result.
+    """
+    mock_get_currency_rate.side_effect = [
+        (None, None, CircuitOpenError("Circuit open.")),
+        (1.17, "GBP", None),
+    ]
+    mock_country_info.return_value.prefetch.return_value = None
+    queue = SqliteWorkQueue(str(tmp_path / "queue.db"), max_attempts=1)
+    queue.put(("GB",))
+
+    summary = run_worker(queue, threshold=1, poll_seconds=7, driver=MagicMock())
+
+    assert [row["rate"] for row in queue.results()] == [1.17]
+    assert summary == {"total": 1, "passed": 1, "failed": 0, "errors": 0}
+    mock_sleep.assert_called_once_with(7)
+    queue.close()
+
+
+@patch("main.CountryInfo")
+@patch("main.get_pair_rate")
+@patch("main.get_currency_rate")
+def test_run_stream_records_rate_history(
+    mock_get_currency_rate, mock_get_pair_rate, mock_country_info, tmp_path
+):
+    """
+    Test that run_stream appends the rate of every successful check to the history.
+    """
+    mock_get_currency_rate.return_value = (1.17, "GBP", None)
+    mock_get_pair_rate.return_value = (None, "error")
+    mock_country_info.return_value.prefetch.return_value = None
+    history = RateHistory(str(tmp_path))
+
+    run_stream(
+        [("GB",), ("GBP", "USD")],
+        io.StringIO(),
+        threshold=1,
+        driver=MagicMock(),
+        history=history,
+    )
+
+    assert [rate for _, rate in history.last("GBP", "EUR", 5)] == [1.17]
+    assert history.last("GBP", "USD", 5) == []
+
+
+@patch("main.CountryInfo")
+@patch("main.get_currency_rate")
+def test_run_stream_resumed_csv_keeps_single_header(
+    mock_get_currency_rate, mock_country_info
+):
+    """
+    Test that resuming a CSV file holding only its header does not write the header again.
+    """
+    mock_get_currency_rate.return_value = (1.17, "GBP", None)
+    mock_country_info.return_value.prefetch.return_value = None
+    output = io.StringIO()
+
+    run_stream(
+        [("GB",)],
+        output,
+        threshold=1,
+        output_format="csv",
+        skip=0,
+        write_header=False,
+        driver=MagicMock(),
+    )
+
+    assert output.getvalue().startswith("0,GB,GBP,EUR,1.17,True")
+
+
+@patch("main.RateHistory")
+@patch("main.RateCache")
+@patch("main.CountryCache")
+def test_run_clears_country_cache_first(
+    mock_country_cache, mock_rate_cache, mock_rate_history
+):
+    """
+    Test that clearing the country cache exits before any other cache or the history is opened.
+    """
+    status = run(parse_args(["--clear-country-cache", "--history", "history"]))
+
+    assert status == 0
+    mock_country_cache.return_value.invalidate.assert_called_once()
+    mock_rate_cache.assert_not_called()
+    mock_rate_history.assert_not_called()
+
+
+@patch("main.run_batch")
+def test_run_checks_country_codes(mock_run_batch, tmp_path, capsys):
+    """
+    Test that run checks the positional country codes with the options from the command line.
+    """
+    mock_run_batch.return_value = [("GB", True), ("TR", False)]
+
+    status = run(parse_args(["GB", "TR", "--tabs", "2", "--cache-dir", str(tmp_path)]))
+
+    assert status == 0
+    assert mock_run_batch.call_args.args == (["GB", "TR"], 1)
+    assert mock_run_batch.call_args.kwargs["tabs"] == 2
+    assert mock_run_batch.call_args.kwargs["driver"] == "chrome"
+    assert "Checked 2 countries: 1 above threshold" in capsys.readouterr().out
+
+
+@patch("main.run_stream")
+def test_run_resumes_input(mock_run_stream, tmp_path):
+    """
+    Test that a resumed run skips the rows already written and keeps the existing header.
+    """
+    mock_run_stream.return_value = {"total": 1, "passed": 1, "failed": 0, "errors": 0}
+    input_path = tmp_path / "codes.txt"
+    input_path.write_text("GB\nTR\n")
+    output_path = tmp_path / "out.csv"
+    output_path.write_text("row,country_code\n0,GB\n")
+
+    status = run(
+        parse_args(
+            [
+                "--input",
+                str(input_path),
+                "--output",
+                str(output_path),
+                "--resume",
+                "--cache-dir",
+                str(tmp_path),
+            ]
+        )
+    )
+
+    assert status == 0
+    assert mock_run_stream.call_args.kwargs["skip"] == 1
+    assert mock_run_stream.call_args.kwargs["write_header"] is False
+    assert mock_run_stream.call_args.kwargs["output_format"] == "csv"
+
+
+def test_run_enqueues_and_collects(tmp_path):
+    """
+    Test that run queues the country codes with the enqueue role and writes the results with the collect role.
+    """
+    queue_path = str(tmp_path / "queue.db")
+    output_path = tmp_path / "out.jsonl"
+    options = ["--queue", queue_path, "--cache-dir", str(tmp_path)]
+
+    assert run(parse_args(["GB", "tr", "--role", "enqueue", *options])) == 0
+
+    queue = SqliteWorkQueue(queue_path)
+    job = queue.lease("worker-1")
+    queue.complete(job.key, {"row": job.row, "country_code": job.key})
+    queue.close()
+
+    collect = ["--role", "collect", "--output", str(output_path), *options]
+    assert run(parse_args(collect)) == 0
+    assert json.loads(output_path.read_text()) == {"row": 0, "country_code": "GB"}
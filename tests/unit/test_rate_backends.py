@@ -0,0 +1,101 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+import requests
+
+from src.rate_backends import NetworkRateBackend, RateBackend
+
+RATE_URL = (
+    "https://fxds-public-exchange-rates-api.oanda.com/cc-api/currencies"
+    "?base=EUR&quote=USD&data_type=general_currency_pair"
+)
+
+
+def _performance_entry(method, url):
+    """
+    Build a Chrome performance log entry for a network request.
+    """
+    message = {"message": {"method": method, "params": {"request": {"url": url}}}}
+    return {"message": json.dumps(message)}
+
+
+def _rate_response(status_code, payload):
+    """
+    Build a rate endpoint response.
+    """
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+def test_learn_captures_rate_endpoint():
+    """
+    Test that the rate endpoint is captured from the performance log.
+    """
+    mock_driver = MagicMock()
+    mock_driver.get_log.return_value = [
+        _performance_entry("Network.requestWillBeSent", "https://www.oanda.com/app.js"),
+        _performance_entry("Network.responseReceived", RATE_URL),
+        _performance_entry("Network.requestWillBeSent", RATE_URL),
+    ]
+    backend = NetworkRateBackend(session=MagicMock())
+
+    backend.learn(mock_driver)
+
+    assert backend.is_ready
+    assert backend.endpoint == RATE_URL
+
+
+def test_convert_queries_captured_endpoint_with_pair():
+    """
+    Test that convert replaces the base and quote of the captured endpoint.
+    """
+    mock_session = MagicMock()
+    mock_session.get.return_value = _rate_response(
+        200, {"response": [{"average_bid": "1.16", "average_ask": "1.18"}]}
+    )
+    backend = NetworkRateBackend(session=mock_session)
+    backend.endpoint = RATE_URL
+
+    rate, error = backend.convert("GBP", "EUR")
+
+    assert rate == 1.17
+    assert error is None
+    url = mock_session.get.call_args.args[0]
+    assert "base=GBP" in url
+    assert "quote=EUR" in url
+    assert "data_type=general_currency_pair" in url
+
+
+def test_convert_before_capture():
+    """
+    Test that convert fails before the endpoint is captured.
+    """
+    rate, error = NetworkRateBackend(session=MagicMock()).convert("GBP", "EUR")
+
+    assert rate is None
+    assert str(error) == "Error: Rate endpoint has not been captured."
+
+
+def test_extract_rate_with_invalid_response():
+    """
+    Test the extract_rate function with an unexpected response body.
+    """
+    rate, error = NetworkRateBackend.extract_rate(_rate_response(200, {"response": []}))
+
+    assert rate is None
+    assert str(error) == "Error: Invalid response format."
+
+
+def test_backend_without_convert_cannot_be_created():
+    """
+    Test that a backend missing convert fails when it is created, not during a run.
+    """
+
+    class IncompleteBackend(RateBackend):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteBackend()
@@ -0,0 +1,96 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from src.rate_cache import RateCache
+
+
+def test_get_returns_fresh_rate():
+    """
+    Test that a stored rate is returned while it is fresh.
+    """
+    cache = RateCache(max_age_seconds=60)
+    cache.set("GBP", "EUR", 1.17)
+
+    assert cache.get("gbp", "eur") == 1.17
+    assert cache.stats() == {"hits": 1, "misses": 0, "size": 1}
+
+
+@patch("src.rate_cache.time.time")
+def test_get_ignores_expired_rate(mock_time):
+    """
+    Test that a rate older than the freshness window is a miss.
+    """
+    cache = RateCache(max_age_seconds=60)
+    mock_time.return_value = 1000
+    cache.set("GBP", "EUR", 1.17)
+
+    mock_time.return_value = 1061
+
+    assert cache.get("GBP", "EUR") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_set_evicts_least_recently_used_rate():
+    """
+    Test that the least recently used pair is evicted when the cache is full.
+    """
+    cache = RateCache(max_entries=2)
+    cache.set("GBP", "EUR", 1.17)
+    cache.set("TRY", "EUR", 0.03)
+    cache.get("GBP", "EUR")
+
+    cache.set("USD", "EUR", 0.92)
+
+    assert cache.get("TRY", "EUR") is None
+    assert cache.get("GBP", "EUR") == 1.17
+    assert cache.get("USD", "EUR") == 0.92
+
+
+def test_rates_are_persisted(tmp_path):
+    """
+    Test that rates written by one cache instance are read by another.
+    """
+    RateCache(cache_dir=str(tmp_path)).set("GBP", "EUR", 1.17)
+
+    assert RateCache(cache_dir=str(tmp_path)).get("GBP", "EUR") == 1.17
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        {"GBP": 1.17},
+        [["GBP", "EUR", 1.17]],
+        [["GBP", "EUR", "now", 1.17]],
+        [None],
+    ],
+)
+def test_file_of_wrong_shape_loads_as_empty(tmp_path, content):
+    """
+    Test that a rates file that is valid JSON but not a cache is treated as empty instead of crashing.
+    """
+    with open(
+        os.path.join(tmp_path, RateCache.FILE_NAME), "w", encoding="utf-8"
+    ) as file:
+        json.dump(content, file)
+
+    cache = RateCache(cache_dir=str(tmp_path))
+
+    assert cache.get("GBP", "EUR") is None
+
+
+def test_invalid_rows_are_dropped(tmp_path):
+    """
+    Test that only the rows of the wrong shape are dropped from an otherwise valid file.
+    """
+    with open(
+        os.path.join(tmp_path, RateCache.FILE_NAME), "w", encoding="utf-8"
+    ) as file:
+        json.dump([["GBP", "EUR", 1e12, 1.17], ["TRY", "EUR"]], file)
+
+    cache = RateCache(cache_dir=str(tmp_path))
+
+    assert cache.get("GBP", "EUR") == 1.17
+    assert cache.get("TRY", "EUR") is None
@@ -0,0 +1,134 @@
+from array import array
+from unittest.mock import patch
+
+import pytest
+
+from src.rate_history import (
+    RECORD_SIZE,
+    RateHistory,
+    _read_records,
+    first_crossing,
+    rolling_extremes,
+)
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = RateHistory(str(tmp_path / "history"))
+    for timestamp, rate in enumerate([0.9, 0.95, 1.1, 1.2, 0.8], start=100):
+        history.append("gbp", "eur", rate, timestamp=timestamp)
+    return history
+
+
+def test_series_reads_columns(history):
+    """
+    Test that the recorded samples are read back as timestamp and rate columns.
+    """
+    timestamps, rates = history.series("GBP", "EUR")
+
+    assert timestamps == array("d", [100, 101, 102, 103, 104])
+    assert rates == array("d", [0.9, 0.95, 1.1, 1.2, 0.8])
+    assert history.series("GBP", "EUR", since=102.5) == (
+        array("d", [103, 104]),
+        array("d", [1.2, 0.8]),
+    )
+
+
+def test_series_of_unknown_pair_is_empty(history):
+    """
+    Test that a pair without history has empty columns.
+    """
+    assert history.series("TRY", "EUR") == (array("d"), array("d"))
+
+
+def test_series_ignores_partial_record(history):
+    """
+    Test that a record cut short by a crash is ignored.
+    """
+    with open(history._path("GBP", "EUR"), "ab") as file:
+        file.write(b"\x00" * 7)
+
+    assert len(history.series("GBP", "EUR")[1]) == 5
+
+
+def test_last(history):
+    """
+    Test that last returns the most recent samples, oldest first.
+    """
+    assert history.last("GBP", "EUR", 2) == [(103, 1.2), (104, 0.8)]
+    assert len(history.last("GBP", "EUR", 10)) == 5
+    assert history.last("GBP", "EUR", 0) == []
+
+
+def test_last_reads_only_the_tail(history):
+    """
+    Test that last reads the most recent records without reading the whole file.
+    """
+    for timestamp in range(105, 1105):
+        history.append("GBP", "EUR", 1.0, timestamp=timestamp)
+
+    with patch(
+        "src.rate_history._read_records", wraps=_read_records
+    ) as mock_read_records:
+        assert history.last("GBP", "EUR", 2) == [(1103, 1.0), (1104, 1.0)]
+
+    _, start, end = mock_read_records.call_args.args
+    assert end - start == 2 * RECORD_SIZE
+
+
+def test_append_rejects_older_timestamp(history):
+    """
+    Test that a sample older than the last record is rejected, so the records stay in time order.
+    """
+    with pytest.raises(ValueError):
+        history.append("GBP", "EUR", 1.0, timestamp=103)
+
+    assert history.last("GBP", "EUR", 1) == [(104, 0.8)]
+
+
+@patch("src.rate_history.time.time")
+def test_append_clamps_clock_behind_last_record(mock_time, history):
+    """
+    Test that a sample timed by a clock behind the last record is recorded at the last record's time.
+    """
+    mock_time.return_value = 50
+
+    history.append("GBP", "EUR", 1.0)
+
+    assert history.last("GBP", "EUR", 2) == [(104, 0.8), (104, 1.0)]
+
+
+def test_append_drops_partial_record(history):
+    """
+    Test that a record cut short by a crash is dropped before appending, so later records stay aligned.
+    """
+    with open(history._path("GBP", "EUR"), "ab") as file:
+        file.write(b"\x00" * 7)
+
+    history.append("GBP", "EUR", 1.0, timestamp=105)
+
+    assert history.last("GBP", "EUR", 2) == [(104, 0.8), (105, 1.0)]
+
+
+def test_rolling_extremes(history):
+    """
+    Test that the minimum and maximum of every full window are returned.
+    """
+    assert history.rolling_extremes("GBP", "EUR", 3) == [
+        (102, 0.9, 1.1),
+        (103, 0.95, 1.2),
+        (104, 0.8, 1.2),
+    ]
+
+    with pytest.raises(ValueError):
+        rolling_extremes(array("d", [1.0]), 0)
+
+
+def test_first_crossing(history):
+    """
+    Test that the first sample on the other side of the threshold is found.
+    """
+    assert history.first_crossing("GBP", "EUR", 1) == (102, 1.1)
+    assert history.first_crossing("GBP", "EUR", 1, since=103) == (104, 0.8)
+    assert history.first_crossing("GBP", "EUR", 2) is None
+    assert first_crossing(array("d", [1.0, 1.0]), 1) is None
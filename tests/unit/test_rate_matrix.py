@@ -0,0 +1,88 @@
+import math
+from unittest.mock import patch
+
+import pytest
+
+from src.rate_matrix import RateMatrix
+
+
+def test_cross_rate_triangulates_through_anchor():
+    """
+    Test that a cross rate is derived from two anchor rates.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+    rate_matrix.set_anchor_rate("TRY", 0.03)
+
+    assert math.isclose(rate_matrix.cross_rate("TRY", "GBP"), 0.025)
+    assert math.isclose(rate_matrix.cross_rate("GBP", "EUR"), 1.2)
+    assert math.isclose(rate_matrix.cross_rate("eur", "gbp"), 1 / 1.2)
+
+
+def test_cross_rates_returns_none_for_unknown_currency():
+    """
+    Test that pairs with an unknown anchor rate are not derived.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+
+    assert rate_matrix.cross_rates([("GBP", "EUR"), ("USD", "GBP")]) == [1.2, None]
+
+
+def test_missing_anchor_rates():
+    """
+    Test that only currencies without an anchor rate are reported, once each.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+
+    missing = rate_matrix.missing_anchor_rates(
+        [("TRY", "GBP"), ("USD", "EUR"), ("TRY", "USD")]
+    )
+
+    assert missing == ["TRY", "USD"]
+
+
+def test_to_matrix():
+    """
+    Test that the full matrix converts row currencies to column currencies.
+    """
+    rate_matrix = RateMatrix("EUR")
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+
+    matrix = rate_matrix.to_matrix(["EUR", "GBP"])
+
+    assert list(matrix[0]) == [1.0, 1 / 1.2]
+    assert list(matrix[1]) == [1.2, 1.0]
+
+
+@patch("src.rate_matrix.time.time")
+def test_expired_anchor_rates_are_missing(mock_time):
+    """
+    Test that anchor rates older than the freshness window are scraped again and not derived from.
+    """
+    rate_matrix = RateMatrix("EUR", max_age_seconds=60)
+    mock_time.return_value = 1000
+    rate_matrix.set_anchor_rate("GBP", 1.2)
+
+    mock_time.return_value = 1061
+
+    assert rate_matrix.missing_anchor_rates([("GBP", "EUR")]) == ["GBP"]
+    assert not rate_matrix.has_anchor_rate("GBP")
+    assert rate_matrix.cross_rate("GBP", "EUR") is None
+
+    rate_matrix.set_anchor_rate("GBP", 1.18)
+    assert rate_matrix.cross_rate("GBP", "EUR") == 1.18
+
+
+def test_set_anchor_rate_rejects_non_positive_rate():
+    """
+    Test that a zero or negative anchor rate is rejected instead of breaking the cross rates.
+    """
+    rate_matrix = RateMatrix("EUR")
+
+    for rate in (0.0, -1.0, math.nan):
+        with pytest.raises(ValueError):
+            rate_matrix.set_anchor_rate("GBP", rate)
+
+    assert not rate_matrix.has_anchor_rate("GBP")
@@ -0,0 +1,100 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException
+
+from src.resilience import CircuitBreaker, RetryPolicy, is_transient
+
+
+def test_is_transient():
+    """
+    Test that stale elements are retried and unknown failures are not.
+    """
+    assert is_transient(StaleElementReferenceException())
+    assert not is_transient(ValueError("could not convert string to float"))
+
+
+def test_retry_policy_delays_are_jittered_and_capped():
+    """
+    Test that the delays stay below the capped exponential backoff.
+    """
+    policy = RetryPolicy(attempts=5, base_delay=1, max_delay=3)
+
+    delays = list(policy.delays())
+
+    assert len(delays) == 4
+    assert all(0 <= delay <= bound for delay, bound in zip(delays, [1, 2, 3, 3]))
+
+
+def test_retry_policy_backoff_sleeps_between_attempts():
+    """
+    Test that the backoff sleeps before every attempt after the first.
+    """
+    sleep = MagicMock()
+    policy = RetryPolicy(attempts=3, sleep=sleep)
+
+    assert list(policy.backoff()) == [1, 2, 3]
+    assert sleep.call_count == 2
+
+
+def test_retry_policy_requires_an_attempt():
+    """
+    Test that a policy without attempts is rejected.
+    """
+    with pytest.raises(ValueError):
+        RetryPolicy(attempts=0)
+
+
+def test_circuit_breaker_opens_on_failure_rate():
+    """
+    Test that the circuit opens once the failure rate crosses the threshold.
+    """
+    breaker = CircuitBreaker(failure_rate=0.5, window=4, min_attempts=4)
+
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allow()
+
+
+@patch("src.resilience.time.monotonic")
+def test_circuit_breaker_lets_one_trial_through_after_cool_down(mock_monotonic):
+    """
+    Test that a single trial attempt is allowed after the cool-down and closes the circuit on success.
+    """
+    mock_monotonic.return_value = 100
+    breaker = CircuitBreaker(min_attempts=1, reset_seconds=30)
+    breaker.record_failure()
+
+    mock_monotonic.return_value = 130
+
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow()
+
+
+@patch("src.resilience.time.monotonic")
+def test_circuit_breaker_reopens_on_failed_trial(mock_monotonic):
+    """
+    Test that a failed trial attempt keeps the circuit open for another cool-down.
+    """
+    mock_monotonic.return_value = 100
+    breaker = CircuitBreaker(min_attempts=1, reset_seconds=30)
+    breaker.record_failure()
+
+    mock_monotonic.return_value = 130
+    breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    mock_monotonic.return_value = 159
+    assert not breaker.allow()
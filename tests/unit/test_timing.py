@@ -0,0 +1,79 @@
+import io
+import json
+
+import pytest
+
+from src.timing import PhaseTimer, format_prometheus, write_json_lines
+
+
+def test_phase_records_and_sums_durations():
+    """
+    Test that repeated phases are summed and listed in first-run order.
+    """
+    timer = PhaseTimer()
+
+    with timer.phase("page_load"):
+        pass
+    with timer.phase("base_input"):
+        pass
+    with timer.phase("page_load"):
+        pass
+
+    durations = timer.durations()
+    assert list(durations) == ["page_load", "base_input"]
+    assert len(timer.spans) == 3
+    assert timer.failed_phase is None
+
+
+def test_phase_records_first_failure():
+    """
+    Test that the first failing phase and its exception type are recorded.
+    """
+    timer = PhaseTimer()
+
+    with pytest.raises(TimeoutError):
+        with timer.phase("rate_settle"):
+            raise TimeoutError()
+
+    assert timer.failed_phase == "rate_settle"
+    assert timer.failure == "TimeoutError"
+    assert "rate_settle" in timer.durations()
+
+
+def test_write_json_lines():
+    """
+    Test that each timer is written as one JSON line with its labels.
+    """
+    timer = PhaseTimer({"country": "GB"})
+    with timer.phase("country_fetch"):
+        pass
+    file = io.StringIO()
+
+    write_json_lines([timer, PhaseTimer({"country": "TR"})], file)
+
+    lines = file.getvalue().splitlines()
+    assert len(lines) == 2
+    record = json.loads(lines[0])
+    assert record["country"] == "GB"
+    assert list(record["phases"]) == ["country_fetch"]
+    assert record["failed_phase"] is None
+
+
+def test_format_prometheus():
+    """
+    Test that every phase is exported as a labelled sample.
+    """
+    timer = PhaseTimer({"country": "GB"})
+    timer.spans = [("page_load", 1.5), ("rate_settle", 0.25)]
+
+    text = format_prometheus([timer])
+
+    assert "# TYPE currency_conversion_phase_seconds gauge" in text
+    assert (
+        'currency_conversion_phase_seconds{country="GB",phase="page_load"} 1.500000'
+        in text
+    )
+    assert (
+        'currency_conversion_phase_seconds{country="GB",phase="rate_settle"} 0.250000'
+        in text
+    )
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+from selenium.webdriver.common.by import By
+
+from src.wait_conditions import RateSettled
+
+
+def _driver_with_values(*values):
+    """
+    Build a mock driver whose observed input returns the given values on successive polls.
+    """
+    element = MagicMock()
+    element.get_attribute.side_effect = list(values)
+    driver = MagicMock()
+    driver.find_element.return_value = element
+    return driver, element
+
+
+def test_rate_settled_waits_for_change_and_stability():
+    """
+    Test that the condition is only met once the value has changed and stayed the same.
+    """
+    driver, element = _driver_with_values("1.00", "", "1.17", "1.17")
+    condition = RateSettled((By.CSS_SELECTOR, "input"), previous_value="1.00")
+
+    assert condition(driver) is False
+    assert condition(driver) is False
+    assert condition(driver) is False
+    assert condition(driver) is element
+
+
+def test_rate_settled_restarts_when_value_keeps_changing():
+    """
+    Test that an intermediate value resets the stability count.
+    """
+    driver, element = _driver_with_values("1.25", "1.17", "1.17")
+    condition = RateSettled((By.CSS_SELECTOR, "input"), previous_value="1.00")
+
+    assert condition(driver) is False
+    assert condition(driver) is False
+    assert condition(driver) is element
+
+
+def test_rate_settled_keeps_last_value_when_unchanged():
+    """
+    Test that an unchanged value never meets the condition but is remembered.
+    """
+    driver, _ = _driver_with_values("1.00", "1.00", "1.00")
+    condition = RateSettled((By.CSS_SELECTOR, "input"), previous_value="1.00")
+
+    assert not any(condition(driver) for _ in range(3))
+    assert condition.last_value == "1.00"
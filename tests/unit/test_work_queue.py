@@ -0,0 +1,368 @@
+from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
+
+from src.work_queue import (
+    ABANDONED,
+    DONE,
+    LEASED,
+    PENDING,
+    Job,
+    RedisWorkQueue,
+    SqliteWorkQueue,
+    WorkQueue,
+    job_key,
+    open_queue,
+)
+
+
+class FakeRedis:
+    """
+    An in-memory stand-in for the redis.Redis commands the queue uses, with decoded responses.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.fail_execute = False
+        self.hashes = defaultdict(dict)
+        self.lists = defaultdict(list)
+        self.sorted_sets = defaultdict(dict)
+        self.sets = defaultdict(set)
+
+    def pipeline(self):
+        return FakePipeline(self)
+
+    def transaction(self, function, *watches, value_from_callable=False):
+        with self.pipeline() as pipe:
+            pipe.watch(*watches)
+            value = function(pipe)
+            results = pipe.execute()
+        return value if value_from_callable else results
+
+    def time(self):
+        return int(self.now), int(self.now % 1 * 1000000)
+
+    def hexists(self, name, key):
+        return key in self.hashes[name]
+
+    def hlen(self, name):
+        return len(self.hashes[name])
+
+    def hget(self, name, key):
+        return self.hashes[name].get(key)
+
+    def hmget(self, name, keys):
+        return [self.hashes[name].get(key) for key in keys]
+
+    def hgetall(self, name):
+        return dict(self.hashes[name])
+
+    def hset(self, name, key, value):
+        is_new = key not in self.hashes[name]
+        self.hashes[name][key] = str(value)
+        return int(is_new)
+
+    def hsetnx(self, name, key, value):
+        return self.hset(name, key, value) if key not in self.hashes[name] else 0
+
+    def hincrby(self, name, key, amount=1):
+        value = int(self.hashes[name].get(key, 0)) + amount
+        self.hashes[name][key] = str(value)
+        return value
+
+    def rpush(self, name, *values):
+        self.lists[name].extend(values)
+        return len(self.lists[name])
+
+    def lpush(self, name, *values):
+        self.lists[name][:0] = reversed(values)
+        return len(self.lists[name])
+
+    def lpop(self, name):
+        return self.lists[name].pop(0) if self.lists[name] else None
+
+    def lindex(self, name, index):
+        return self.lists[name][index] if self.lists[name] else None
+
+    def llen(self, name):
+        return len(self.lists[name])
+
+    def zadd(self, name, mapping):
+        self.sorted_sets[name].update(mapping)
+
+    def zrem(self, name, *keys):
+        return sum(self.sorted_sets[name].pop(key, None) is not None for key in keys)
+
+    def zscore(self, name, key):
+        return self.sorted_sets[name].get(key)
+
+    def zcard(self, name):
+        return len(self.sorted_sets[name])
+
+    def zrangebyscore(self, name, low, high):
+        scores = self.sorted_sets[name]
+        return sorted(
+            (key for key, score in scores.items() if float(low) <= score <= high),
+            key=scores.__getitem__,
+        )
+
+    def sadd(self, name, *values):
+        self.sets[name].update(values)
+
+    def scard(self, name):
+        return len(self.sets[name])
+
+    def close(self):
+        pass
+
+
+class FakePipeline:
+    """
+    Runs commands right away while watching, and queues them until execute after multi.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.commands = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.commands = []
+
+    def watch(self, *names):
+        self.commands = None
+
+    def multi(self):
+        self.commands = []
+
+    def execute(self):
+        commands, self.commands = self.commands or [], []
+        if self.client.fail_execute:
+            raise ConnectionError("Connection lost.")
+        return [command(*args) for command, args in commands]
+
+    def __getattr__(self, name):
+        command = getattr(self.client, name)
+        if self.commands is None:
+            return command
+        return lambda *args: self.commands.append((command, args))
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = SqliteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    yield queue
+    queue.close()
+
+
+@pytest.fixture
+def redis_client():
+    return FakeRedis()
+
+
+@pytest.fixture
+def redis_queue(redis_client):
+    return RedisWorkQueue(redis_client, max_attempts=2)
+
+
+def test_queue_without_all_methods_cannot_be_created():
+    """
+    Test that a queue missing part of the interface fails when it is created.
+    """
+
+    class IncompleteQueue(WorkQueue):
+        def put(self, item):
+            return True
+
+    with pytest.raises(TypeError):
+        IncompleteQueue()
+
+
+def test_job_key():
+    """
+    Test that items with the same codes get the same key.
+    """
+    assert job_key(("gb",)) == "GB"
+    assert job_key(("GBP", "eur")) == "GBP/EUR"
+
+
+def test_put_is_idempotent(queue):
+    """
+    Test that an item is only queued once.
+    """
+    assert queue.put(("GB",))
+    assert not queue.put(("gb",))
+    assert queue.put(("GBP", "EUR"))
+
+    assert queue.counts() == {PENDING: 2, LEASED: 0, DONE: 0, ABANDONED: 0}
+
+
+def test_lease_hands_out_jobs_in_order(queue):
+    """
+    Test that leased jobs are handed out oldest first and only once.
+    """
+    queue.put(("GB",))
+    queue.put(("GBP", "EUR"))
+
+    assert queue.lease("worker-1") == Job("GB", 0, ("GB",), 1)
+    assert queue.lease("worker-2") == Job("GBP/EUR", 1, ("GBP", "EUR"), 1)
+    assert queue.lease("worker-1") is None
+    assert queue.counts()[LEASED] == 2
+
+
+@patch("src.work_queue.time.time")
+def test_expired_lease_is_handed_out_again(mock_time, queue):
+    """
+    Test that the job of a crashed worker is re-queued once its lease runs out,
+    and abandoned once it is out of attempts.
+    """
+    queue.put(("GB",))
+    mock_time.return_value = 1000
+    queue.lease("crashed", lease_seconds=60)
+
+    mock_time.return_value = 1030
+    assert queue.lease("worker-2", lease_seconds=60) is None
+
+    mock_time.return_value = 1061
+    assert queue.counts()[PENDING] == 1
+    assert queue.lease("worker-2", lease_seconds=60) == Job("GB", 0, ("GB",), 2)
+
+    mock_time.return_value = 1122
+    assert queue.lease("worker-3", lease_seconds=60) is None
+    assert queue.counts() == {PENDING: 0, LEASED: 0, DONE: 0, ABANDONED: 1}
+
+
+def test_release_hands_job_back_without_using_an_attempt(queue):
+    """
+    Test that a released job is pending again with its attempt given back,
+    and that only the worker holding the lease can release it.
+    """
+    queue.put(("GB",))
+    queue.lease("worker-1")
+
+    assert not queue.release("GB", "worker-2")
+    assert queue.release("GB", "worker-1")
+    assert not queue.release("GB", "worker-1")
+    assert queue.counts()[PENDING] == 1
+    assert queue.lease("worker-2") == Job("GB", 0, ("GB",), 1)
+
+
+def test_complete_keeps_first_result(queue):
+    """
+    Test that completing a job twice, e.g. by a worker whose lease ran out, keeps the first result.
+    """
+    queue.put(("TR",))
+    queue.put(("GB",))
+    queue.lease("worker-1")
+    queue.lease("worker-1")
+
+    assert queue.complete("GB", {"row": 1, "rate": 1.17})
+    assert not queue.complete("GB", {"row": 1, "rate": 1.18})
+    assert queue.complete("TR", {"row": 0, "rate": 0.02})
+
+    assert list(queue.results()) == [{"row": 0, "rate": 0.02}, {"row": 1, "rate": 1.17}]
+    assert queue.lease("worker-2") is None
+    assert queue.counts()[DONE] == 2
+
+
+def test_queue_is_shared_between_connections(tmp_path):
+    """
+    Test that workers with their own connection to the file see each other's jobs.
+    """
+    path = str(tmp_path / "queue.db")
+    producer = open_queue(f"sqlite://{path}")
+    worker = open_queue(path)
+
+    producer.put(("GB",))
+    job = worker.lease("worker-1")
+    worker.complete(job.key, {"row": job.row})
+
+    assert list(producer.results()) == [{"row": 0}]
+    producer.close()
+    worker.close()
+
+
+def test_redis_put_is_idempotent(redis_queue):
+    """
+    Test that an item is only queued once in Redis, numbered in the order it was queued.
+    """
+    assert redis_queue.put(("GB",))
+    assert not redis_queue.put(("gb",))
+    assert redis_queue.put(("GBP", "EUR"))
+
+    assert redis_queue.counts() == {PENDING: 2, LEASED: 0, DONE: 0, ABANDONED: 0}
+    assert redis_queue.lease("worker-1") == Job("GB", 0, ("GB",), 1)
+    assert redis_queue.lease("worker-1") == Job("GBP/EUR", 1, ("GBP", "EUR"), 1)
+
+
+def test_redis_put_is_atomic(redis_client, redis_queue):
+    """
+    Test that a put cut short by a lost connection leaves nothing behind, so it can simply be retried.
+    """
+    redis_client.fail_execute = True
+    with pytest.raises(ConnectionError):
+        redis_queue.put(("GB",))
+
+    redis_client.fail_execute = False
+    assert redis_queue.counts()[PENDING] == 0
+    assert redis_queue.put(("GB",))
+    assert redis_queue.lease("worker-1") == Job("GB", 0, ("GB",), 1)
+
+
+def test_redis_expired_lease_is_handed_out_again(redis_client, redis_queue):
+    """
+    Test that a Redis job whose lease ran out on the server's clock is re-queued,
+    and abandoned once it is out of attempts.
+    """
+    redis_queue.put(("GB",))
+    redis_queue.lease("crashed", lease_seconds=60)
+
+    redis_client.now += 30
+    assert redis_queue.lease("worker-2", lease_seconds=60) is None
+
+    redis_client.now += 31
+    assert redis_queue.lease("worker-2", lease_seconds=60) == Job("GB", 0, ("GB",), 2)
+
+    redis_client.now += 61
+    assert redis_queue.lease("worker-3", lease_seconds=60) is None
+    assert redis_queue.counts() == {PENDING: 0, LEASED: 0, DONE: 0, ABANDONED: 1}
+
+
+def test_redis_complete_keeps_first_result(redis_queue):
+    """
+    Test that completing a Redis job twice keeps the first result, and results come back in queue order.
+    """
+    redis_queue.put(("TR",))
+    redis_queue.put(("GB",))
+    redis_queue.lease("worker-1")
+    redis_queue.lease("worker-1")
+
+    assert redis_queue.complete("GB", {"row": 1, "rate": 1.17})
+    assert not redis_queue.complete("GB", {"row": 1, "rate": 1.18})
+    assert redis_queue.complete("TR", {"row": 0, "rate": 0.02})
+
+    assert list(redis_queue.results()) == [
+        {"row": 0, "rate": 0.02},
+        {"row": 1, "rate": 1.17},
+    ]
+    assert redis_queue.lease("worker-2") is None
+    assert redis_queue.counts() == {PENDING: 0, LEASED: 0, DONE: 2, ABANDONED: 0}
+
+
+def test_redis_release_hands_job_back_without_using_an_attempt(redis_queue):
+    """
+    Test that a released Redis job is first in line again with its attempt given back,
+    and that only the worker holding the lease can release it.
+    """
+    redis_queue.put(("GB",))
+    redis_queue.put(("TR",))
+    redis_queue.lease("worker-1")
+
+    assert not redis_queue.release("GB", "worker-2")
+    assert redis_queue.release("GB", "worker-1")
+    assert not redis_queue.release("GB", "worker-1")
+    assert redis_queue.counts()[PENDING] == 2
+    assert redis_queue.lease("worker-2") == Job("GB", 0, ("GB",), 1)